@@ -0,0 +1,142 @@
+import time
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from .upload_control import UploadControl
+
+BYTES_PER_KBIT = 125 # 1 kbit/s = 125 bytes/s (los límites se configuran en kbit/s, como las velocidades de subida de las conexiones)
+BURST_SECONDS = 0.5 # Ráfaga permitida sobre el límite (en segundos de límite)
+MIN_BURST_BYTES = 64 * 1024 # Al menos unos cuantos bloques de envío, para no despertar por cada bloque de 8 KB
+PROFILE_CHECK_SECONDS = 30.0 # Cada cuánto se reevalúa el perfil horario durante una subida
+THROUGHPUT_WINDOW_SECONDS = 3.0 # Ventana de la velocidad efectiva mostrada en la UI
+THROUGHPUT_SLOT_SECONDS = 0.25
+
+def _parse_minute_of_day(value: str) -> int:
+    hours, minutes = (int(part) for part in str(value).strip().split(":"))
+    if not (0 <= hours <= 23 and 0 <= minutes <= 59): raise ValueError(value)
+    return hours * 60 + minutes
+
+def parse_bandwidth_profiles(raw: Any) -> List[Tuple[int, int, int]]:
+    """
+    Perfiles horarios [{"from": "HH:MM", "to": "HH:MM", "kbps": N}] -> [(minuto inicio, minuto fin, kbps)].
+    Si "to" es anterior a "from", el tramo cruza la medianoche. Las entradas inválidas se ignoran.
+    """
+    profiles = []
+    for entry in raw if isinstance(raw, list) else []:
+        try: profiles.append((_parse_minute_of_day(entry["from"]), _parse_minute_of_day(entry["to"]), max(0, int(entry["kbps"]))))
+        except (KeyError, TypeError, ValueError): print(f"Bandwidth: Ignoring invalid upload limit profile: {entry!r}")
+    return profiles
+
+def limit_for_minute(profiles: List[Tuple[int, int, int]], default_kbps: int, minute_of_day: int) -> int:
+    """Límite (kbit/s, 0 = sin límite) del primer perfil que cubra ese minuto del día, o el general."""
+    for start, end, kbps in profiles:
+        if (start <= minute_of_day < end) if start <= end else (minute_of_day >= start or minute_of_day < end): return kbps
+    return default_kbps
+
+
+class TokenBucket:
+    """
+    Cubo de tokens (en bytes) compartido entre hilos. Cada envío reserva sus bytes aunque el cubo
+    quede en negativo; la deuda se reparte como espera, así que varios hilos a la vez suman el
+    mismo límite total. rate <= 0 = sin límite.
+    """
+
+    def __init__(self, rate: float = 0.0):
+        self._lock = threading.Lock()
+        self.rate = 0.0
+        self.capacity = float(MIN_BURST_BYTES)
+        self._tokens = 0.0
+        self._last = time.monotonic()
+        self.set_rate(rate)
+
+    def set_rate(self, rate: float):
+        with self._lock:
+            self._refill_locked(); self.rate = max(0.0, float(rate))
+            self.capacity = max(float(MIN_BURST_BYTES), self.rate * BURST_SECONDS); self._tokens = min(self._tokens, self.capacity)
+
+    def _refill_locked(self):
+        now = time.monotonic()
+        if self.rate > 0: self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def reserve(self, amount: int) -> float:
+        """Reserva 'amount' bytes. Devuelve los segundos a esperar antes de enviarlos (0 = ya)."""
+        with self._lock:
+            if self.rate <= 0: return 0.0
+            self._refill_locked(); self._tokens -= amount
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self, amount: int, control: Optional[UploadControl] = None):
+        """Espera a poder enviar 'amount' bytes; con 'control', la espera se interrumpe al cancelar."""
+        wait = self.reserve(amount)
+        if wait <= 0: return
+        if control is None: time.sleep(wait)
+        elif control.wait_cancelled(wait): control.check() # Lanza UploadCancelled
+
+
+class ThroughputMeter:
+    """Bytes enviados en los últimos THROUGHPUT_WINDOW_SECONDS, agrupados en franjas cortas."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._slots: Deque[List[float]] = deque() # [inicio de franja, bytes]
+
+    def record(self, amount: int):
+        now = time.monotonic(); slot = now - now % THROUGHPUT_SLOT_SECONDS
+        with self._lock:
+            if self._slots and self._slots[-1][0] == slot: self._slots[-1][1] += amount
+            else: self._slots.append([slot, float(amount)]); self._trim_locked(now)
+
+    def _trim_locked(self, now: float):
+        while self._slots and self._slots[0][0] < now - THROUGHPUT_WINDOW_SECONDS: self._slots.popleft()
+
+    def bytes_per_second(self) -> float:
+        with self._lock: self._trim_locked(time.monotonic()); total = sum(amount for _, amount in self._slots)
+        return total / THROUGHPUT_WINDOW_SECONDS
+
+
+class BandwidthLimiter:
+    """
+    Límite de subida compartido por todas las subidas en curso (también las de lotes distintos),
+    con perfiles horarios opcionales, y medida de la velocidad efectiva para la UI.
+    """
+
+    def __init__(self, default_kbps: int = 0, profiles: Optional[List[Tuple[int, int, int]]] = None):
+        self.bucket = TokenBucket()
+        self.meter = ThroughputMeter()
+        self.default_kbps = 0
+        self.profiles: List[Tuple[int, int, int]] = []
+        self._limit_kbps = 0
+        self._next_profile_check = 0.0
+        self.configure(default_kbps, profiles or [])
+
+    def configure(self, default_kbps: int, profiles: List[Tuple[int, int, int]]):
+        self.default_kbps = max(0, int(default_kbps)); self.profiles = list(profiles); self._next_profile_check = 0.0
+        self._refresh_limit()
+
+    def _refresh_limit(self):
+        now = time.monotonic()
+        if now < self._next_profile_check: return
+        self._next_profile_check = now + PROFILE_CHECK_SECONDS
+        local = time.localtime(); limit = limit_for_minute(self.profiles, self.default_kbps, local.tm_hour * 60 + local.tm_min)
+        if limit != self._limit_kbps or self.bucket.rate != limit * BYTES_PER_KBIT:
+            self._limit_kbps = limit; self.bucket.set_rate(limit * BYTES_PER_KBIT)
+            print(f"Bandwidth: Upload limit set to {f'{limit} kbit/s' if limit else 'unlimited'}.")
+
+    @property
+    def limit_kbps(self) -> int:
+        """Límite vigente en kbit/s (0 = sin límite)."""
+        self._refresh_limit(); return self._limit_kbps
+
+    def consume(self, amount: int, control: Optional[UploadControl] = None):
+        """Lo llama el stream de subida por cada bloque leído: espera si hace falta y lo contabiliza."""
+        if amount <= 0: return
+        self._refresh_limit()
+        self.bucket.acquire(amount, control); self.meter.record(amount)
+
+    def throughput_kbps(self) -> float:
+        return self.meter.bytes_per_second() / BYTES_PER_KBIT
+
+    def snapshot(self) -> Dict[str, float]:
+        return {"upload_kbps": round(self.throughput_kbps(), 1), "upload_limit_kbps": self.limit_kbps}
@@ -0,0 +1,183 @@
+import os
+import time
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from .log_readiness import RECENT_WRITE_SECONDS, check_log_complete
+from .bandwidth import BYTES_PER_KBIT
+
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from .log_uploader import LogUploader
+
+STALE_LOG_SECONDS = 7 * 24 * 3600 # Un "último log" de antes del reinicio semanal probablemente no es de esta sesión
+ESTIMATE_MAX_SAMPLES = 20 # Subidas recientes usadas para estimar
+DEFAULT_SECONDS_PER_LOG = 6.0 # Sin medidas todavía: procesamiento de dps.report por log...
+DEFAULT_UPLOAD_BYTES_PER_SECOND = 500_000 # ...y velocidad de subida supuesta
+
+@dataclass(slots=True)
+class PlannedLog:
+    path: str
+    size: int
+    mtime: float
+    writing: bool = False # ArcDPS aún lo está escribiendo (se esperará o se usará el anterior)
+
+    @property
+    def age_seconds(self) -> float:
+        return max(0.0, time.time() - self.mtime)
+
+
+@dataclass(slots=True)
+class PlanEntry:
+    encounter_type: str
+    boss_name: str
+    logs: List[PlannedLog] = field(default_factory=list)
+    stale: bool = False
+
+    @property
+    def missing(self) -> bool:
+        return not self.logs
+
+
+@dataclass(slots=True)
+class BatchPlan:
+    """Lo que subiría un lote ahora mismo: logs elegidos por boss, huecos y duración estimada."""
+    entries: List[PlanEntry] = field(default_factory=list)
+    since: Optional[float] = None
+    estimated_seconds: float = 0.0
+    estimate_measured: bool = False # False = estimación con valores por defecto (aún no se ha medido ninguna subida)
+    planned_at: float = field(default_factory=time.time)
+
+    @property
+    def logs(self) -> List[PlannedLog]:
+        return [log for entry in self.entries for log in entry.logs]
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(log.size for log in self.logs)
+
+    @property
+    def missing(self) -> List[PlanEntry]:
+        return [entry for entry in self.entries if entry.missing]
+
+    @property
+    def stale(self) -> List[PlanEntry]:
+        return [entry for entry in self.entries if entry.stale]
+
+
+class UploadTimeEstimator:
+    """
+    Estima la duración de un lote a partir de las últimas subidas medidas: tiempo por log =
+    fijo (procesamiento de dps.report) + tamaño / velocidad, ajustado por mínimos cuadrados.
+    """
+
+    def __init__(self, max_samples: int = ESTIMATE_MAX_SAMPLES):
+        self._lock = threading.Lock()
+        self._samples: Deque[Tuple[int, float]] = deque(maxlen=max_samples) # (bytes, segundos)
+
+    def record(self, size_bytes: int, seconds: float):
+        if size_bytes > 0 and seconds > 0:
+            with self._lock: self._samples.append((size_bytes, seconds))
+
+    @property
+    def measured(self) -> bool:
+        with self._lock: return bool(self._samples)
+
+    def model(self) -> Tuple[float, float]:
+        """(segundos fijos por log, bytes por segundo) según las medidas, o los valores por defecto."""
+        with self._lock: samples = list(self._samples)
+        if not samples: return DEFAULT_SECONDS_PER_LOG, DEFAULT_UPLOAD_BYTES_PER_SECOND
+        n = len(samples); mean_size = sum(s for s, _ in samples) / n; mean_time = sum(t for _, t in samples) / n
+        variance = sum((s - mean_size) ** 2 for s, _ in samples)
+        if n >= 3 and variance > 0:
+            slope = sum((s - mean_size) * (t - mean_time) for s, t in samples) / variance # Segundos por byte
+            overhead = mean_time - slope * mean_size
+            if slope > 0 and overhead >= 0: return overhead, 1.0 / slope
+        return 0.0, sum(s for s, _ in samples) / sum(t for _, t in samples) # Pocas medidas o ajuste sin sentido: solo velocidad media
+
+    def estimate(self, sizes: List[int], workers: int = 1, limit_kbps: int = 0) -> float:
+        """Segundos estimados para subir logs de esos tamaños con 'workers' subidas a la vez y el límite de ancho de banda vigente."""
+        if not sizes: return 0.0
+        overhead, rate = self.model(); workers = max(1, min(workers, len(sizes)))
+        processing = overhead * len(sizes) / workers # El procesamiento de dps.report sí se solapa entre subidas
+        transfer_rate = rate * workers if not limit_kbps else min(rate * workers, limit_kbps * BYTES_PER_KBIT) # El límite es compartido
+        return processing + sum(sizes) / transfer_rate
+
+
+class BatchPlanner:
+    """
+    Resuelve una selección contra el árbol de logs (índice en memoria, sin subir nada) para
+    previsualizar el lote. Las peticiones se atienden en un hilo propio y solo cuenta la última:
+    si llegan varias mientras se calcula una, las intermedias se descartan.
+    """
+
+    def __init__(self, log_uploader: 'LogUploader', estimator: UploadTimeEstimator, workers: Callable[[], int] = lambda: 1):
+        self.log_uploader = log_uploader
+        self.estimator = estimator
+        self.workers = workers
+        self._cond = threading.Condition()
+        self._pending: Optional[Tuple[Dict[str, List[str]], Optional[float], Callable[[BatchPlan], None]]] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+
+    def request(self, selection: Dict[str, List[str]], since: Optional[float], on_ready: Callable[[BatchPlan], None]):
+        """Pide un plan en segundo plano; on_ready se llama (en el hilo del planificador) solo si sigue siendo el último pedido."""
+        with self._cond:
+            if self._stopped: return
+            self._pending = (selection, since, on_ready)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="BatchPlanner", daemon=True); self._thread.start()
+            self._cond.notify()
+
+    def stop(self):
+        with self._cond: self._stopped = True; self._pending = None; self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._stopped: self._cond.wait()
+                if self._stopped: return
+                selection, since, on_ready = self._pending; self._pending = None
+            try: plan = self.plan(selection, since)
+            except Exception as e: print(f"BatchPlanner: Could not build plan: {e}"); continue
+            with self._cond:
+                if self._pending is not None or self._stopped: continue # Ya hay una petición más reciente
+            try: on_ready(plan)
+            except Exception as e: print(f"BatchPlanner: Error delivering plan: {e}")
+
+    def plan(self, selection: Dict[str, List[str]], since: Optional[float] = None) -> BatchPlan:
+        """Plan síncrono: el último log de cada boss (o todos desde 'since'), con tamaño, antigüedad y estimación."""
+        uploader = self.log_uploader; plan = BatchPlan(since=since); now = time.time()
+        has_roots = bool(uploader.get_valid_log_roots())
+        for encounter_type, bosses in selection.items():
+            for boss_name in bosses:
+                entry = PlanEntry(encounter_type, boss_name); plan.entries.append(entry)
+                folders = uploader.get_boss_folders(boss_name, encounter_type) if has_roots else []
+                if not folders: continue
+                if since is None:
+                    latest = uploader.log_index.latest(folders)
+                    candidates = [latest] if latest else []
+                else: candidates = uploader.log_index.query_range(folders, since)
+                for mtime, path in candidates:
+                    try: size = os.path.getsize(path)
+                    except OSError: continue # Borrado o archivado desde el último escaneo
+                    writing = now - mtime < RECENT_WRITE_SECONDS or check_log_complete(path) is not None
+                    entry.logs.append(PlannedLog(path, size, mtime, writing))
+                entry.stale = since is None and bool(entry.logs) and entry.logs[0].age_seconds > STALE_LOG_SECONDS
+        plan.estimated_seconds = self.estimator.estimate([log.size for log in plan.logs], self.workers(), uploader.bandwidth.limit_kbps)
+        plan.estimate_measured = self.estimator.measured
+        return plan
+
+def format_size(size_bytes: float) -> str:
+    if size_bytes < 1024: return f"{int(size_bytes)} B"
+    if size_bytes < 1024 ** 2: return f"{size_bytes / 1024:.1f} KB"
+    return f"{size_bytes / 1024 ** 2:.1f} MB"
+
+def format_duration(seconds: float) -> str:
+    """Duración/antigüedad corta: 45 s, 12 min, 3 h, 5 d."""
+    if seconds < 60: return f"{int(seconds)} s"
+    if seconds < 3600: return f"{int(seconds // 60)} min"
+    if seconds < 86400: return f"{seconds / 3600:.0f} h"
+    return f"{seconds / 86400:.0f} d"
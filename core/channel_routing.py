@@ -0,0 +1,44 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from .models import UploadBatch
+
+ROUTE_WING_SEPARATOR = "/" # "fractals/98CM": una sola ala/escala de un tipo de encuentro
+
+def parse_channel_routes(raw: Any) -> Dict[Tuple[str, Optional[str]], int]:
+    """
+    Reglas de channel_routes ({"raids": id, "fractals/98CM": id, ...}) -> {(tipo, ala o None): id de canal}.
+    Las reglas inválidas se ignoran (con aviso en consola).
+    """
+    routes: Dict[Tuple[str, Optional[str]], int] = {}
+    for key, channel_id in (raw.items() if isinstance(raw, dict) else []):
+        encounter_type, _, wing_key = str(key).partition(ROUTE_WING_SEPARATOR)
+        try: routes[(encounter_type.strip(), wing_key.strip() or None)] = int(channel_id)
+        except (TypeError, ValueError): print(f"ChannelRouting: Ignoring route {key!r}: invalid channel ID {channel_id!r}")
+    return routes
+
+def channel_for(routes: Dict[Tuple[str, Optional[str]], int], default_channel_id: int, encounter_type: str, wing_key: str) -> int:
+    """Canal de un ala: la regla del ala, si no la del tipo de encuentro y si no el canal por defecto."""
+    return routes.get((encounter_type, wing_key)) or routes.get((encounter_type, None)) or default_channel_id
+
+def route_batch(batch: UploadBatch, routes: Dict[Tuple[str, Optional[str]], int], default_channel_id: int) -> Dict[int, UploadBatch]:
+    """
+    Reparte un lote en un sub-lote por canal (mismo título y opciones), en el orden en que aparece cada canal.
+    Sin reglas, o si todo va al mismo canal, devuelve el lote original.
+    """
+    if not routes: return {default_channel_id: batch}
+    routed: Dict[int, UploadBatch] = {}
+    def target(encounter_type: str, wing_key: str) -> UploadBatch:
+        channel_id = channel_for(routes, default_channel_id, encounter_type, wing_key)
+        if channel_id not in routed:
+            routed[channel_id] = UploadBatch(title=batch.title, show_duration=batch.show_duration, since=batch.since, batch_id=batch.batch_id,
+                                             created_at=batch.created_at, incomplete_skipped=batch.incomplete_skipped)
+        return routed[channel_id]
+    for encounter_type, wings in batch.results.items():
+        for wing_key, wing_results in wings.items():
+            for result in wing_results: target(encounter_type, wing_key).add(result)
+    for result in batch.failures: target(result.encounter_type, result.wing_key).add(result)
+    if len(routed) <= 1: return {next(iter(routed), default_channel_id): batch}
+    return routed
+
+def route_channel_ids(routes: Dict[Tuple[str, Optional[str]], int]) -> List[int]:
+    return list(dict.fromkeys(routes.values()))
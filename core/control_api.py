@@ -0,0 +1,193 @@
+import hmac
+import json
+import asyncio
+import secrets
+import threading
+from urllib.parse import urlsplit, parse_qs
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from .utils import parse_session_start
+
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from .state_manager import StateManager
+
+CONTROL_API_HOST = "127.0.0.1" # Solo local: nunca se escucha en otras interfaces
+DEFAULT_CONTROL_API_PORT = 8765
+MAX_REQUEST_BODY_BYTES = 64 * 1024
+MAX_HEADER_LINES = 50
+REQUEST_TIMEOUT_SECONDS = 10.0
+TOKEN_HEADER = "x-zenlog-token" # También se acepta "Authorization: Bearer <token>"
+
+HTTP_REASONS = {200: "OK", 202: "Accepted", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found", 405: "Method Not Allowed",
+                408: "Request Timeout", 413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+def generate_token() -> str:
+    return secrets.token_urlsafe(24)
+
+class ApiError(Exception):
+    """Error de una petición: se devuelve como {"error": mensaje} con su código HTTP."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class ControlApiServer:
+    """
+    API HTTP local (JSON) para que otras herramientas (overlays, bots de stream...) lancen subidas
+    y consulten lotes sin pasar por la UI. Escucha solo en 127.0.0.1 y exige el token compartido en
+    cada petición. Corre en su propio hilo con su propio loop de asyncio y llama al mismo
+    StateManager que usan los botones.
+
+    GET  /status                 estado de Discord y lotes en curso
+    GET  /presets                presets disponibles y sus bosses
+    POST /uploads                {"preset": "..."} o {"selection": {tipo: [bosses]}}, + "title", "show_duration", "since"
+    GET  /batches                lotes en curso y terminados recientemente
+    GET  /batches/<id>           progreso y resultados de un lote
+    POST /batches/<id>/cancel    cancela un lote
+    POST /batches/<id>/pause     pausa/reanuda un lote
+    GET  /history?limit=N        últimos lotes del historial
+    """
+
+    def __init__(self, state_manager: 'StateManager', token: str, port: int = DEFAULT_CONTROL_API_PORT, host: str = CONTROL_API_HOST):
+        self.state_manager = state_manager
+        self.token = token
+        self.port = port
+        self.host = host
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._started = threading.Event()
+        self.start_error: Optional[str] = None
+
+    # --- Ciclo de vida ---
+    def start(self, timeout: float = 5.0) -> bool:
+        """Arranca el servidor en su hilo. Devuelve True si quedó escuchando."""
+        if self._thread and self._thread.is_alive(): return self._server is not None
+        self._started.clear(); self.start_error = None
+        self._thread = threading.Thread(target=self._run, name="ControlApiThread", daemon=True); self._thread.start()
+        self._started.wait(timeout)
+        return self._server is not None
+
+    def stop(self, timeout: float = 3.0):
+        loop = self._loop
+        if loop and not loop.is_closed():
+            try: loop.call_soon_threadsafe(loop.stop)
+            except RuntimeError: pass # El loop ya se cerró
+        if self._thread: self._thread.join(timeout=timeout)
+
+    def _run(self):
+        loop = asyncio.new_event_loop(); asyncio.set_event_loop(loop); self._loop = loop
+        try:
+            try: self._server = loop.run_until_complete(asyncio.start_server(self._handle_connection, self.host, self.port))
+            except OSError as e: self.start_error = str(e); print(f"ControlApi: Could not listen on {self.host}:{self.port}: {e}"); return
+            finally: self._started.set()
+            print(f"ControlApi: Listening on http://{self.host}:{self.port}")
+            loop.run_forever()
+        finally:
+            if self._server: self._server.close(); loop.run_until_complete(self._server.wait_closed()); self._server = None
+            tasks = asyncio.all_tasks(loop)
+            for task in tasks: task.cancel()
+            if tasks: loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            loop.close(); print("ControlApi: Stopped.")
+
+    # --- HTTP mínimo (una petición por conexión) ---
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        status, payload = 500, {"error": "Internal error"}
+        try:
+            method, path, headers, body = await asyncio.wait_for(self._read_request(reader), timeout=REQUEST_TIMEOUT_SECONDS)
+            if not self._authorized(headers): raise ApiError(401, "Missing or invalid token")
+            status, payload = await self._dispatch(method, path, body)
+        except ApiError as e: status, payload = e.status, {"error": str(e)}
+        except asyncio.TimeoutError: status, payload = 408, {"error": "Request timeout"}
+        except Exception as e: print(f"ControlApi: Error handling request: {e}")
+        try:
+            data = json.dumps(payload).encode('utf-8')
+            writer.write(f"HTTP/1.1 {status} {HTTP_REASONS.get(status, 'OK')}\r\nContent-Type: application/json\r\nContent-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode('ascii') + data)
+            await writer.drain()
+        except (ConnectionError, OSError): pass
+        finally:
+            writer.close()
+            try: await writer.wait_closed()
+            except (ConnectionError, OSError): pass
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Tuple[str, str, Dict[str, str], bytes]:
+        request_line = (await reader.readline()).decode('latin-1').strip()
+        parts = request_line.split()
+        if len(parts) != 3: raise ApiError(400, "Malformed request line")
+        headers: Dict[str, str] = {}
+        for _ in range(MAX_HEADER_LINES):
+            line = (await reader.readline()).decode('latin-1').strip()
+            if not line: break
+            name, _, value = line.partition(":"); headers[name.strip().lower()] = value.strip()
+        else: raise ApiError(400, "Too many headers")
+        try: length = int(headers.get("content-length", "0"))
+        except ValueError: raise ApiError(400, "Invalid Content-Length")
+        if length > MAX_REQUEST_BODY_BYTES: raise ApiError(413, "Request body too large")
+        body = await reader.readexactly(length) if length > 0 else b""
+        return parts[0].upper(), parts[1], headers, body
+
+    def _authorized(self, headers: Dict[str, str]) -> bool:
+        supplied = headers.get(TOKEN_HEADER, "")
+        authorization = headers.get("authorization", "")
+        if not supplied and authorization.lower().startswith("bearer "): supplied = authorization[7:].strip()
+        return bool(self.token) and hmac.compare_digest(supplied.encode('utf-8'), self.token.encode('utf-8'))
+
+    async def _dispatch(self, method: str, raw_path: str, body: bytes) -> Tuple[int, Any]:
+        url = urlsplit(raw_path); segments = [s for s in url.path.split("/") if s]; query = parse_qs(url.query)
+        routes: Dict[Tuple[str, str], Callable[..., Awaitable[Tuple[int, Any]]]] = {
+            ("GET", "status"): self._get_status, ("GET", "presets"): self._get_presets, ("POST", "uploads"): self._post_upload,
+            ("GET", "batches"): self._get_batches, ("GET", "history"): self._get_history}
+        if len(segments) == 1 and (method, segments[0]) in routes: return await routes[(method, segments[0])](body=body, query=query)
+        if len(segments) in (2, 3) and segments[0] == "batches":
+            try: batch_key = int(segments[1])
+            except ValueError: raise ApiError(404, "Unknown batch")
+            if len(segments) == 2 and method == "GET": return await self._get_batch(batch_key)
+            if len(segments) == 3 and method == "POST" and segments[2] in ("cancel", "pause"): return await self._batch_action(batch_key, segments[2])
+            raise ApiError(405, "Method not allowed")
+        if segments and segments[0] in {path for _, path in routes}: raise ApiError(405, "Method not allowed")
+        raise ApiError(404, "Not found")
+
+    # --- Endpoints (las llamadas al StateManager van a un hilo para no bloquear el loop) ---
+    async def _get_status(self, **_) -> Tuple[int, Any]:
+        return 200, await asyncio.to_thread(self.state_manager.get_api_status)
+
+    async def _get_presets(self, **_) -> Tuple[int, Any]:
+        return 200, {"presets": await asyncio.to_thread(self.state_manager.get_presets)}
+
+    async def _post_upload(self, body: bytes, **_) -> Tuple[int, Any]:
+        try: request = json.loads(body or b"{}")
+        except (json.JSONDecodeError, UnicodeDecodeError): raise ApiError(400, "Body must be JSON")
+        if not isinstance(request, dict): raise ApiError(400, "Body must be a JSON object")
+        since = request.get("since")
+        if isinstance(since, str):
+            since = parse_session_start(since)
+            if since is None: raise ApiError(400, "Invalid 'since' (use a timestamp, 'HH:MM' or 'YYYY-MM-DD HH:MM')")
+        elif since is not None and (isinstance(since, bool) or not isinstance(since, (int, float))): raise ApiError(400, "Invalid 'since'") # bool es subclase de int
+        for name, expected in (("preset", str), ("title", str), ("show_duration", bool), ("selection", dict)):
+            if request.get(name) is not None and not isinstance(request[name], expected): raise ApiError(400, f"Invalid '{name}' (expected {expected.__name__})")
+        try: batch_key = await asyncio.to_thread(self.state_manager.start_api_upload, request.get("preset"), request.get("selection"), request.get("title") or "",
+                                                 bool(request.get("show_duration")), since)
+        except ValueError as e: raise ApiError(400, str(e))
+        if batch_key is None: raise ApiError(503, "Upload could not be started (see application log)")
+        return 202, {"batch": batch_key}
+
+    async def _get_batches(self, **_) -> Tuple[int, Any]:
+        return 200, {"batches": await asyncio.to_thread(self.state_manager.get_batch_statuses)}
+
+    async def _get_batch(self, batch_key: int) -> Tuple[int, Any]:
+        status = await asyncio.to_thread(self.state_manager.get_batch_status, batch_key)
+        if status is None: raise ApiError(404, "Unknown batch")
+        return 200, status
+
+    async def _batch_action(self, batch_key: int, action: str) -> Tuple[int, Any]:
+        if await asyncio.to_thread(self.state_manager.get_batch_status, batch_key, False) is None: raise ApiError(404, "Unknown batch")
+        if action == "cancel": await asyncio.to_thread(self.state_manager.cancel_upload, batch_key); return 202, {"batch": batch_key, "cancelled": True}
+        paused = await asyncio.to_thread(self.state_manager.toggle_pause_upload, batch_key)
+        return 200, {"batch": batch_key, "paused": paused}
+
+    async def _get_history(self, query: Dict[str, Any], **_) -> Tuple[int, Any]:
+        try: limit = max(1, min(100, int(query.get("limit", ["10"])[0])))
+        except ValueError: raise ApiError(400, "Invalid limit")
+        return 200, {"batches": await asyncio.to_thread(self.state_manager.get_recent_batches, limit)}
@@ -0,0 +1,104 @@
+import os
+import json
+import threading
+from typing import Dict, Optional, Callable, Any, Tuple
+
+DEFAULT_POLL_INTERVAL_SECONDS = 3.0
+
+def validate_boss_definitions(data: Any) -> Optional[str]:
+    """Valida la estructura {tipo: {ala: {boss: {"name": [carpetas...]}}}}. Devuelve el error o None."""
+    if not isinstance(data, dict) or not data: return "root must be a non-empty object"
+    for etype, wings in data.items():
+        if not isinstance(wings, dict): return f"'{etype}' must be an object of wings"
+        for wing_key, bosses in wings.items():
+            if not isinstance(bosses, dict): return f"'{etype}/{wing_key}' must be an object of bosses"
+            for boss_name, boss_data in bosses.items():
+                if not isinstance(boss_data, dict): return f"'{etype}/{wing_key}/{boss_name}' must be an object"
+                folders = boss_data.get("name")
+                if not isinstance(folders, list) or not folders or not all(isinstance(f, str) and f for f in folders):
+                    return f"'{etype}/{wing_key}/{boss_name}.name' must be a non-empty list of folder names"
+    return None
+
+def validate_language_pack(data: Any) -> Optional[str]:
+    """Valida que un fichero de idioma sea un objeto {clave: texto}. Devuelve el error o None."""
+    if not isinstance(data, dict) or not data: return "root must be a non-empty object"
+    for key, value in data.items():
+        if not isinstance(value, str): return f"value of '{key}' must be a string"
+    return None
+
+def load_and_validate(file_path: str, validator: Callable[[Any], Optional[str]]) -> Tuple[Optional[Dict], Optional[str]]:
+    """Carga un JSON y lo valida. Devuelve (datos, None) o (None, error)."""
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f: data = json.load(f)
+    except (json.JSONDecodeError, IOError, UnicodeDecodeError) as e: return None, str(e)
+    error = validator(data)
+    return (None, error) if error else (data, None)
+
+
+class DataReloader:
+    """
+    Vigila (por mtime, sin leer los ficheros) boss_definitions.json y los JSON de idioma.
+    Cuando cambian, los valida y, solo si son correctos, notifica los nuevos datos.
+    Si un fichero está mal formado se conserva la versión anterior.
+    """
+
+    def __init__(self, defs_path: str, lang_dir: str,
+                 on_definitions_changed: Callable[[Dict], None],
+                 on_language_changed: Callable[[str, Dict], None],
+                 poll_interval: float = DEFAULT_POLL_INTERVAL_SECONDS):
+        self.defs_path = defs_path
+        self.lang_dir = lang_dir
+        self.on_definitions_changed = on_definitions_changed
+        self.on_language_changed = on_language_changed
+        self.poll_interval = poll_interval
+        self._mtimes: Dict[str, float] = self._snapshot()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _watched_files(self) -> Dict[str, str]:
+        """{ruta: tipo} de los ficheros vigilados."""
+        files = {self.defs_path: "defs"}
+        try:
+            for entry in os.scandir(self.lang_dir):
+                if entry.is_file() and entry.name.lower().endswith(".json"): files[entry.path] = "lang"
+        except OSError: pass
+        return files
+
+    def _snapshot(self) -> Dict[str, float]:
+        mtimes = {}
+        for path in self._watched_files():
+            try: mtimes[path] = os.stat(path).st_mtime
+            except OSError: pass
+        return mtimes
+
+    def start(self):
+        if self._thread and self._thread.is_alive(): return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="DataReloaderThread", daemon=True); self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _run(self):
+        while not self._stop_event.wait(self.poll_interval):
+            try: self.check_now()
+            except Exception as e: print(f"DataReloader: Error checking data files: {e}")
+
+    def check_now(self) -> int:
+        """Comprueba los mtimes y aplica los cambios válidos. Devuelve cuántos ficheros se recargaron."""
+        watched = self._watched_files(); reloaded = 0
+        for path, kind in watched.items():
+            try: mtime = os.stat(path).st_mtime
+            except OSError: continue
+            if self._mtimes.get(path) == mtime: continue
+            self._mtimes[path] = mtime # Aunque sea inválido, no reintentar hasta el próximo cambio
+            if kind == "defs":
+                data, error = load_and_validate(path, validate_boss_definitions)
+                if error: print(f"DataReloader: Ignoring invalid boss definitions ({error}). Keeping previous version."); continue
+                print(f"DataReloader: Boss definitions changed, reloading."); self.on_definitions_changed(data); reloaded += 1
+            else:
+                data, error = load_and_validate(path, validate_language_pack)
+                lang_code = os.path.splitext(os.path.basename(path))[0]
+                if error: print(f"DataReloader: Ignoring invalid language file '{lang_code}' ({error}). Keeping previous version."); continue
+                print(f"DataReloader: Language file '{lang_code}' changed, reloading."); self.on_language_changed(lang_code, data); reloaded += 1
+        return reloaded
@@ -4,6 +4,8 @@ import threading
 from typing import Optional, Dict, List, Any
 import aiohttp # Importar aiohttp
 
+from .models import UploadBatch, UploadResult
+
 # Importar LocalizationManager para type hinting
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
@@ -17,47 +19,165 @@ TRUNCATION_SUFFIX_BYTES = len(TRUNCATION_SUFFIX.encode('utf-8'))
 # SEPARATOR_LINE = "--------------------\n" # Ya no se usa
 # SEPARATOR_LINE_BYTES = len(SEPARATOR_LINE.encode('utf-8')) # Ya no se usa
 
+EMBED_TOP_PLAYERS = 3 # Jugadores (por DPS) que se muestran bajo cada boss
+
+# Intervalo mínimo entre ediciones del mensaje en vivo (Discord limita las ediciones por canal)
+EMBED_EDIT_MIN_INTERVAL_SECONDS = 2.0
+
+def lean_client_options() -> Dict[str, Any]:
+    """
+    Perfil mínimo del cliente: el bot solo publica en un canal y lee emojis, así que pide solo
+    esos intents, no guarda mensajes ni miembros y no pide los miembros de cada guild al conectar.
+    """
+    intents = discord.Intents.none(); intents.guilds = True; intents.emojis_and_stickers = True
+    return {"intents": intents, "max_messages": None, "member_cache_flags": discord.MemberCacheFlags.none(), "chunk_guilds_at_startup": False}
+
+def default_client_options() -> Dict[str, Any]:
+    """Perfil anterior (intents por defecto y cachés de discord.py), solo para comparar en la medición."""
+    intents = discord.Intents.default(); intents.guilds = True
+    return {"intents": intents}
+
 # --- DEBUGGING FLAG ---
 DEBUG_EMBED_LENGTH = False # Poner a True para imprimir logs de longitud
 
+class LiveEmbedMessage:
+    """
+    Mensaje de resultados que se publica con el primer resultado y se edita a medida que llegan más.
+    Las actualizaciones se agrupan: solo se envía el embed más reciente y como mucho una edición cada
+    EMBED_EDIT_MIN_INTERVAL_SECONDS. Todos sus métodos se ejecutan en el loop del bot.
+    """
+
+    def __init__(self, channel: discord.abc.Messageable, min_interval: float = EMBED_EDIT_MIN_INTERVAL_SECONDS):
+        self.channel = channel
+        self.min_interval = min_interval
+        self.message: Optional[discord.Message] = None
+        self.last_ok = False
+        self.shown_results = 0 # Resultados que incluye el último embed encolado (lo mantiene quien lo usa)
+        self._pending: Optional[discord.Embed] = None
+        self._last_sent_at = 0.0
+        self._drain_task: Optional[asyncio.Task] = None
+
+    def submit(self, embed: discord.Embed):
+        """Sustituye el embed pendiente y arranca el envío si no hay uno en curso."""
+        self._pending = embed
+        if self._drain_task is None or self._drain_task.done(): self._drain_task = asyncio.get_running_loop().create_task(self._drain())
+
+    async def _drain(self):
+        loop = asyncio.get_running_loop()
+        while self._pending is not None:
+            wait = self._last_sent_at + self.min_interval - loop.time()
+            if wait > 0: await asyncio.sleep(wait) # Mientras tanto, nuevas actualizaciones sustituyen a _pending
+            embed = self._pending; self._pending = None
+            try:
+                if self.message is None: self.message = await self.channel.send(embed=embed); print(f"Mensaje en vivo publicado en #{getattr(self.channel, 'name', '?')}")
+                else: await self.message.edit(embed=embed)
+                self.last_ok = True
+            except discord.NotFound: print("Advertencia: El mensaje en vivo fue borrado; se publicará uno nuevo."); self.message = None; self.last_ok = False
+            except discord.Forbidden: print(f"Error: Permisos insuficientes para publicar/editar en #{getattr(self.channel, 'name', '?')}."); self.last_ok = False
+            except discord.HTTPException as e: print(f"Error HTTP al publicar/editar el mensaje en vivo: {e}"); self.last_ok = False
+            self._last_sent_at = loop.time()
+
+    async def finalize(self, embed: discord.Embed) -> bool:
+        """Envía el embed final (respetando el intervalo) y espera a que se publique."""
+        self.submit(embed); await self._drain_task
+        if not self.last_ok and self.message is None: # Reintento único si el mensaje se borró justo antes
+            self.submit(embed); await self._drain_task
+        return self.last_ok
+
+
 class DiscordBot(discord.Client):
     """Maneja la conexión a Discord y el envío de mensajes formateados."""
 
-    def __init__(self, token: str, target_channel_id: int, *args, **kwargs):
-        
-        intents = discord.Intents.default(); intents.guilds = True
-        super().__init__(intents=intents, *args, **kwargs)
+    def __init__(self, token: str, target_channel_id: int, *args, lean: bool = True, route_channel_ids: Optional[List[int]] = None, **kwargs):
+        options = lean_client_options() if lean else default_client_options(); options.update(kwargs)
+        super().__init__(*args, **options)
         self.token = token; self.target_channel_id = target_channel_id
         self.target_channel: Optional[discord.TextChannel] = None
+        self.route_channel_ids: List[int] = list(route_channel_ids or []) # Canales extra de channel_routes
+        self.channels: Dict[int, discord.abc.Messageable] = {} # Canales resueltos por ID (el objetivo y los de las rutas)
         self.ready_event = threading.Event()
         self._bot_loop: Optional[asyncio.AbstractEventLoop] = None
 
+    async def _resolve_channel(self, channel_id: int) -> Optional[discord.abc.Messageable]:
+        """Canal por ID: de la caché si está, si no con una petición REST. None (con aviso) si no se puede usar."""
+        channel = self.get_channel(channel_id)
+        if channel is None:
+            try: channel = await self.fetch_channel(channel_id)
+            except discord.NotFound: print(f'ADVERTENCIA: No existe el canal con ID {channel_id}.'); return None
+            except discord.Forbidden: print(f'ADVERTENCIA: Sin acceso al canal con ID {channel_id}.'); return None
+            except discord.HTTPException as e: print(f'ADVERTENCIA: Error HTTP resolviendo el canal {channel_id}: {e}'); return None
+        if not isinstance(channel, discord.abc.Messageable): print(f'ADVERTENCIA: El canal con ID {channel_id} no admite mensajes.'); return None
+        self.channels[channel_id] = channel
+        return channel
+
+    async def _resolve_channels(self, channel_ids: List[int]):
+        """Resuelve varios canales a la vez."""
+        await asyncio.gather(*(self._resolve_channel(channel_id) for channel_id in dict.fromkeys(channel_ids)))
+
+    async def setup_hook(self):
+        """Tras el login y antes del gateway: resuelve el canal objetivo (y los de las rutas) por su ID."""
+        await self._resolve_channels([self.target_channel_id] + self.route_channel_ids)
+        self.target_channel = self.channels.get(self.target_channel_id)
+        if self.target_channel: print(f'Canal objetivo resuelto: #{getattr(self.target_channel, "name", "?")} ({self.target_channel.id})')
+
     async def on_ready(self):
         """Se ejecuta cuando el bot se conecta y está listo."""
-        
         print(f'Bot conectado como {self.user}')
-        self.target_channel = self.get_channel(self.target_channel_id)
-        if self.target_channel: print(f'Canal objetivo encontrado: #{self.target_channel.name} ({self.target_channel.id})')
-        else:
-            print(f'ADVERTENCIA: No se pudo encontrar el canal con ID {self.target_channel_id}.')
-            found = False
-            for guild in self.guilds:
-                channel = guild.get_channel(self.target_channel_id)
-                if isinstance(channel, discord.TextChannel):
-                    self.target_channel = channel; print(f'Canal objetivo encontrado en guild {guild.name}: #{self.target_channel.name} ({self.target_channel.id})'); found = True; break
-            if not found: print(f'ADVERTENCIA FINAL: No se pudo encontrar el canal de texto con ID {self.target_channel_id}.')
+        # Preferir la instancia de la caché (ligada a su guild) si existe; si no, la obtenida en setup_hook.
+        # Los canales cuyo fetch falló en setup_hook se buscan también en la caché.
+        for channel_id in dict.fromkeys([self.target_channel_id] + self.route_channel_ids + list(self.channels)):
+            channel = self.get_channel(channel_id) or self.channels.get(channel_id)
+            if channel: self.channels[channel_id] = channel
+        self.target_channel = self.channels.get(self.target_channel_id)
+        if self.target_channel: print(f'Canal objetivo encontrado: #{getattr(self.target_channel, "name", "?")} ({self.target_channel.id})')
+        else: print(f'ADVERTENCIA FINAL: No se pudo encontrar el canal de texto con ID {self.target_channel_id}.')
         self.ready_event.set()
 
-    async def send_embed_message(self, embed: discord.Embed):
-        """Envía un mensaje embed al canal objetivo."""
-        # ... (sin cambios) ...
+    def set_route_channels(self, channel_ids: List[int]):
+        """Cambia (desde cualquier hilo) los canales de las rutas y resuelve los nuevos sin reiniciar el bot."""
+        self.route_channel_ids = list(channel_ids)
+        loop = self._bot_loop; missing = [channel_id for channel_id in channel_ids if channel_id not in self.channels]
+        if missing and loop and loop.is_running() and not loop.is_closed(): asyncio.run_coroutine_threadsafe(self._resolve_channels(missing), loop)
+
+    def channel_label(self, channel_id: int) -> str:
+        channel = self.channels.get(channel_id)
+        return f"#{getattr(channel, 'name', '?')}" if channel else str(channel_id)
+
+    async def send_embed_message(self, embed: discord.Embed, channel_id: Optional[int] = None):
+        """Envía un mensaje embed al canal objetivo (o al canal indicado)."""
+        channel_id = channel_id or self.target_channel_id; channel = self.channels.get(channel_id)
         if not self.is_ready(): print("Error: send_embed_message llamado pero el bot no está listo."); return False
-        if not self.target_channel: print(f"Error: No se puede enviar mensaje, canal objetivo (ID: {self.target_channel_id}) no encontrado."); return False
-        try: await self.target_channel.send(embed=embed); print(f"Mensaje embed enviado a #{self.target_channel.name}"); return True
-        except discord.Forbidden: print(f"Error: Permisos insuficientes para enviar mensajes a #{self.target_channel.name}."); return False
+        if not channel: channel = await self._resolve_channel(channel_id) # Ruta añadida después de conectar
+        if not channel: print(f"Error: No se puede enviar mensaje, canal (ID: {channel_id}) no encontrado."); return False
+        try: await channel.send(embed=embed); print(f"Mensaje embed enviado a {self.channel_label(channel_id)}"); return True
+        except discord.Forbidden: print(f"Error: Permisos insuficientes para enviar mensajes a {self.channel_label(channel_id)}."); return False
         except discord.HTTPException as e: print(f"Error HTTP al enviar mensaje: {e}"); return False
         except Exception as e: print(f"Error inesperado al enviar mensaje: {e}"); return False
 
+    async def publish_routes(self, sends: List[tuple]) -> Dict[int, bool]:
+        """
+        Publica un embed por ruta, todas a la vez: sends = [(id de canal, embed, mensaje en vivo o None)].
+        Si la ruta ya tiene mensaje en vivo, se edita ese mensaje. Devuelve {id de canal: enviado}.
+        """
+        async def publish(channel_id: int, embed: discord.Embed, live_message: Optional[LiveEmbedMessage]) -> bool:
+            return await live_message.finalize(embed) if live_message else await self.send_embed_message(embed, channel_id)
+        outcomes = await asyncio.gather(*(publish(*send) for send in sends), return_exceptions=True)
+        for (channel_id, _, _), outcome in zip(sends, outcomes):
+            if isinstance(outcome, BaseException): print(f"Error inesperado publicando en {self.channel_label(channel_id)}: {outcome}")
+        return {channel_id: outcome is True for (channel_id, _, _), outcome in zip(sends, outcomes)}
+
+    def create_live_message(self, channel_id: Optional[int] = None) -> Optional[LiveEmbedMessage]:
+        """Crea un mensaje en vivo para el canal objetivo o el indicado (None si el bot no está listo o el canal no está resuelto)."""
+        channel = self.channels.get(channel_id or self.target_channel_id)
+        if not self.is_ready() or not channel: return None
+        return LiveEmbedMessage(channel)
+
+    def submit_live_embed(self, live_message: LiveEmbedMessage, embed: discord.Embed) -> bool:
+        """Encola (desde cualquier hilo) una actualización del mensaje en vivo. No bloquea."""
+        loop = self._bot_loop
+        if not loop or loop.is_closed() or not loop.is_running(): return False
+        loop.call_soon_threadsafe(live_message.submit, embed); return True
+
     async def close_bot(self):
         """Cierra la conexión del bot y la sesión http de forma segura."""
         
@@ -112,11 +232,33 @@ class DiscordBot(discord.Client):
         return False
 
 
-    def format_embed(self, upload_results: Dict[str, Dict[str, List[Dict]]], failures: List[Dict], loc_manager: 'LocalizationManager', title_prefix: Optional[str] = None) -> Optional[discord.Embed]:
+    @staticmethod
+    def _display_link(link: str) -> str:
+        """Usa el dominio b.dps.report para los enlaces de dps.report."""
+        if link and link.startswith("https://dps.report/"): return link.replace("https://dps.report/", "https://b.dps.report/", 1)
+        return link
+
+    @staticmethod
+    def _format_dps(dps: Any) -> str:
+        try: dps = float(dps or 0)
+        except (TypeError, ValueError): return "?"
+        return f"{dps / 1000:.1f}k" if dps >= 1000 else f"{dps:.0f}"
+
+    @classmethod
+    def _players_line(cls, players: List[Dict[str, Any]]) -> str:
+        """Línea con los EMBED_TOP_PLAYERS jugadores de más DPS: Nombre (Profesión · g2) 32.1k | ..."""
+        parts = []
+        for player in players[:EMBED_TOP_PLAYERS]:
+            name = discord.utils.escape_markdown(str(player.get("name") or player.get("account") or "?"))
+            details = " · ".join(str(detail) for detail in (player.get("profession"), f"g{player['group']}" if player.get("group") else None) if detail)
+            parts.append(f"{name}{f' ({details})' if details else ''} {cls._format_dps(player.get('dps'))}")
+        return f"└ {' | '.join(parts)}\n" if parts else ""
+
+    def format_embed(self, batch: UploadBatch, loc_manager: 'LocalizationManager', title_prefix: Optional[str] = None) -> Optional[discord.Embed]:
         """
         Formatea los resultados de la subida en un discord.Embed agrupando por ala/escala,
         con un campo por ala/escala y sin campo de fallos separado.
-        Formato: [Emoji] **[NombreBoss](URL)** `(Duración)`
+        Formato: [Emoji] **[NombreBoss](URL)** `(Duración)` y debajo los jugadores con más DPS (si hay datos de getJson).
         """
         if not self.is_ready():
              print("Advertencia: Intentando formatear embed pero el bot no está listo (emojis podrían faltar).")
@@ -132,7 +274,7 @@ class DiscordBot(discord.Client):
         has_success = False
 
         # Iterar sobre tipos de encuentro y luego alas/escalas
-        all_wing_keys = []
+        upload_results = batch.results; all_wing_keys = []
         for etype in ["raids", "fractals", "strikes"]: # Orden deseado
             if etype in upload_results:
                 sorted_keys = sorted(upload_results[etype].keys())
@@ -142,38 +284,49 @@ class DiscordBot(discord.Client):
             results_in_wing = upload_results[encounter_type][wing_key]
             if not results_in_wing: continue
 
-            wing_has_success = any(r.get("success") for r in results_in_wing)
+            wing_has_success = any(r.success for r in results_in_wing)
             if not wing_has_success: continue
 
             field_lines = []
-            # Iterar sobre los resultados exitosos en esta ala/escala
+            # Agrupar los resultados exitosos por boss (en modo sesión un boss puede tener varios intentos)
+            results_by_boss: Dict[str, List[UploadResult]] = {}
             for result in results_in_wing:
-                if not result.get("success"): continue
+                if not result.success: continue
                 has_success = True
+                boss_name = result.boss_name or loc_manager.get_string("history_entry_unknown_boss")
+                results_by_boss.setdefault(boss_name, []).append(result)
 
-                boss_name = result.get("boss_name", loc_manager.get_string("history_entry_unknown_boss"))
-                link = result.get("link", "")
-                duration = result.get("duration")
-
+            for boss_name, boss_results in results_by_boss.items():
                 emoji_str = ""
                 if self.is_ready():
                     emoji_name = boss_name.replace(" ", "_").replace(":", "")
                     emoji = discord.utils.get(self.emojis, name=emoji_name)
                     if emoji: emoji_str = f"{emoji} "
 
-                display_link = link
-                if link and link.startswith("https://dps.report/"):
-                     display_link = link.replace("https://dps.report/", "https://b.dps.report/", 1)
-
-                # --- NUEVO FORMATO DE LÍNEA ---
-                duration_str = f" `({duration})`" if duration else ""
-                line = ""
-                if display_link:
-                    
-                    line = f"{emoji_str}[**{boss_name}**]({display_link}){duration_str}\n"
-                else: 
-                    line = f"{emoji_str}**{boss_name}**{duration_str} | Success (no link)\n" # O localizar
-                # --- FIN NUEVO FORMATO ---
+                if len(boss_results) == 1 and not boss_results[0].attempt:
+                    result = boss_results[0]; display_link = self._display_link(result.link); duration = result.duration
+                    # --- NUEVO FORMATO DE LÍNEA ---
+                    duration_str = f" `({duration})`" if duration else ""
+                    if result.is_cm: duration_str = f" **CM**{duration_str}"
+                    line = ""
+                    if display_link:
+                        
+                        line = f"{emoji_str}[**{boss_name}**]({display_link}){duration_str}\n"
+                    else: 
+                        line = f"{emoji_str}**{boss_name}**{duration_str} | Success (no link)\n" # O localizar
+                    line += self._players_line(result.players)
+                    # --- FIN NUEVO FORMATO ---
+                else:
+                    # Formato sesión: **Boss**: [#1](URL) `(Duración)` · [#2](URL)
+                    attempt_parts = []
+                    for index, result in enumerate(boss_results, start=1):
+                        attempt_label = f"#{result.attempt or index}"; display_link = self._display_link(result.link); duration = result.duration
+                        part = f"[{attempt_label}]({display_link})" if display_link else attempt_label
+                        if result.is_cm: part += " **CM**"
+                        if duration: part += f" `({duration})`"
+                        if result.players: part += f" {self._format_dps(result.players[0].get('dps'))}" # DPS más alto del intento
+                        attempt_parts.append(part)
+                    line = f"{emoji_str}**{boss_name}**: {' · '.join(attempt_parts)}\n"
 
                 field_lines.append(line)
 
@@ -196,5 +349,85 @@ class DiscordBot(discord.Client):
 
         return embed
 
+def _measure_profile(token: str, channel_id: int, lean: bool, timeout: float = 120.0) -> Dict[str, Any]:
+    """Conecta con un perfil y devuelve el tiempo hasta on_ready y la memoria usada al estar listo."""
+    import time, gc, tracemalloc
+    tracemalloc.start(); rss_before = _current_rss_bytes(); started = time.perf_counter()
+    bot = DiscordBot(token=token, target_channel_id=channel_id, lean=lean); thread = bot.run_bot_in_thread()
+    ready = bot.ready_event.wait(timeout); time_to_ready = time.perf_counter() - started
+    time.sleep(5) # Dejar llegar los GUILD_CREATE/miembros que el perfil pida tras on_ready
+    gc.collect(); heap_bytes = tracemalloc.get_traced_memory()[0]; rss_after = _current_rss_bytes()
+    result = {"profile": "lean" if lean else "default", "ready": ready, "time_to_ready_s": round(time_to_ready, 3), "python_heap_mb": round(heap_bytes / 2**20, 1),
+              "rss_delta_mb": round((rss_after - rss_before) / 2**20, 1) if rss_before and rss_after else None,
+              "guilds": len(bot.guilds), "cached_members": sum(len(g.members) for g in bot.guilds), "cached_messages": len(bot.cached_messages)}
+    if bot._bot_loop: asyncio.run_coroutine_threadsafe(bot.close_bot(), bot._bot_loop).result(timeout=15)
+    thread.join(timeout=10)
+    return result
+
+def _simulated_gateway_payloads(channels: int = 500, roles: int = 250, emojis: int = 200, members: int = 1000, messages: int = 5000) -> Dict[str, Any]:
+    """Eventos sintéticos de un servidor grande: READY, su GUILD_CREATE y tráfico de mensajes posterior."""
+    import itertools
+    ids = (str(n) for n in itertools.count(10 ** 17)); guild_id = next(ids); channel_ids = [next(ids) for _ in range(channels)]
+    def user(name: str, bot: bool = False) -> Dict[str, Any]: return {"id": next(ids), "username": name, "discriminator": "0", "global_name": name, "avatar": None, "bot": bot}
+    def member(user_data: Dict[str, Any]) -> Dict[str, Any]: return {"user": user_data, "roles": [], "joined_at": "2024-01-01T00:00:00+00:00", "deaf": False, "mute": False, "flags": 0}
+    bot_user = user("zenlogbot", bot=True); authors = [user(f"player{i}") for i in range(members)]
+    guild = {"id": guild_id, "name": "Large guild", "unavailable": False, "large": True, "member_count": members + 1, "owner_id": authors[0]["id"],
+             "features": [], "premium_tier": 0, "stickers": [], "threads": [], "voice_states": [], "presences": [],
+             "roles": [{"id": guild_id if i == 0 else next(ids), "name": f"role{i}", "color": 0, "hoist": False, "position": i, "permissions": "0", "managed": False, "mentionable": False} for i in range(roles)],
+             "emojis": [{"id": next(ids), "name": f"Boss_{i}", "roles": [], "require_colons": True, "managed": False, "animated": False, "available": True} for i in range(emojis)],
+             "channels": [{"id": channel_id, "type": 0, "name": f"channel-{i}", "position": i, "permission_overwrites": [], "nsfw": False, "parent_id": None} for i, channel_id in enumerate(channel_ids)],
+             "members": [member(bot_user)] + [member(author) for author in authors]}
+    chat = [{"id": next(ids), "channel_id": channel_ids[i % channels], "guild_id": guild_id, "author": authors[i % members], "member": {"roles": [], "joined_at": "2024-01-01T00:00:00+00:00", "deaf": False, "mute": False},
+             "content": "x" * 80, "timestamp": "2024-01-01T00:00:00+00:00", "edited_timestamp": None, "tts": False, "mention_everyone": False, "mentions": [], "mention_roles": [],
+             "attachments": [], "embeds": [], "pinned": False, "type": 0} for i in range(messages)]
+    return {"ready": {"v": 10, "user": bot_user, "guilds": [{"id": guild_id, "unavailable": True}], "session_id": "simulated", "application": {"id": next(ids), "flags": 0}},
+            "guild_create": guild, "messages": chat, "channel_id": int(channel_ids[0])}
+
+def _simulate_profile(lean: bool) -> Dict[str, Any]:
+    """
+    Medición sin red: alimenta el estado de conexión del cliente con los eventos sintéticos y mide la
+    memoria (RSS) tras procesarlos y el tiempo hasta on_ready sin contar la espera guild_ready_timeout.
+    Los mensajes se envían a los dos perfiles aunque el gateway no se los mandaría al perfil mínimo
+    (no pide el intent de mensajes), así que el ahorro medido es una cota inferior.
+    """
+    import time, gc
+    payloads = _simulated_gateway_payloads(); ready_timeout = 0.1
+    async def run() -> Dict[str, Any]:
+        bot = DiscordBot(token="simulated", target_channel_id=payloads["channel_id"], lean=lean, guild_ready_timeout=ready_timeout)
+        await bot._async_setup_hook(); state = bot._connection
+        gc.collect(); rss_before = _current_rss_bytes(); started = time.perf_counter()
+        state.parse_ready(payloads["ready"]); state.parse_guild_create(payloads["guild_create"])
+        while not bot.ready_event.is_set(): await asyncio.sleep(0.001)
+        time_to_ready = time.perf_counter() - started - ready_timeout
+        for message in payloads["messages"]: state.parse_message_create(message)
+        gc.collect(); rss_after = _current_rss_bytes()
+        return {"profile": "lean" if lean else "default", "time_to_ready_ms": round(time_to_ready * 1000, 1),
+                "rss_delta_mb": round((rss_after - rss_before) / 2**20, 1) if rss_before and rss_after else None,
+                "cached_members": sum(len(g.members) for g in bot.guilds), "cached_messages": len(bot.cached_messages), "target_channel_found": bot.target_channel is not None}
+    return asyncio.run(run())
+
+def _current_rss_bytes() -> Optional[int]:
+    try:
+        import psutil # Opcional: solo para la medición
+        return psutil.Process().memory_info().rss
+    except ImportError: return None
+
 if __name__ == '__main__':
-    print("Este script no debe ejecutarse directamente. Es para la clase DiscordBot.")
+    # Medición de perfiles:
+    #   python -m core.discord_bot --simulate   (sin red: eventos sintéticos de un servidor grande, ver _simulate_profile)
+    #   DISCORD_TOKEN=... DISCORD_CHANNEL_ID=... python -m core.discord_bot --measure   (con un bot real en un servidor grande)
+    # Cada perfil se mide en su propio proceso para que las cachés de uno no cuenten en el otro.
+    # Simulación (discord.py 2.7, 1 servidor: 500 canales, 250 roles, 200 emojis, 1000 miembros, 5000 mensajes):
+    # RSS +2.7 MB (default) frente a +1.7 MB (lean), todo por la caché de mensajes; on_ready en 9-13 ms en ambos
+    # (sin el intent de miembros ninguno de los dos pide miembros al conectar, así que ahí no hay diferencia).
+    import os, sys, json, subprocess
+    if len(sys.argv) > 2 and sys.argv[1] == "--measure-profile":
+        print(json.dumps(_measure_profile(os.environ["DISCORD_TOKEN"], int(os.environ["DISCORD_CHANNEL_ID"]), lean=sys.argv[2] == "lean")))
+    elif len(sys.argv) > 2 and sys.argv[1] == "--simulate-profile":
+        print(json.dumps(_simulate_profile(lean=sys.argv[2] == "lean")))
+    elif len(sys.argv) > 1 and sys.argv[1] in ("--measure", "--simulate"):
+        for profile in ("default", "lean"):
+            command = [sys.executable, "-m", "core.discord_bot", f"{sys.argv[1]}-profile", profile]
+            output = subprocess.run(command, capture_output=True, text=True).stdout.strip().splitlines()
+            print(output[-1] if output else f"{profile}: no result")
+    else: print("Este script no debe ejecutarse directamente. Es para la clase DiscordBot.")
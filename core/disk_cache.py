@@ -0,0 +1,139 @@
+import os
+import re
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Any
+
+from .utils import atomic_write_json
+
+INDEX_FILE_NAME = "index.json"
+INDEX_FLUSH_DELAY_SECONDS = 5.0 # put() no reescribe el índice: lo agrupa y lo guarda como mucho una vez cada tanto
+ENTRY_FILE_PATTERN = re.compile(r"^[0-9a-f]{40}") # Ficheros creados con file_name_for (hash + sufijo)
+
+class DiskCache:
+    """
+    Caché en disco acotada por tamaño con expulsión LRU.
+    Cada entrada tiene metadatos (JSON) y, opcionalmente, un fichero asociado
+    dentro del directorio de la caché. El índice se guarda en index.json, no en cada put() sino
+    agrupado (INDEX_FLUSH_DELAY_SECONDS después del primer cambio pendiente) y en flush().
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict() # key -> {"file", "size", "meta"}
+        self._total_bytes = 0
+        self._dirty = False
+        self._flush_timer: Optional[threading.Timer] = None
+        self._write_lock = threading.Lock() # Serializa las escrituras del índice (que se hacen sin bloquear _lock)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load_index()
+
+    def _index_path(self) -> str:
+        return os.path.join(self.cache_dir, INDEX_FILE_NAME)
+
+    def _load_index(self):
+        """Carga el índice y descarta entradas cuyo fichero ya no existe."""
+        try:
+            with open(self._index_path(), 'r', encoding='utf-8') as f: raw = json.load(f)
+        except FileNotFoundError: return
+        except (json.JSONDecodeError, IOError, TypeError) as e: print(f"DiskCache: Ignoring unreadable index in {self.cache_dir}: {e}"); return
+        for key, entry in raw.get("entries", []):
+            file_name = entry.get("file")
+            if file_name and not os.path.exists(os.path.join(self.cache_dir, file_name)): continue
+            self._entries[key] = entry; self._total_bytes += entry.get("size", 0)
+        self._remove_orphan_files()
+
+    def _remove_orphan_files(self):
+        """Borra ficheros de entradas que no llegaron al índice (p. ej. un cierre brusco antes de guardarlo)."""
+        referenced = {entry.get("file") for entry in self._entries.values()}
+        try: names = os.listdir(self.cache_dir)
+        except OSError: return
+        for name in names:
+            if name in referenced or not ENTRY_FILE_PATTERN.match(name): continue
+            try: os.remove(os.path.join(self.cache_dir, name))
+            except OSError: pass
+
+    def _save_index(self):
+        """Guarda una copia del índice tomada bajo _lock; la escritura (con fsync) se hace fuera de él."""
+        with self._lock: snapshot = list(self._entries.items()); self._dirty = False
+        with self._write_lock:
+            try: atomic_write_json(self._index_path(), {"entries": snapshot}, indent=None)
+            except IOError as e: print(f"DiskCache: Could not save index in {self.cache_dir}: {e}"); self._mark_dirty()
+
+    def _mark_dirty(self):
+        """Marca el índice como pendiente y programa su guardado si no lo estaba ya."""
+        with self._lock:
+            self._dirty = True
+            if self._flush_timer is not None: return
+            self._flush_timer = threading.Timer(INDEX_FLUSH_DELAY_SECONDS, self._flush_pending); self._flush_timer.daemon = True; self._flush_timer.start()
+
+    def _flush_pending(self):
+        with self._lock:
+            self._flush_timer = None
+            if not self._dirty: return
+        self._save_index()
+
+    @staticmethod
+    def file_name_for(key: str, suffix: str = "") -> str:
+        """Nombre de fichero estable (hash de la clave) para una entrada."""
+        return hashlib.sha1(key.encode('utf-8')).hexdigest() + suffix
+
+    def path_for(self, key: str, suffix: str = "") -> str:
+        """Ruta donde escribir el fichero de una entrada antes de registrarla con put()."""
+        return os.path.join(self.cache_dir, self.file_name_for(key, suffix))
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Devuelve {"path", "meta"} de la entrada (marcándola como usada) o None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None: return None
+            path = os.path.join(self.cache_dir, entry["file"]) if entry.get("file") else None
+            if path and not os.path.exists(path):
+                self._total_bytes -= entry.get("size", 0); del self._entries[key]; return None
+            self._entries.move_to_end(key)
+            return {"path": path, "meta": entry.get("meta", {})}
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock: return key in self._entries
+
+    def put(self, key: str, meta: Dict[str, Any], file_path: Optional[str] = None):
+        """
+        Registra una entrada. file_path, si se indica, debe estar dentro de cache_dir
+        (normalmente obtenido con path_for). Expulsa las entradas menos usadas si se supera max_bytes.
+        """
+        file_name = os.path.basename(file_path) if file_path else None
+        size = os.path.getsize(file_path) if file_path else 0
+        size += len(json.dumps(meta))
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old: self._total_bytes -= old.get("size", 0)
+            self._entries[key] = {"file": file_name, "size": size, "meta": meta}; self._total_bytes += size
+            self._evict_locked(keep=key)
+        self._mark_dirty()
+
+    def put_json(self, key: str, meta: Dict[str, Any]):
+        """Atajo para entradas que solo contienen metadatos."""
+        self.put(key, meta, file_path=None)
+
+    def _evict_locked(self, keep: Optional[str] = None):
+        while self._total_bytes > self.max_bytes and self._entries:
+            oldest_key = next(iter(self._entries))
+            if oldest_key == keep and len(self._entries) == 1: break
+            if oldest_key == keep: self._entries.move_to_end(keep); continue
+            entry = self._entries.pop(oldest_key); self._total_bytes -= entry.get("size", 0)
+            if entry.get("file"):
+                try: os.remove(os.path.join(self.cache_dir, entry["file"]))
+                except OSError: pass
+
+    def total_bytes(self) -> int:
+        with self._lock: return self._total_bytes
+
+    def flush(self):
+        """Guarda el índice ya (al cerrar, y para persistir el orden LRU actualizado por get())."""
+        with self._lock:
+            if self._flush_timer is not None: self._flush_timer.cancel(); self._flush_timer = None
+        self._save_index()
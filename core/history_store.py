@@ -0,0 +1,132 @@
+import os
+import time
+import sqlite3
+import datetime
+import threading
+from typing import Dict, List, Optional, Any
+
+from .models import UploadBatch, UploadResult
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS batches (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    title TEXT NOT NULL DEFAULT '',
+    show_duration INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    batch_id INTEGER NOT NULL REFERENCES batches(id),
+    created_at REAL NOT NULL,
+    encounter_type TEXT NOT NULL,
+    wing_key TEXT NOT NULL,
+    boss_name TEXT NOT NULL,
+    success INTEGER NOT NULL,
+    link TEXT NOT NULL DEFAULT '',
+    duration TEXT,
+    message TEXT NOT NULL DEFAULT '',
+    file_name TEXT NOT NULL DEFAULT '',
+    file_hash TEXT NOT NULL DEFAULT '',
+    is_cm INTEGER NOT NULL DEFAULT 0,
+    attempt INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_batches_created ON batches(created_at);
+CREATE INDEX IF NOT EXISTS idx_results_batch ON results(batch_id);
+CREATE INDEX IF NOT EXISTS idx_results_boss ON results(boss_name, created_at);
+CREATE INDEX IF NOT EXISTS idx_results_type ON results(encounter_type, created_at);
+CREATE INDEX IF NOT EXISTS idx_results_created ON results(created_at);
+CREATE INDEX IF NOT EXISTS idx_results_hash ON results(file_hash);
+"""
+
+RESULT_COLUMNS = "batch_id, created_at, encounter_type, wing_key, boss_name, success, link, duration, message, file_name, file_hash, is_cm, attempt"
+# Columnas añadidas después de crear la tabla: bases de datos antiguas las reciben con ALTER TABLE al abrir
+MIGRATED_RESULT_COLUMNS = (("is_cm", "INTEGER NOT NULL DEFAULT 0"), ("attempt", "INTEGER"))
+
+def start_of_week(now: Optional[datetime.datetime] = None) -> float:
+    """Timestamp del lunes de la semana actual a las 00:00 (hora local)."""
+    now = now or datetime.datetime.now()
+    monday = (now - datetime.timedelta(days=now.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+    return monday.timestamp()
+
+class HistoryStore:
+    """
+    Historial de subidas en SQLite, solo de inserción (cada resultado es un INSERT),
+    con índices por boss, tipo de encuentro, fecha y hash del fichero.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+            self._migrate()
+            self._conn.commit()
+        print(f"HistoryStore: Using database: {db_path}")
+
+    def _migrate(self):
+        existing = {row["name"] for row in self._conn.execute("PRAGMA table_info(results)")}
+        for name, definition in MIGRATED_RESULT_COLUMNS:
+            if name not in existing: self._conn.execute(f"ALTER TABLE results ADD COLUMN {name} {definition}"); print(f"HistoryStore: Added column results.{name}")
+
+    # --- Escritura ---
+    def start_batch(self, title: str = "", show_duration: bool = False) -> int:
+        """Registra un nuevo lote y devuelve su id."""
+        with self._lock:
+            cursor = self._conn.execute("INSERT INTO batches (created_at, title, show_duration) VALUES (?, ?, ?)", (time.time(), title or "", int(bool(show_duration))))
+            self._conn.commit()
+            return cursor.lastrowid
+
+    def add_result(self, batch_id: int, result: UploadResult):
+        """Añade el resultado de un boss a un lote."""
+        row = (batch_id, time.time(), result.encounter_type, result.wing_key or "Unknown", result.boss_name, int(result.success),
+               result.link or "", result.duration, result.message or "", result.file_name or "", result.file_hash or "", int(result.is_cm), result.attempt)
+        with self._lock:
+            self._conn.execute(f"INSERT INTO results ({RESULT_COLUMNS}) VALUES ({', '.join('?' * len(row))})", row)
+            self._conn.commit()
+
+    # --- Consultas ---
+    def last_batches(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Últimos N lotes con su número de éxitos y total."""
+        query = ("SELECT b.id, b.created_at, b.title, b.show_duration, COUNT(r.id) AS total, COALESCE(SUM(r.success), 0) AS successes "
+                 "FROM (SELECT * FROM batches ORDER BY created_at DESC LIMIT ?) b LEFT JOIN results r ON r.batch_id = b.id "
+                 "GROUP BY b.id ORDER BY b.created_at DESC")
+        with self._lock: rows = self._conn.execute(query, (limit,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def links_for_boss(self, boss_name: str, since: Optional[float] = None, encounter_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Enlaces correctos de un boss desde 'since' (por defecto, el inicio de la semana)."""
+        since = start_of_week() if since is None else since
+        query = "SELECT batch_id, created_at, encounter_type, wing_key, boss_name, link, duration FROM results WHERE boss_name = ? AND created_at >= ? AND success = 1"
+        params: List[Any] = [boss_name, since]
+        if encounter_type: query += " AND encounter_type = ?"; params.append(encounter_type)
+        query += " ORDER BY created_at DESC"
+        with self._lock: rows = self._conn.execute(query, params).fetchall()
+        return [dict(row) for row in rows]
+
+    def find_by_hash(self, file_hash: str) -> Optional[Dict[str, Any]]:
+        """Último resultado correcto para un fichero con ese hash, si existe."""
+        if not file_hash: return None
+        with self._lock: row = self._conn.execute("SELECT * FROM results WHERE file_hash = ? AND success = 1 ORDER BY created_at DESC LIMIT 1", (file_hash,)).fetchone()
+        return dict(row) if row else None
+
+    def get_batch(self, batch_id: int) -> Optional[UploadBatch]:
+        """Devuelve el lote con sus resultados (lo que usa DiscordBot.format_embed), para poder volver a publicarlo sin resubir."""
+        with self._lock:
+            batch_row = self._conn.execute("SELECT * FROM batches WHERE id = ?", (batch_id,)).fetchone()
+            if not batch_row: return None
+            rows = self._conn.execute("SELECT * FROM results WHERE batch_id = ? ORDER BY id", (batch_id,)).fetchall()
+        batch = UploadBatch(title=batch_row["title"], show_duration=bool(batch_row["show_duration"]), batch_id=batch_row["id"], created_at=batch_row["created_at"])
+        for row in rows:
+            batch.add(UploadResult(row["boss_name"], row["encounter_type"], row["wing_key"], bool(row["success"]), row["link"], row["duration"], row["message"],
+                                   attempt=row["attempt"], is_cm=bool(row["is_cm"]), file_name=row["file_name"], file_hash=row["file_hash"]))
+        return batch
+
+    def close(self):
+        with self._lock:
+            try: self._conn.close()
+            except sqlite3.Error as e: print(f"HistoryStore: Error closing database: {e}")
@@ -0,0 +1,159 @@
+import re
+import json
+import codecs
+from typing import Any, Dict, Iterable, Iterator, Optional, Union
+
+# Selección de campos: None = valor completo; dict = solo esas claves (en objetos) o esos
+# índices ("0", "1"... o "*" para todos) en arrays. Todo lo demás se salta sin construirlo.
+FieldSpec = Optional[Dict[str, Any]]
+
+_WHITESPACE_RE = re.compile(r'[ \t\n\r]*')
+_STRING_RE = re.compile(r'"(?:[^"\\]|\\.)*"', re.DOTALL)
+_SCALAR_RE = re.compile(r'-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?|true|false|null')
+_SCALAR_DELIMITERS = ',}] \t\n\r' # Lo que puede seguir a un escalar: si no, el número puede seguir en el próximo bloque ("12." + "5")
+_SKIP_TOKEN_RE = re.compile(r'"(?:[^"\\]|\\.)*"|[{}\[\]"]', re.DOTALL) # Cadena completa, llave/corchete o '"' suelto (cadena cortada)
+
+class JsonStreamError(ValueError):
+    """JSON mal formado o truncado."""
+
+
+class _StreamReader:
+    """
+    Lector incremental de JSON sobre bloques de bytes. Solo mantiene en memoria el bloque
+    actual (y el valor que se esté materializando), así que el pico de memoria no depende
+    del tamaño del documento.
+    """
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks: Iterator[bytes] = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._buf = ""
+        self._pos = 0
+        self._pin: Optional[int] = None # Inicio del valor que se está capturando (no se descarta)
+        self._eof = False
+
+    def _fill(self) -> bool:
+        """Lee el siguiente bloque, descartando lo ya consumido. False si no hay más datos."""
+        if self._eof: return False
+        keep_from = self._pos if self._pin is None else self._pin
+        if keep_from:
+            self._buf = self._buf[keep_from:]; self._pos -= keep_from
+            if self._pin is not None: self._pin = 0
+        for chunk in self._chunks:
+            text = self._decoder.decode(chunk)
+            if text: self._buf += text; return True
+        self._buf += self._decoder.decode(b"", final=True); self._eof = True
+        return False
+
+    def peek(self) -> Optional[str]:
+        """Siguiente carácter significativo (saltando espacios) o None al final."""
+        while True:
+            self._pos = _WHITESPACE_RE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf): return self._buf[self._pos]
+            if not self._fill(): return None
+
+    def expect(self, char: str):
+        if self.peek() != char: raise JsonStreamError(f"Expected '{char}' at offset {self._pos}")
+        self._pos += 1
+
+    def _match_complete(self, pattern: 're.Pattern', delimited: bool = False) -> 're.Match':
+        """
+        Aplica pattern en la posición actual, leyendo más si el token puede estar cortado.
+        Con delimited (escalares), el token solo vale si le sigue un delimitador o el final del documento.
+        """
+        while True:
+            match = pattern.match(self._buf, self._pos)
+            if match and match.end() < len(self._buf) and (not delimited or self._buf[match.end()] in _SCALAR_DELIMITERS): return match
+            if match and self._eof: return match
+            if not self._fill():
+                match = pattern.match(self._buf, self._pos)
+                if match: return match
+                raise JsonStreamError(f"Unexpected end of JSON at offset {self._pos}")
+
+    def read_string(self) -> str:
+        if self.peek() != '"': raise JsonStreamError(f"Expected string at offset {self._pos}")
+        match = self._match_complete(_STRING_RE); self._pos = match.end()
+        return json.loads(match.group())
+
+    def skip_value(self):
+        """Salta un valor completo sin construirlo."""
+        char = self.peek()
+        if char is None: raise JsonStreamError("Unexpected end of JSON")
+        if char == '"': self._pos = self._match_complete(_STRING_RE).end(); return
+        if char not in '{[': self._pos = self._match_complete(_SCALAR_RE, delimited=True).end(); return
+        depth = 0
+        while True:
+            for match in _SKIP_TOKEN_RE.finditer(self._buf, self._pos):
+                token = match.group()
+                if token == '"': self._pos = match.start(); break # Cadena cortada al final del bloque
+                if len(token) > 1: continue # Cadena completa
+                depth += 1 if token in '{[' else -1
+                if depth == 0: self._pos = match.end(); return
+            else: self._pos = len(self._buf)
+            if not self._fill(): raise JsonStreamError("Unexpected end of JSON inside container")
+
+    def read_value(self) -> Any:
+        """Materializa un valor completo."""
+        self.peek(); self._pin = self._pos
+        try: self.skip_value(); text = self._buf[self._pin:self._pos]
+        finally: self._pin = None
+        return json.loads(text)
+
+    def extract(self, spec: FieldSpec, is_root: bool = False) -> Any:
+        """Lee el siguiente valor quedándose solo con lo indicado en spec."""
+        if spec is None: return self.read_value()
+        char = self.peek()
+        if char == '{': return self._extract_object(spec, is_root)
+        if char == '[': return self._extract_array(spec)
+        self.skip_value(); return None # El tipo no coincide con la selección
+
+    def _extract_object(self, spec: Dict[str, Any], is_root: bool) -> Dict[str, Any]:
+        result: Dict[str, Any] = {}
+        self.expect('{')
+        if self.peek() == '}': self._pos += 1; return result
+        while True:
+            key = self.read_string(); self.expect(':')
+            if key in spec: result[key] = self.extract(spec[key])
+            else: self.skip_value()
+            if is_root and len(result) == len(spec): return result # Ya está todo: no hace falta leer el resto
+            char = self.peek(); self._pos += 1
+            if char == '}': return result
+            if char != ',': raise JsonStreamError(f"Expected ',' or '}}' at offset {self._pos - 1}")
+
+    def _extract_array(self, spec: Dict[str, Any]) -> list:
+        result = []; index = 0
+        self.expect('[')
+        if self.peek() == ']': self._pos += 1; return result
+        while True:
+            item_spec = spec.get(str(index), spec.get("*", ...))
+            if item_spec is ...: self.skip_value()
+            else: result.append(self.extract(item_spec))
+            index += 1
+            char = self.peek(); self._pos += 1
+            if char == ']': return result
+            if char != ',': raise JsonStreamError(f"Expected ',' or ']' at offset {self._pos - 1}")
+
+
+def extract_json_fields(chunks: Iterable[Union[bytes, bytearray]], spec: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Extrae de un documento JSON (un objeto, recibido por bloques de bytes) solo los campos de spec.
+    Ejemplo: {"duration": None, "players": {"*": {"name": None}}} devuelve la duración completa y
+    solo el nombre de cada jugador. Deja de leer en cuanto tiene todos los campos de primer nivel.
+    """
+    result = _StreamReader(chunks).extract(spec, is_root=True)
+    if not isinstance(result, dict): raise JsonStreamError("Root value is not an object")
+    return result
+
+def _self_check():
+    """Comprobación de regresión: el mismo documento cortado en cada posición de byte da el mismo resultado."""
+    document = '{"skip": [1e5, -0.25, "a\\"b", {"x": null}], "durationMS": 12.5, "isCM": true, "players": [{"name": "Zé", "dps": 1.5e3}], "tail": 7}'.encode('utf-8')
+    spec = {"durationMS": None, "isCM": None, "players": {"*": {"name": None}}}
+    expected = {key: value for key, value in json.loads(document).items() if key in ("durationMS", "isCM")}; expected["players"] = [{"name": "Zé"}]
+    for cut in range(len(document) + 1):
+        for chunks in ([document[:cut], document[cut:]], [document[i:i + 1] for i in range(len(document))] if cut == 0 else []):
+            if chunks and extract_json_fields(chunks, spec) != expected: raise AssertionError(f"Mismatch splitting at byte {cut}")
+    print(f"json_stream: OK ({len(document) + 1} split points and byte-by-byte)")
+
+if __name__ == '__main__':
+    # python -m core.json_stream
+    _self_check()
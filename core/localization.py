@@ -1,21 +1,34 @@
 import json
 import os
 import sys
-from typing import Dict, Optional
+import io
+import time
+import contextlib
+from typing import Dict, Optional, List, Tuple, FrozenSet
 from .utils import get_bundled_data_path # Importar función de utils
 
 class LocalizationManager:
-    """Gestiona la carga y el acceso a las cadenas de texto localizadas."""
+    """
+    Gestiona la carga y el acceso a las cadenas de texto localizadas.
+    Todos los idiomas incluidos se cargan una sola vez en un catálogo; cada idioma
+    se completa clave a clave con el idioma por defecto, y cambiar de idioma solo
+    cambia la referencia al diccionario activo.
+    """
 
     def __init__(self, lang_dir_name: str = "lang", data_dir_name: str = "data", default_lang: str = "en"):
         self.lang_dir_name = lang_dir_name
         self.data_dir_name = data_dir_name
         self.default_lang = default_lang
         self.current_lang = default_lang
-        self.strings: Dict[str, str] = {}
+        # Idioma activo como una sola referencia (cadenas, claves sin marcadores {…} que no necesitan format()):
+        # al cambiar de idioma o recargar, un hilo que lee nunca ve las cadenas de uno con las claves planas de otro
+        self._active: Tuple[Dict[str, str], FrozenSet[str]] = ({}, frozenset())
+        self._packs: Dict[str, Dict[str, str]] = {} # Ficheros tal cual, por idioma
+        self._catalog: Dict[str, Tuple[Dict[str, str], FrozenSet[str]]] = {} # idioma -> (cadenas con fallback, claves planas)
         # Usar get_bundled_data_path para encontrar el directorio lang
         self.lang_dir = get_bundled_data_path(os.path.join(self.data_dir_name, self.lang_dir_name))
         print(f"LocalizationManager: Using language directory: {self.lang_dir}")
+        self._preload_catalog()
         self.load_language(self.current_lang)
 
     # _get_base_path ya no es necesario aquí
@@ -32,40 +45,100 @@ class LocalizationManager:
             print(f"Error loading language file {file_path}: {e}")
             return None
 
+    def _preload_catalog(self):
+        """Carga todos los idiomas del directorio lang y compila el catálogo."""
+        try: file_names = sorted(name for name in os.listdir(self.lang_dir) if name.lower().endswith(".json"))
+        except OSError as e: print(f"Error listing language directory {self.lang_dir}: {e}"); file_names = []
+        for file_name in file_names:
+            strings = self._load_json(os.path.join(self.lang_dir, file_name))
+            if strings is not None: self._packs[os.path.splitext(file_name)[0]] = strings
+        self._compile_all()
+        print(f"LocalizationManager: Catalog loaded with languages: {', '.join(self._catalog) or 'none'}")
+
+    @staticmethod
+    def _is_plain(template: str) -> bool:
+        return "{" not in template and "}" not in template
+
+    def _compile(self, lang_code: str):
+        """Fusiona un idioma con el idioma por defecto (fallback por clave) y marca las plantillas planas."""
+        merged = dict(self._packs.get(self.default_lang, {})) if lang_code != self.default_lang else {}
+        merged.update(self._packs.get(lang_code, {}))
+        plain_keys = frozenset(key for key, template in merged.items() if self._is_plain(template))
+        self._catalog[lang_code] = (merged, plain_keys)
+
+    def _compile_all(self):
+        for lang_code in self._packs: self._compile(lang_code)
+
+    @property
+    def strings(self) -> Dict[str, str]:
+        """Cadenas del idioma activo (con fallback)."""
+        return self._active[0]
+
+    def available_languages(self) -> List[str]:
+        """Códigos de idioma presentes en el catálogo."""
+        return list(self._catalog.keys())
+
+    def _activate(self, lang_code: str):
+        self._active = self._catalog[lang_code]
+        self.current_lang = lang_code
+
     def load_language(self, lang_code: str):
-        """Carga las cadenas para un código de idioma específico."""
-        print(f"Loading language: {lang_code}")
-        file_path = os.path.join(self.lang_dir, f"{lang_code}.json")
-        loaded_strings = self._load_json(file_path)
-
-        if loaded_strings is not None:
-            self.strings = loaded_strings
-            self.current_lang = lang_code
+        """Activa un idioma del catálogo (solo cambia la referencia); lo lee de disco si aún no estaba cargado."""
+        if lang_code not in self._catalog:
+            print(f"Loading language from disk: {lang_code}")
+            loaded_strings = self._load_json(os.path.join(self.lang_dir, f"{lang_code}.json"))
+            if loaded_strings is not None: self._packs[lang_code] = loaded_strings; self._compile(lang_code)
+        if lang_code in self._catalog:
+            self._activate(lang_code)
             print(f"Language '{lang_code}' loaded successfully.")
+        elif self.default_lang in self._catalog:
+            print(f"Failed to load language '{lang_code}'. Using default '{self.default_lang}' as fallback.")
+            self._activate(self.default_lang)
         else:
-            print(f"Failed to load language '{lang_code}'. Attempting to load default '{self.default_lang}'.")
-            if lang_code != self.default_lang:
-                default_file_path = os.path.join(self.lang_dir, f"{self.default_lang}.json")
-                default_strings = self._load_json(default_file_path)
-                if default_strings is not None:
-                    self.strings = default_strings
-                    self.current_lang = self.default_lang
-                    print(f"Default language '{self.default_lang}' loaded as fallback.")
-                else:
-                    print(f"Critical Error: Could not load requested language or default language.")
-                    self.strings = {}
-                    self.current_lang = ""
-            else:
-                 self.strings = {}
-                 self.current_lang = ""
+            print(f"Critical Error: Could not load requested language or default language.")
+            self._active = ({}, frozenset()); self.current_lang = ""
 
+    def apply_language_pack(self, lang_code: str, strings: Dict[str, str]) -> bool:
+        """
+        Aplica un paquete de idioma ya validado (recarga en caliente).
+        Devuelve True si afecta al idioma actual.
+        """
+        self._packs[lang_code] = strings
+        if lang_code == self.default_lang: self._compile_all() # El fallback de todos los idiomas cambia
+        else: self._compile(lang_code)
+        print(f"Language '{lang_code}' reloaded.")
+        if lang_code not in (self.current_lang, self.default_lang) or self.current_lang not in self._catalog: return False
+        self._activate(self.current_lang)
+        return True
 
     def get_string(self, key: str, **kwargs) -> str:
         """
-        Obtiene una cadena localizada por su clave.
-        Permite formatear la cadena usando kwargs.
-        Devuelve la clave si no se encuentra la cadena.
+        Obtiene una cadena localizada por su clave (con fallback al idioma por defecto).
+        Permite formatear la cadena usando kwargs; las plantillas sin marcadores no se formatean.
+        Devuelve la clave si no se encuentra la cadena en ningún idioma.
         """
+        strings, plain_keys = self._active # Una sola lectura: cadenas y claves planas del mismo idioma
+        string_template = strings.get(key)
+        if string_template is None: return key # Devolver clave si no existe
+        if key in plain_keys: return string_template
+        try:
+            return string_template.format(**kwargs)
+        except KeyError as e:
+            print(f"Warning: Missing format argument '{e}' for key '{key}' in language '{self.current_lang}'")
+            return string_template # Devolver sin formatear si faltan args
+        except Exception as e:
+             print(f"Error formatting string for key '{key}': {e}")
+             return string_template # Devolver sin formatear en otros errores
+
+
+class _LegacyLocalizationManager:
+    """get_string anterior al catálogo, copiado tal cual, solo para comparar en el benchmark."""
+
+    def __init__(self, strings: Dict[str, str], current_lang: str):
+        self.strings = strings
+        self.current_lang = current_lang
+
+    def get_string(self, key: str, **kwargs) -> str:
         string_template = self.strings.get(key, key) # Devolver clave si no existe
         try:
             return string_template.format(**kwargs)
@@ -77,6 +150,40 @@ class LocalizationManager:
              return string_template # Devolver sin formatear en otros errores
 
 
+def _benchmark_progress_strings(loc_manager: 'LocalizationManager', iterations: int = 200000, repeats: int = 5):
+    """Micro-benchmark de las cadenas de progreso que usa _upload_worker en su bucle."""
+    calls = [
+        ("upload_status_processing", {"count": 3, "total": 23, "boss": "Vale Guardian"}),
+        ("upload_status_uploaded", {"boss": "Vale Guardian"}),
+        ("upload_status_uploaded_with_duration", {"boss": "Vale Guardian", "duration": "03:21.500"}),
+        ("upload_status_sending_discord", {}),
+        ("upload_status_sent_discord", {}),
+        ("general_warning", {}),
+    ]
+    legacy = _LegacyLocalizationManager(dict(loc_manager._packs.get(loc_manager.current_lang, {})), loc_manager.current_lang)
+    best: Dict[str, float] = {}
+    for _ in range(repeats): # Alternando las dos versiones y quedándose con la mejor pasada de cada una (menos ruido)
+        for label, getter in (("legacy (format always)", legacy.get_string), ("catalog", loc_manager.get_string)):
+            start = time.perf_counter()
+            for _ in range(iterations // len(calls)):
+                for key, kwargs in calls: getter(key, **kwargs)
+            best[label] = min(best.get(label, float("inf")), time.perf_counter() - start)
+    for label, elapsed in best.items(): print(f"{label:<24} {elapsed * 1e9 / iterations:8.1f} ns/call")
+    for key, kwargs in calls: # Por cadena: las plantillas sin marcadores son las que se ahorran format()
+        timings = []
+        for getter in (legacy.get_string, loc_manager.get_string):
+            start = time.perf_counter()
+            for _ in range(iterations // len(calls)): getter(key, **kwargs)
+            timings.append((time.perf_counter() - start) * 1e9 / (iterations // len(calls)))
+        print(f"  {key:<40} {timings[0]:7.1f} -> {timings[1]:7.1f} ns")
+    switches = 2000
+    with contextlib.redirect_stdout(io.StringIO()): # Sin el coste de los print de load_language
+        start = time.perf_counter()
+        for _ in range(switches // 2): loc_manager.load_language("es"); loc_manager.load_language("en")
+        elapsed = time.perf_counter() - start
+    print(f"{'language switch':<24} {elapsed * 1e9 / switches:8.1f} ns/switch")
+
+
 # --- Ejemplo de uso ---
 if __name__ == "__main__":
     # Crear archivos dummy si no existen (relativo a este script)
@@ -109,4 +216,8 @@ if __name__ == "__main__":
     print("\n--- Testing Fallback to English ---")
     loc_manager.load_language("fr") # Non-existent language
     print(loc_manager.get_string("hello", name="Monde")) # Should show English
-    print(loc_manager.get_string("config_save_button")) # Should show English
\ No newline at end of file
+    print(loc_manager.get_string("config_save_button")) # Should show English
+
+    print("\n--- Micro-benchmark (upload progress strings) ---")
+    loc_manager.load_language("en")
+    _benchmark_progress_strings(loc_manager)
\ No newline at end of file
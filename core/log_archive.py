@@ -0,0 +1,198 @@
+import os
+import sys
+import json
+import time
+import zipfile
+import datetime
+import threading
+from typing import Callable, Dict, List, Optional, Any
+
+from .log_index import is_log_file, ARCHIVE_DIR_NAME
+
+MANIFEST_FILE_NAME = "manifest.jsonl" # Una línea JSON por log archivado (solo se añade)
+DEFAULT_ARCHIVE_MAX_AGE_DAYS = 90
+ARCHIVE_INTERVAL_SECONDS = 3600 # Cada cuánto se busca trabajo nuevo
+ARCHIVE_BATCH_SIZE = 25 # Logs archivados por tanda...
+ARCHIVE_BATCH_PAUSE_SECONDS = 2.0 # ...y pausa entre tandas, para no competir con el juego ni con las subidas
+
+def month_archive_name(mtime: float) -> str:
+    """Contenedor mensual de un log: YYYY-MM.zip según su fecha de modificación."""
+    return datetime.datetime.fromtimestamp(mtime).strftime('%Y-%m') + ".zip"
+
+class LogArchive:
+    """
+    Archivo de logs antiguos de una carpeta raíz: <raíz>/_archive/YYYY-MM.zip más un
+    manifest.jsonl que permite buscarlos (por carpeta de boss y fecha) sin abrir los zip.
+    Dentro de cada zip se conserva la ruta relativa original (carpeta del boss incluida).
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.archive_dir = os.path.join(root, ARCHIVE_DIR_NAME)
+        self.manifest_path = os.path.join(self.archive_dir, MANIFEST_FILE_NAME)
+        self._entries: Dict[str, Dict[str, Any]] = self._load_manifest() # arcname -> {"archive", "mtime", "size"}
+
+    def _load_manifest(self) -> Dict[str, Dict[str, Any]]:
+        entries: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try: record = json.loads(line); entries[record.pop("arcname")] = record
+                    except (json.JSONDecodeError, KeyError, AttributeError): continue # Línea cortada por un cierre a medias
+        except FileNotFoundError: pass
+        except IOError as e: print(f"LogArchive: Could not read manifest in {self.archive_dir}: {e}")
+        return entries
+
+    def _append_manifest(self, records: List[Dict[str, Any]]):
+        with open(self.manifest_path, 'a', encoding='utf-8') as f:
+            for record in records: f.write(json.dumps(record) + "\n")
+            f.flush(); os.fsync(f.fileno())
+
+    def find_candidates(self, cutoff: float) -> List[str]:
+        """Logs de la raíz (fuera de _archive) con mtime anterior a cutoff, del más antiguo al más reciente."""
+        candidates = []
+        for dir_path, dirs, files in os.walk(self.root):
+            dirs[:] = [d for d in dirs if d != ARCHIVE_DIR_NAME]
+            for file in files:
+                if not is_log_file(file): continue
+                file_path = os.path.join(dir_path, file)
+                try: mtime = os.path.getmtime(file_path)
+                except OSError: continue
+                if mtime < cutoff: candidates.append((mtime, file_path))
+        candidates.sort()
+        return [path for _, path in candidates]
+
+    def archive_files(self, file_paths: List[str], should_stop: Optional[Callable[[], bool]] = None) -> int:
+        """
+        Mueve los logs indicados a su zip mensual. Un log solo se borra del árbol después de
+        escribirlo y comprobarlo en el zip, y se añade al manifiesto al final de cada zip.
+        Los logs ya comprimidos (.zevtc, .evtc.zip) se guardan sin recomprimir.
+        """
+        os.makedirs(self.archive_dir, exist_ok=True); archived = 0; records: List[Dict[str, Any]] = []
+        by_archive: Dict[str, List[str]] = {}
+        for file_path in file_paths:
+            try: by_archive.setdefault(month_archive_name(os.path.getmtime(file_path)), []).append(file_path)
+            except OSError: continue
+        for archive_name, paths in by_archive.items():
+            if should_stop and should_stop(): break
+            try:
+                with zipfile.ZipFile(os.path.join(self.archive_dir, archive_name), 'a') as zf:
+                    existing = set(zf.namelist())
+                    for file_path in paths:
+                        if should_stop and should_stop(): break
+                        arcname = os.path.relpath(file_path, self.root).replace(os.sep, "/")
+                        try: stat = os.stat(file_path)
+                        except OSError: continue
+                        if arcname not in existing: # Si ya está (corte a mitad de una tanda anterior), solo falta borrar el original
+                            compression = zipfile.ZIP_DEFLATED if file_path.lower().endswith('.evtc') else zipfile.ZIP_STORED
+                            zf.write(file_path, arcname, compress_type=compression)
+                        if zf.getinfo(arcname).file_size != stat.st_size: print(f"LogArchive: Size mismatch for {arcname}, keeping original."); continue
+                        records.append({"arcname": arcname, "archive": archive_name, "mtime": stat.st_mtime, "size": stat.st_size})
+            finally:
+                # El zip ya está cerrado (directorio central escrito): registrar y solo entonces borrar los originales
+                if records: self._append_manifest(records)
+                for record in records:
+                    self._entries[record["arcname"]] = {k: v for k, v in record.items() if k != "arcname"}
+                    try: os.remove(os.path.join(self.root, record["arcname"])); archived += 1
+                    except OSError as e: print(f"LogArchive: Archived but could not remove {record['arcname']}: {e}")
+                records = []
+        return archived
+
+    def search(self, folder_name: Optional[str] = None, since: Optional[float] = None, until: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Logs archivados (opcionalmente de una carpeta de boss y en [since, until)), del más reciente al más antiguo."""
+        results = []
+        for arcname, entry in self._entries.items():
+            if folder_name and folder_name not in arcname.split("/")[:-1]: continue
+            if since is not None and entry["mtime"] < since: continue
+            if until is not None and entry["mtime"] >= until: continue
+            results.append({"arcname": arcname, **entry})
+        results.sort(key=lambda e: e["mtime"], reverse=True)
+        return results
+
+    def extract(self, arcname: str, dest_dir: str) -> str:
+        """Extrae un log archivado a dest_dir (conservando su mtime) y devuelve su ruta."""
+        entry = self._entries[arcname]
+        with zipfile.ZipFile(os.path.join(self.archive_dir, entry["archive"])) as zf: out_path = zf.extract(arcname, dest_dir)
+        os.utime(out_path, (entry["mtime"], entry["mtime"]))
+        return out_path
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class LogArchiver:
+    """
+    Tarea de mantenimiento en segundo plano: cada ARCHIVE_INTERVAL_SECONDS archiva, por tandas
+    pequeñas y con pausas, los logs con más de max_age_days días de todas las carpetas raíz.
+    """
+
+    def __init__(self, get_roots: Callable[[], List[str]], max_age_days: int = DEFAULT_ARCHIVE_MAX_AGE_DAYS,
+                 on_archived: Optional[Callable[[str, int], None]] = None):
+        self.get_roots = get_roots
+        self.max_age_days = max_age_days
+        self.on_archived = on_archived
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive() and not self._stop_event.is_set(): return
+        self._stop_event = threading.Event() # Un evento por hilo: un hilo anterior que aún esté saliendo no se reactiva
+        self._thread = threading.Thread(target=self._run, args=(self._stop_event,), name="LogArchiverThread", daemon=True); self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _run(self, stop_event: threading.Event):
+        while not stop_event.is_set():
+            try: self.run_once(stop_event=stop_event)
+            except Exception as e: print(f"LogArchiver: Error archiving logs: {e}")
+            stop_event.wait(ARCHIVE_INTERVAL_SECONDS)
+
+    def run_once(self, batch_pause: float = ARCHIVE_BATCH_PAUSE_SECONDS, stop_event: Optional[threading.Event] = None) -> int:
+        """Archiva todo lo pendiente (por tandas). Devuelve cuántos logs se movieron."""
+        stop_event = stop_event or self._stop_event; cutoff = time.time() - self.max_age_days * 86400; total = 0
+        for root in self.get_roots():
+            if stop_event.is_set() or not os.path.isdir(root): continue
+            archive = LogArchive(root); candidates = archive.find_candidates(cutoff); archived_in_root = 0
+            for start in range(0, len(candidates), ARCHIVE_BATCH_SIZE):
+                if stop_event.is_set(): break
+                archived_in_root += archive.archive_files(candidates[start:start + ARCHIVE_BATCH_SIZE], should_stop=stop_event.is_set)
+                if batch_pause and start + ARCHIVE_BATCH_SIZE < len(candidates): stop_event.wait(batch_pause)
+            if archived_in_root:
+                print(f"LogArchiver: Archived {archived_in_root} logs from {root}")
+                if self.on_archived: self.on_archived(root, archived_in_root)
+            total += archived_in_root
+        return total
+
+
+def _benchmark_scan(num_bosses: int = 20, logs_per_boss: int = 2000, recent_per_boss: int = 20):
+    """
+    Mide el escaneo de LogIndex sobre un árbol sintético antes y después de archivar.
+    Uso: python -m core.log_archive [bosses] [logs_por_boss]
+    """
+    import shutil, tempfile
+    from .log_index import LogIndex
+    root = tempfile.mkdtemp(prefix="zenlog_archive_bench_"); now = time.time()
+    try:
+        folders = []
+        for boss in range(num_bosses):
+            folder = os.path.join(root, f"Boss {boss}"); os.makedirs(folder); folders.append(folder)
+            for i in range(logs_per_boss):
+                path = os.path.join(folder, f"2023{i:06d}.zevtc")
+                with open(path, 'wb') as f: f.write(b"EVTC" + os.urandom(60))
+                age_days = 1 if i >= logs_per_boss - recent_per_boss else 120 + i % 365
+                os.utime(path, (now - age_days * 86400, now - age_days * 86400))
+        def timed_scan() -> float:
+            start = time.perf_counter()
+            for folder in folders: LogIndex.scan_folder(folder)
+            return time.perf_counter() - start
+        before = timed_scan()
+        archive_start = time.perf_counter(); archived = LogArchiver(lambda: [root], max_age_days=DEFAULT_ARCHIVE_MAX_AGE_DAYS).run_once(batch_pause=0); archive_time = time.perf_counter() - archive_start
+        after = timed_scan()
+        print(f"{num_bosses * logs_per_boss} logs, {archived} archived in {archive_time:.2f} s")
+        print(f"Full scan before: {before * 1000:.1f} ms | after: {after * 1000:.1f} ms ({before / max(after, 1e-9):.1f}x faster)")
+        print(f"Archive search (Boss 0): {len(LogArchive(root).search('Boss 0'))} entries")
+    finally: shutil.rmtree(root, ignore_errors=True)
+
+if __name__ == "__main__":
+    _benchmark_scan(*(int(arg) for arg in sys.argv[1:3]))
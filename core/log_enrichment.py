@@ -0,0 +1,92 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Any, Dict, Optional
+
+import requests
+
+from .disk_cache import DiskCache
+from .json_stream import extract_json_fields, JsonStreamError
+
+DPS_REPORT_GET_JSON_ENDPOINT = 'https://b.dps.report/getJson'
+GET_JSON_CHUNK_BYTES = 64 * 1024
+GET_JSON_TIMEOUT_SECONDS = 60
+DEFAULT_ENRICHMENT_CACHE_BYTES = 2 * 1024 * 1024 # ~2000 resúmenes de ~1 KB
+DEFAULT_ENRICHMENT_WORKERS = 4
+
+# Campos que se extraen del JSON de Elite Insights; el resto (rotaciones, mecánicas...) se salta sin parsear
+ENRICHMENT_FIELDS: Dict[str, Any] = {
+    "duration": None,
+    "durationMS": None,
+    "success": None,
+    "isCM": None,
+    "players": {"*": {"name": None, "account": None, "profession": None, "group": None, "dpsAll": {"0": {"dps": None}}}},
+}
+
+def format_duration(duration: Any) -> Optional[str]:
+    """Duración como mm:ss.sss si es numérica (segundos); si no, el texto original."""
+    if duration in (None, ""): return None
+    try: duration_seconds = float(duration); minutes = int(duration_seconds // 60); seconds = duration_seconds % 60; return f"{minutes:02d}:{seconds:06.3f}"
+    except (TypeError, ValueError): return str(duration)
+
+def summarize_fields(fields: Dict[str, Any]) -> Dict[str, Any]:
+    """Resumen compacto (el que se guarda en caché) a partir de los campos extraídos."""
+    players = []
+    for player in fields.get("players") or []:
+        if not isinstance(player, dict): continue
+        dps_all = player.get("dpsAll") or [{}]
+        players.append({"name": player.get("name"), "account": player.get("account"), "profession": player.get("profession"),
+                        "group": player.get("group"), "dps": (dps_all[0] or {}).get("dps", 0)})
+    players.sort(key=lambda p: p["dps"] or 0, reverse=True)
+    return {"duration": format_duration(fields.get("duration")), "duration_ms": fields.get("durationMS"),
+            "success": fields.get("success"), "is_cm": bool(fields.get("isCM")), "players": players}
+
+
+class LogEnricher:
+    """
+    Obtiene datos extra de un log ya subido (duración, éxito, CM, jugadores y su DPS) desde
+    getJson de dps.report. La respuesta se procesa en streaming extrayendo solo ENRICHMENT_FIELDS,
+    así que la memoria no crece con el tamaño del informe. Los resúmenes se guardan en una caché
+    LRU en disco (un permalink no cambia) y varios permalinks se consultan en paralelo.
+    """
+
+    def __init__(self, http: requests.Session, cache_dir: str, max_cache_bytes: int = DEFAULT_ENRICHMENT_CACHE_BYTES, max_workers: int = DEFAULT_ENRICHMENT_WORKERS):
+        self.http = http
+        self.cache = DiskCache(cache_dir, max_cache_bytes)
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None: self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="LogEnricher")
+            return self._executor
+
+    def _fetch(self, permalink: str) -> Optional[Dict[str, Any]]:
+        print(f"Fetching getJson fields for: {permalink}")
+        try:
+            with self.http.get(DPS_REPORT_GET_JSON_ENDPOINT, params={'permalink': permalink}, timeout=GET_JSON_TIMEOUT_SECONDS, stream=True) as res:
+                if res.status_code != 200: print(f"Error fetching JSON: Status code {res.status_code}"); return None
+                fields = extract_json_fields(res.iter_content(chunk_size=GET_JSON_CHUNK_BYTES), ENRICHMENT_FIELDS)
+        except requests.exceptions.Timeout: print("Error: Timeout fetching getJson."); return None
+        except requests.exceptions.RequestException as e: print(f"Network error fetching getJson: {e}"); return None
+        except JsonStreamError as e: print(f"Error: Could not parse getJson response for {permalink}: {e}"); return None
+        if not fields: print(f"Error: getJson returned no usable fields for {permalink}"); return None
+        return summarize_fields(fields)
+
+    def get(self, permalink: str) -> Optional[Dict[str, Any]]:
+        """Resumen de un permalink (de la caché si ya se consultó)."""
+        if not permalink: return None
+        cached = self.cache.get(permalink)
+        if cached: return cached["meta"]
+        summary = self._fetch(permalink)
+        if summary: self.cache.put_json(permalink, summary)
+        return summary
+
+    def submit(self, permalink: str) -> 'Future[Optional[Dict[str, Any]]]':
+        """Consulta un permalink en segundo plano."""
+        return self._get_executor().submit(self.get, permalink)
+
+    def shutdown(self):
+        with self._executor_lock:
+            if self._executor: self._executor.shutdown(wait=False, cancel_futures=True); self._executor = None
+        self.cache.flush()
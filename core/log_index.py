@@ -0,0 +1,109 @@
+import os
+import time
+import heapq
+import bisect
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple, Iterable
+
+DEFAULT_INDEX_MAX_AGE_SECONDS = 10.0 # Tras este tiempo una carpeta se vuelve a escanear
+MAX_ROOT_SCAN_WORKERS = 8
+ARCHIVE_DIR_NAME = "_archive" # Carpeta de logs archivados (ver core.log_archive); nunca se escanea
+
+def is_log_file(file_name: str) -> bool:
+    """True para .evtc, .zevtc y .evtc.zip."""
+    name, ext = os.path.splitext(file_name); ext = ext.lower()
+    return ext in ('.zevtc', '.evtc') or (ext == '.zip' and name.lower().endswith('.evtc'))
+
+class FolderIndex:
+    """Logs de una carpeta de boss ordenados por mtime (listas paralelas para poder usar bisect)."""
+
+    __slots__ = ("scanned_at", "mtimes", "paths")
+
+    def __init__(self, scanned_at: float, mtimes: List[float], paths: List[str]):
+        self.scanned_at = scanned_at
+        self.mtimes = mtimes
+        self.paths = paths
+
+class LogIndex:
+    """
+    Índice de logs por carpeta de boss. Cada carpeta se recorre una sola vez por
+    refresco y se guarda ordenada por mtime, de modo que "último log" y
+    "logs entre dos instantes" son búsquedas binarias.
+    """
+
+    def __init__(self, max_age_seconds: float = DEFAULT_INDEX_MAX_AGE_SECONDS):
+        self.max_age_seconds = max_age_seconds
+        self._folders: Dict[str, FolderIndex] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def scan_folder(folder_path: str) -> FolderIndex:
+        """Recorre una carpeta (recursivamente) y devuelve sus logs ordenados por mtime."""
+        entries: List[Tuple[float, str]] = []
+        for root, dirs, files in os.walk(folder_path):
+            dirs[:] = [d for d in dirs if d != ARCHIVE_DIR_NAME]
+            for file in files:
+                if not is_log_file(file): continue
+                file_path = os.path.join(root, file)
+                try: entries.append((os.path.getmtime(file_path), file_path))
+                except OSError: continue # Borrado o movido durante el escaneo
+        entries.sort()
+        return FolderIndex(time.monotonic(), [m for m, _ in entries], [p for _, p in entries])
+
+    def get_folder(self, folder_path: str, force_refresh: bool = False) -> FolderIndex:
+        """Devuelve el índice de una carpeta, reescaneándola si está caducado."""
+        key = os.path.normcase(os.path.normpath(folder_path))
+        with self._lock: cached = self._folders.get(key)
+        if cached and not force_refresh and time.monotonic() - cached.scanned_at < self.max_age_seconds: return cached
+        if not os.path.isdir(folder_path): folder_index = FolderIndex(time.monotonic(), [], [])
+        else: folder_index = self.scan_folder(folder_path)
+        with self._lock: self._folders[key] = folder_index
+        return folder_index
+
+    def refresh_roots(self, folders_by_root: Dict[str, List[str]]) -> Dict[str, float]:
+        """
+        Reescanea las carpetas de varias raíces en paralelo (un hilo por raíz, las carpetas de
+        una misma raíz en serie), para que una unidad de red lenta no retrase a las demás.
+        Devuelve {raíz: segundos empleados}.
+        """
+        def scan_root(folders: List[str]) -> float:
+            start = time.perf_counter()
+            for folder_path in folders:
+                try: self.get_folder(folder_path, force_refresh=True)
+                except Exception as e: print(f"LogIndex: Error scanning {folder_path}: {e}")
+            return time.perf_counter() - start
+        if not folders_by_root: return {}
+        workers = min(MAX_ROOT_SCAN_WORKERS, len(folders_by_root))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="LogRootScan") as executor:
+            futures = {root: executor.submit(scan_root, folders) for root, folders in folders_by_root.items()}
+            return {root: future.result() for root, future in futures.items()}
+
+    def invalidate(self):
+        with self._lock: self._folders.clear()
+
+    def query_range(self, folder_paths: Iterable[str], since: float, until: Optional[float] = None) -> List[Tuple[float, str]]:
+        """Logs con since <= mtime < until de varias carpetas, ordenados por mtime (ascendente)."""
+        slices = []
+        for folder_path in dict.fromkeys(folder_paths):
+            folder_index = self.get_folder(folder_path)
+            lo = bisect.bisect_left(folder_index.mtimes, since)
+            hi = bisect.bisect_left(folder_index.mtimes, until) if until is not None else len(folder_index.mtimes)
+            if lo < hi: slices.append(list(zip(folder_index.mtimes[lo:hi], folder_index.paths[lo:hi])))
+        return list(heapq.merge(*slices))
+
+    def latest(self, folder_paths: Iterable[str]) -> Optional[Tuple[float, str]]:
+        """Log más reciente entre varias carpetas."""
+        best: Optional[Tuple[float, str]] = None
+        for folder_path in dict.fromkeys(folder_paths):
+            folder_index = self.get_folder(folder_path)
+            if folder_index.mtimes and (best is None or folder_index.mtimes[-1] > best[0]): best = (folder_index.mtimes[-1], folder_index.paths[-1])
+        return best
+
+    def recent(self, folder_paths: Iterable[str], limit: int) -> List[Tuple[float, str]]:
+        """Los 'limit' logs más recientes entre varias carpetas, del más reciente al más antiguo."""
+        slices = []
+        for folder_path in dict.fromkeys(folder_paths):
+            folder_index = self.get_folder(folder_path)
+            if folder_index.mtimes: slices.append(list(zip(folder_index.mtimes[-limit:], folder_index.paths[-limit:]))[::-1])
+        return list(heapq.merge(*slices, reverse=True))[:limit]
@@ -0,0 +1,130 @@
+import os
+import sys
+import hashlib
+import zipfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, Future
+from typing import Dict, List, Optional
+
+from .disk_cache import DiskCache
+
+DEFAULT_PREP_CACHE_BYTES = 512 * 1024 * 1024 # 512 MB para artefactos comprimidos
+HASH_CHUNK_SIZE = 1024 * 1024
+BELOW_NORMAL_PRIORITY_CLASS = 0x00004000 # Windows
+
+def _lower_process_priority():
+    """Inicializador del pool: baja la prioridad del proceso para no competir con la UI."""
+    try:
+        if hasattr(os, 'nice'): os.nice(10)
+        elif sys.platform == "win32":
+            import ctypes
+            handle = ctypes.windll.kernel32.GetCurrentProcess()
+            ctypes.windll.kernel32.SetPriorityClass(handle, BELOW_NORMAL_PRIORITY_CLASS)
+    except Exception as e: print(f"LogPreparer: Could not lower worker priority: {e}")
+
+def is_raw_evtc(file_path: str) -> bool:
+    """True si el log es un .evtc sin comprimir."""
+    return os.path.splitext(file_path)[1].lower() == '.evtc'
+
+def cache_key_for(file_path: str, mtime: float, size: int) -> str:
+    """Clave de caché: cambia si el fichero se modifica."""
+    return f"{os.path.normcase(os.path.abspath(file_path))}|{mtime:.3f}|{size}"
+
+def hash_file(file_path: str) -> str:
+    """SHA-1 del contenido de un fichero, leído por bloques."""
+    sha1 = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''): sha1.update(chunk)
+    return sha1.hexdigest()
+
+def _prepare_log_file(file_path: str, compressed_out_path: Optional[str]) -> Dict:
+    """
+    Se ejecuta en un proceso del pool: calcula el SHA-1 del log y, si es un .evtc
+    sin comprimir, genera un .evtc.zip en compressed_out_path.
+    """
+    stat = os.stat(file_path)
+    sha1 = hash_file(file_path)
+    compressed = False
+    if compressed_out_path and is_raw_evtc(file_path):
+        tmp_path = compressed_out_path + ".part"
+        with zipfile.ZipFile(tmp_path, 'w', compression=zipfile.ZIP_DEFLATED) as zf: zf.write(file_path, arcname=os.path.basename(file_path))
+        os.replace(tmp_path, compressed_out_path); compressed = True
+    return {"source": file_path, "mtime": stat.st_mtime, "size": stat.st_size, "sha1": sha1, "compressed": compressed}
+
+
+class PreparedLog:
+    """Resultado de la preparación previa de un log."""
+
+    def __init__(self, source_path: str, upload_path: str, sha1: str, compressed: bool):
+        self.source_path = source_path
+        self.upload_path = upload_path # Ruta a subir (el .zip de la caché o el original)
+        self.sha1 = sha1
+        self.compressed = compressed
+
+
+class LogPreparer:
+    """
+    Etapa de fondo de baja prioridad: calcula hash y comprime los logs más recientes
+    en un pool de procesos, guardando los artefactos en una caché en disco acotada.
+    """
+
+    def __init__(self, cache_dir: str, max_cache_bytes: int = DEFAULT_PREP_CACHE_BYTES, max_workers: int = 1):
+        self.cache = DiskCache(cache_dir, max_cache_bytes)
+        self.max_workers = max_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending: Dict[str, Future] = {} # cache_key -> Future
+        self._lock = threading.RLock() # RLock: add_done_callback puede ejecutarse en el mismo hilo
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None: self._executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_lower_process_priority)
+        return self._executor
+
+    @staticmethod
+    def _stat_key(file_path: str) -> Optional[str]:
+        try: stat = os.stat(file_path)
+        except OSError: return None
+        return cache_key_for(file_path, stat.st_mtime, stat.st_size)
+
+    def schedule(self, file_paths: List[str]) -> int:
+        """Encola la preparación de los logs que aún no estén en caché. Devuelve cuántos se encolaron."""
+        scheduled = 0
+        with self._lock:
+            for file_path in file_paths:
+                key = self._stat_key(file_path)
+                if key is None or key in self.cache or key in self._pending: continue
+                out_path = self.cache.path_for(key, ".evtc.zip") if is_raw_evtc(file_path) else None
+                try: future = self._get_executor().submit(_prepare_log_file, file_path, out_path)
+                except RuntimeError as e: print(f"LogPreparer: Could not schedule {file_path}: {e}"); break # Pool cerrado
+                self._pending[key] = future; scheduled += 1
+                future.add_done_callback(lambda f, k=key, p=out_path: self._on_prepared(k, p, f))
+        return scheduled
+
+    def _on_prepared(self, key: str, out_path: Optional[str], future: Future):
+        with self._lock: self._pending.pop(key, None)
+        try: meta = future.result()
+        except Exception as e: print(f"LogPreparer: Preparation failed for {key.split('|')[0]}: {e}"); return
+        # Si el fichero cambió mientras se preparaba, descartar el resultado
+        if cache_key_for(meta["source"], meta["mtime"], meta["size"]) != key:
+            if out_path and os.path.exists(out_path):
+                try: os.remove(out_path)
+                except OSError: pass
+            return
+        self.cache.put(key, meta, file_path=out_path if meta.get("compressed") else None)
+        print(f"LogPreparer: Prepared {os.path.basename(meta['source'])} (sha1={meta['sha1'][:10]}, compressed={meta['compressed']})")
+
+    def get_prepared(self, file_path: str) -> Optional[PreparedLog]:
+        """Devuelve el log preparado si está en caché y el original no ha cambiado."""
+        key = self._stat_key(file_path)
+        if key is None: return None
+        entry = self.cache.get(key)
+        if not entry: return None
+        meta = entry["meta"]
+        upload_path = entry["path"] if meta.get("compressed") and entry["path"] else file_path
+        return PreparedLog(source_path=file_path, upload_path=upload_path, sha1=meta.get("sha1", ""), compressed=bool(meta.get("compressed")))
+
+    def shutdown(self, wait: bool = False):
+        """Detiene el pool de procesos (cancelando lo que no haya empezado)."""
+        with self._lock:
+            executor = self._executor; self._executor = None; self._pending.clear()
+        if executor: executor.shutdown(wait=wait, cancel_futures=True)
+        self.cache.flush()
@@ -0,0 +1,62 @@
+import os
+import time
+import zipfile
+from typing import List, Optional, Tuple
+
+from .upload_control import UploadControl
+
+RECENT_WRITE_SECONDS = 10.0 # Un log modificado hace menos de esto puede estar escribiéndose todavía
+STABILITY_WINDOW_SECONDS = 1.5 # Tamaño y mtime sin cambios durante este tiempo = ArcDPS terminó de escribir
+READINESS_POLL_SECONDS = 0.5
+READINESS_MAX_WAIT_SECONDS = 8.0 # Espera máxima por un log a medio escribir antes de usar el anterior
+EVTC_MAGIC = b"EVTC"
+
+def check_log_complete(file_path: str) -> Optional[str]:
+    """
+    Comprobación barata del contenido (sin leer el log entero): para .zevtc/.evtc.zip, que el zip
+    tenga su directorio central con al menos una entrada; para .evtc, la cabecera EVTC.
+    Devuelve None si está bien o el motivo si no.
+    """
+    try:
+        if file_path.lower().endswith('.evtc'):
+            with open(file_path, 'rb') as f: return None if f.read(len(EVTC_MAGIC)) == EVTC_MAGIC else "bad_header"
+        with zipfile.ZipFile(file_path) as zf: # Solo lee el fin del fichero (EOCD y directorio central)
+            infos = zf.infolist()
+            if not infos: return "empty_zip"
+            central_directory_start = zf.start_dir
+            if any(info.header_offset >= central_directory_start for info in infos): return "incomplete_zip"
+        return None
+    except zipfile.BadZipFile: return "incomplete_zip" # ArcDPS aún no ha escrito el directorio central
+    except OSError: return "unreadable"
+
+def wait_until_ready(file_path: str, max_wait: float = READINESS_MAX_WAIT_SECONDS, control: Optional[UploadControl] = None) -> Tuple[bool, Optional[str]]:
+    """
+    True si el log está completo: contenido válido y, si se modificó hace poco, tamaño y mtime estables
+    durante STABILITY_WINDOW_SECONDS. Espera como mucho max_wait (0 = sin esperar). Devuelve (listo, motivo).
+    """
+    deadline = time.monotonic() + max_wait; last_stat: Optional[Tuple[int, float]] = None; stable_since = 0.0; reason: Optional[str] = None
+    while True:
+        try: stat = os.stat(file_path)
+        except OSError: return False, "missing"
+        now = time.monotonic(); signature = (stat.st_size, stat.st_mtime)
+        if signature != last_stat: last_stat = signature; stable_since = now
+        recently_written = time.time() - stat.st_mtime < RECENT_WRITE_SECONDS
+        reason = check_log_complete(file_path)
+        if reason is None and (not recently_written or now - stable_since >= STABILITY_WINDOW_SECONDS): return True, None
+        if reason is None: reason = "writing"
+        # Un zip roto que no se está escribiendo no se va a arreglar esperando
+        if now >= deadline or (reason != "writing" and not recently_written): return False, reason
+        if control and control.wait_cancelled(READINESS_POLL_SECONDS): return False, "cancelled"
+        elif not control: time.sleep(READINESS_POLL_SECONDS)
+
+def pick_ready_logs(candidates: List[str], max_wait: float = READINESS_MAX_WAIT_SECONDS, control: Optional[UploadControl] = None) -> Tuple[List[str], int]:
+    """
+    Filtra logs (en cualquier orden) dejando solo los completos; solo se espera por los escritos hace
+    poco, y el plazo max_wait es compartido. Devuelve (logs listos en el mismo orden, descartados).
+    """
+    deadline = time.monotonic() + max_wait; ready: List[str] = []; skipped = 0
+    for path in candidates:
+        is_ready, reason = wait_until_ready(path, max(0.0, deadline - time.monotonic()), control)
+        if is_ready: ready.append(path)
+        elif reason != "cancelled": skipped += 1; print(f"LogReadiness: Skipping {os.path.basename(path)} ({reason}).")
+    return ready, skipped
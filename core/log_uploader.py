@@ -1,12 +1,105 @@
 import requests
 import os
+import io
 import json
-from typing import List, Dict, Optional, Tuple
+import uuid
+import hashlib
+import zipfile
+import threading
+from dataclasses import dataclass
+from typing import List, Dict, Optional, Tuple, Any, BinaryIO
 import time # Para formatear duración
-from .utils import get_bundled_data_path # Importar función de utils
+from .utils import get_bundled_data_path, get_app_data_subdir # Importar función de utils
+from .log_index import LogIndex
+from .log_archive import LogArchive
+from .log_readiness import READINESS_MAX_WAIT_SECONDS, pick_ready_logs
+from .bandwidth import BandwidthLimiter, parse_bandwidth_profiles
+from .upload_control import UploadControl, UploadCancelled
+from .outage_queue import CircuitBreaker
+from .log_enrichment import LogEnricher
 
 DPS_REPORT_UPLOAD_ENDPOINT = 'https://b.dps.report/uploadContent?json=1&generator=ei'
-DPS_REPORT_GET_JSON_ENDPOINT = 'https://b.dps.report/getJson' 
+DPS_REPORT_HEALTH_ENDPOINT = 'https://b.dps.report/'
+HEALTH_CHECK_TIMEOUT_SECONDS = 10
+
+LOG_ROOTS_SEPARATOR = ";" # Separador de varias carpetas de logs en la UI
+ARCHIVE_RESTORE_DIR_NAME = "archive_restore" # Carpeta de datos de la app donde se extraen los logs archivados a subir
+
+def get_log_roots(config: Dict) -> List[str]:
+    """Carpetas de logs de la config: 'log_folder_paths' si existe, si no 'log_folder_path'."""
+    roots = [root for root in config.get("log_folder_paths") or [] if isinstance(root, str) and root.strip()]
+    if not roots and config.get("log_folder_path"): roots = [config["log_folder_path"]]
+    return [root.strip() for root in roots]
+
+UPLOAD_CANCELLED_MESSAGE = "Upload cancelled."
+CIRCUIT_OPEN_MESSAGE = "dps.report unavailable (too many recent failures, not retrying yet)."
+CANCEL_POLL_SECONDS = 0.1
+READINESS_FALLBACK_CANDIDATES = 3 # Logs (del más reciente hacia atrás) que se prueban antes de rendirse si el último está a medio escribir
+
+@dataclass(slots=True)
+class UploadTiming:
+    """Tiempo de una subida que no es transferencia real: en pausa y esperando al límite de ancho de banda."""
+    paused_seconds: float = 0.0
+    throttled_seconds: float = 0.0
+
+    @property
+    def waited_seconds(self) -> float:
+        return self.paused_seconds + self.throttled_seconds
+
+
+def _timed_check(control: UploadControl, timing: Optional[UploadTiming]):
+    """control.check() anotando en 'timing' lo que haya bloqueado por una pausa."""
+    if timing is None: control.check(); return
+    started = time.monotonic()
+    try: control.check()
+    finally: timing.paused_seconds += time.monotonic() - started
+
+
+class MultipartFileStream:
+    """
+    Cuerpo multipart/form-data con un único fichero, leído por bloques.
+    requests/urllib3 llaman a read() por cada bloque enviado, lo que permite pausar o cancelar a mitad de subida
+    y limitar el ancho de banda (con 'limiter', cada bloque espera su turno en el cubo de tokens compartido).
+    Con 'hasher' (p. ej. hashlib.sha1()), el contenido del fichero se va añadiendo al hash según se envía,
+    y con 'timing' se acumula el tiempo bloqueado en pausa o por el límite.
+    """
+
+    def __init__(self, file_obj: BinaryIO, file_size: int, field_name: str, file_name: str, control: Optional[UploadControl] = None,
+                 limiter: Optional[BandwidthLimiter] = None, hasher: Optional[Any] = None,
+                 timing: Optional[UploadTiming] = None):
+        boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={boundary}"
+        safe_name = file_name.replace('"', '%22').replace('\r', '').replace('\n', '')
+        head = (f'--{boundary}\r\nContent-Disposition: form-data; name="{field_name}"; filename="{safe_name}"\r\n'
+                f'Content-Type: application/octet-stream\r\n\r\n').encode('utf-8')
+        tail = f'\r\n--{boundary}--\r\n'.encode('utf-8')
+        self._parts: List[BinaryIO] = [io.BytesIO(head), file_obj, io.BytesIO(tail)]
+        self._part_index = 0
+        self._length = len(head) + file_size + len(tail)
+        self.control = control
+        self.limiter = limiter
+        self.hasher = hasher
+        self.timing = timing
+        self.bytes_read = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    def read(self, size: int = -1) -> bytes:
+        if self.control: _timed_check(self.control, self.timing)
+        chunks = []; remaining = size
+        while self._part_index < len(self._parts) and (size is None or size < 0 or remaining > 0):
+            data = self._parts[self._part_index].read(-1 if size is None or size < 0 else remaining)
+            if not data: self._part_index += 1; continue
+            if self.hasher is not None and self._part_index == 1: self.hasher.update(data) # Solo el fichero, sin las cabeceras multipart
+            chunks.append(data)
+            if size is not None and size >= 0: remaining -= len(data)
+        data = b''.join(chunks); self.bytes_read += len(data)
+        if self.limiter:
+            started = time.monotonic(); self.limiter.consume(len(data), self.control)
+            if self.timing: self.timing.throttled_seconds += time.monotonic() - started
+        return data
+
 
 class LogUploader:
     """Gestiona la búsqueda y subida de logs de ArcDPS."""
@@ -17,12 +110,39 @@ class LogUploader:
         # Usar get_bundled_data_path para encontrar el archivo de definiciones
         self.defs_path = get_bundled_data_path(defs_path_relative)
         self.boss_definitions = self._load_json(self.defs_path)
-        # Obtener log_folder_path desde la config recibida
-        self.log_folder_path = self.config.get("log_folder_path", "")
+        # Obtener las carpetas de logs desde la config recibida (log_folder_paths, o log_folder_path si no hay lista)
+        self.log_index = LogIndex()
+        self.log_roots: List[str] = get_log_roots(self.config)
+        self.log_folder_path = self.log_roots[0] if self.log_roots else "" # Carpeta principal
+        self.http = requests.Session() # Reutiliza conexiones con dps.report; se cierra en close()
+        self.breaker = CircuitBreaker() # Evita encadenar timeouts de 300 s contra un dps.report caído
+        self.enricher = LogEnricher(self.http, get_app_data_subdir("getjson_cache")) # Datos extra de getJson (streaming + caché)
+        self.bandwidth = BandwidthLimiter() # Límite de subida compartido por todas las subidas en curso
+        self.apply_bandwidth_config()
         print(f"LogUploader: Using definitions path: {self.defs_path}")
-        print(f"LogUploader: Using log folder path: {self.log_folder_path}")
+        print(f"LogUploader: Using log folders: {self.log_roots}")
 
 
+    def set_boss_definitions(self, boss_definitions: Dict):
+        """Sustituye (de forma atómica) las definiciones de bosses ya validadas."""
+        self.boss_definitions = boss_definitions
+
+    def set_log_roots(self, log_roots: List[str]):
+        """Cambia las carpetas de logs sin recargar las definiciones."""
+        self.log_roots = [root for root in log_roots if root]; self.log_folder_path = self.log_roots[0] if self.log_roots else ""
+        self.log_index.invalidate()
+        print(f"LogUploader: Using log folders: {self.log_roots}")
+
+    def apply_bandwidth_config(self):
+        """Aplica upload_limit_kbps (0 = sin límite) y los perfiles horarios upload_limit_profiles de la config."""
+        try: default_kbps = max(0, int(self.config.get("upload_limit_kbps") or 0))
+        except (TypeError, ValueError): print(f"LogUploader: Invalid upload_limit_kbps: {self.config.get('upload_limit_kbps')!r}"); default_kbps = 0
+        self.bandwidth.configure(default_kbps, parse_bandwidth_profiles(self.config.get("upload_limit_profiles")))
+
+    def get_valid_log_roots(self) -> List[str]:
+        """Carpetas de logs configuradas que existen."""
+        return [root for root in self.log_roots if os.path.isdir(root)]
+
     def _load_json(self, file_path: str) -> Dict:
         """Carga un archivo JSON."""
         # (La lógica de _load_json no necesita cambiar, solo se usa para defs ahora)
@@ -44,54 +164,140 @@ class LogUploader:
             return {}
 
 
+    def _get_boss_folder_names(self, boss_key: str, encounter_type: str) -> List[str]:
+        """Nombres de las carpetas de logs (una por idioma del cliente) de un boss."""
+        possible_folders = []; encounter_data = self.boss_definitions.get(encounter_type, {})
+        for wing_key, wing_data in encounter_data.items():
+            if boss_key in wing_data:
+                possible_folders = wing_data[boss_key].get("name", []);
+                if possible_folders: print(f"Definition found for {encounter_type}/{wing_key}/{boss_key}"); break
+        return possible_folders
+
+    def get_boss_folders(self, boss_key: str, encounter_type: str) -> List[str]:
+        """Rutas de las carpetas de logs de un boss en todas las carpetas raíz válidas."""
+        folder_names = self._get_boss_folder_names(boss_key, encounter_type)
+        return [os.path.normpath(os.path.join(root, folder_name)) for root in self.get_valid_log_roots() for folder_name in folder_names]
+
     def find_latest_log(self, boss_key: str, encounter_type: str = "raids") -> Optional[str]:
         """
         Encuentra la ruta del archivo de log más reciente para un boss específico,
         buscando en todas las alas/secciones del tipo de encuentro.
         """
-        # (Lógica interna sin cambios, ya usa self.log_folder_path y self.boss_definitions)
-        if not self.log_folder_path or not os.path.isdir(self.log_folder_path):
-            print(f"Error: Log folder path not configured or invalid: {self.log_folder_path}")
+        if not self.get_valid_log_roots():
+            print(f"Error: Log folder path not configured or invalid: {self.log_roots}")
             return None
-        possible_folders = []; encounter_data = self.boss_definitions.get(encounter_type, {})
-        for wing_key, wing_data in encounter_data.items():
-            if boss_key in wing_data:
-                possible_folders = wing_data[boss_key].get("name", []);
-                if possible_folders: print(f"Definition found for {encounter_type}/{wing_key}/{boss_key}"); break
-        if not possible_folders: print(f"Error: No folder definitions found for {encounter_type}/{boss_key}."); return None
+        boss_folders = self.get_boss_folders(boss_key, encounter_type)
+        if not boss_folders: print(f"Error: No folder definitions found for {encounter_type}/{boss_key}."); return None
         try:
-            all_files = []; found_in_paths = set()
-            for folder_name in possible_folders:
-                boss_folder_path = os.path.normpath(os.path.join(self.log_folder_path, folder_name))
-                if boss_folder_path in found_in_paths: continue
-                if os.path.isdir(boss_folder_path):
-                    print(f"Searching in: {boss_folder_path}"); found_in_paths.add(boss_folder_path)
-                    for root, _, files in os.walk(boss_folder_path):
-                        for file in files:
-                            file_name, file_ext = os.path.splitext(file); file_ext_lower = file_ext.lower()
-                            is_log_file = file_ext_lower in ['.zevtc', '.evtc'] or (file_ext_lower == '.zip' and file_name.lower().endswith('.evtc'))
-                            if is_log_file:
-                                file_path = os.path.join(root, file)
-                                try: modified_date = os.path.getmtime(file_path); all_files.append((file_path, modified_date))
-                                except FileNotFoundError: print(f"Warning: File {file_path} not found during getmtime."); continue
-            if not all_files: print(f"No valid log files found for {boss_key}."); return None
-            all_files.sort(key=lambda x: x[1], reverse=True); latest_log_path = all_files[0][0]
+            latest = self.log_index.latest(boss_folders)
+            if not latest: print(f"No valid log files found for {boss_key}."); return None
+            latest_log_path = latest[1]
             print(f"Latest log found for {boss_key}: {latest_log_path}"); return latest_log_path
         except Exception as e: print(f"Unexpected error finding logs for {boss_key}: {e}"); import traceback; traceback.print_exc(); return None
 
+    def find_latest_ready_log(self, boss_key: str, encounter_type: str = "raids", max_wait: float = READINESS_MAX_WAIT_SECONDS,
+                              control: Optional[UploadControl] = None) -> Tuple[Optional[str], int]:
+        """
+        Como find_latest_log, pero descartando logs que ArcDPS aún está escribiendo o comprimiendo: espera
+        como mucho max_wait por el más reciente y, si no termina, usa el anterior completo.
+        Devuelve (ruta, logs descartados por incompletos).
+        """
+        if not self.get_valid_log_roots(): return self.find_latest_log(boss_key, encounter_type), 0 # Mismo mensaje de error
+        boss_folders = self.get_boss_folders(boss_key, encounter_type)
+        if not boss_folders: print(f"Error: No folder definitions found for {encounter_type}/{boss_key}."); return None, 0
+        candidates = [path for _, path in self.log_index.recent(boss_folders, READINESS_FALLBACK_CANDIDATES)]
+        skipped = 0
+        for position, path in enumerate(candidates):
+            ready, skipped_now = pick_ready_logs([path], max_wait if position == 0 else 0.0, control); skipped += skipped_now
+            if ready: print(f"Latest complete log found for {boss_key}: {path}"); return path, skipped
+            if control and control.is_cancelled: break
+        if candidates: print(f"No complete log files found for {boss_key}.")
+        else: print(f"No valid log files found for {boss_key}.")
+        return None, skipped
+
+    def find_logs_since(self, boss_key: str, encounter_type: str, since: float, until: Optional[float] = None) -> List[str]:
+        """Todos los logs de un boss con mtime en [since, until), del más antiguo al más reciente."""
+        if not self.get_valid_log_roots():
+            print(f"Error: Log folder path not configured or invalid: {self.log_roots}")
+            return []
+        boss_folders = self.get_boss_folders(boss_key, encounter_type)
+        if not boss_folders: print(f"Error: No folder definitions found for {encounter_type}/{boss_key}."); return []
+        found = self.log_index.query_range(boss_folders, since, until); restored = self.restore_archived_logs(boss_key, encounter_type, since, until)
+        logs = [path for _, path in sorted(found + restored)]
+        print(f"Found {len(logs)} logs for {boss_key} since {time.strftime('%Y-%m-%d %H:%M', time.localtime(since))}{f' ({len(restored)} from the archive)' if restored else ''}.")
+        return logs
+
+    def find_archived_logs(self, boss_key: str, encounter_type: str, since: Optional[float] = None, until: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Logs de un boss movidos al archivo (_archive) de cada carpeta raíz, del más reciente al más antiguo."""
+        folder_names = self._get_boss_folder_names(boss_key, encounter_type); results = []
+        for root in self.get_valid_log_roots():
+            archive = LogArchive(root)
+            for folder_name in folder_names: results.extend({"root": root, **entry} for entry in archive.search(folder_name, since, until))
+        results.sort(key=lambda e: e["mtime"], reverse=True)
+        return results
+
+    def restore_archived_logs(self, boss_key: str, encounter_type: str, since: float, until: Optional[float] = None) -> List[Tuple[float, str]]:
+        """
+        Extrae a la carpeta de datos de la app (ARCHIVE_RESTORE_DIR_NAME) los logs archivados de un boss con mtime
+        en [since, until), para que el modo sesión también los suba. Devuelve [(mtime, ruta extraída)].
+        """
+        restore_dir = get_app_data_subdir(ARCHIVE_RESTORE_DIR_NAME); archives: Dict[str, LogArchive] = {}; restored = []
+        for entry in self.find_archived_logs(boss_key, encounter_type, since, until):
+            root = entry["root"]; archive = archives.get(root) or archives.setdefault(root, LogArchive(root))
+            dest_dir = os.path.join(restore_dir, hashlib.sha1(os.path.normcase(root).encode('utf-8')).hexdigest()[:12]) # Una carpeta por raíz: sin choques de nombres
+            path = os.path.join(dest_dir, *entry["arcname"].split("/"))
+            try:
+                if not (os.path.exists(path) and os.path.getsize(path) == entry["size"]): path = archive.extract(entry["arcname"], dest_dir)
+                restored.append((entry["mtime"], path))
+            except (OSError, KeyError, zipfile.BadZipFile) as e: print(f"LogUploader: Could not restore archived log {entry['arcname']}: {e}")
+        return restored
+
+    def discard_restored_log(self, log_path: str):
+        """Borra un log extraído del archivo una vez subido (los de las carpetas de logs no se tocan)."""
+        restore_dir = os.path.normcase(os.path.abspath(get_app_data_subdir(ARCHIVE_RESTORE_DIR_NAME))) + os.sep
+        if not os.path.normcase(os.path.abspath(log_path)).startswith(restore_dir): return
+        try: os.remove(log_path)
+        except OSError as e: print(f"LogUploader: Could not remove restored log {log_path}: {e}")
 
-    def upload_log_to_dps_report(self, file_path: str) -> Tuple[bool, str, Optional[str]]:
+    def refresh_log_index(self):
+        """Fuerza un reescaneo de las carpetas en la próxima búsqueda (p. ej. al empezar un lote)."""
+        self.log_index.invalidate()
+
+    def prefetch_logs(self, selected_bosses: Dict[str, List[str]]) -> Dict[str, float]:
+        """
+        Reescanea en paralelo, por raíz, las carpetas de los bosses seleccionados.
+        Devuelve la latencia de cada raíz en segundos.
+        """
+        folder_names = [name for encounter_type, boss_list in selected_bosses.items() for boss_key in boss_list for name in self._get_boss_folder_names(boss_key, encounter_type)]
+        folders_by_root = {root: [os.path.normpath(os.path.join(root, name)) for name in dict.fromkeys(folder_names)] for root in self.get_valid_log_roots()}
+        latencies = self.log_index.refresh_roots({root: folders for root, folders in folders_by_root.items() if folders})
+        for root, seconds in latencies.items(): print(f"LogUploader: Scanned {root} in {seconds * 1000:.0f} ms")
+        return latencies
+
+
+    def upload_log_to_dps_report(self, file_path: str, upload_name: Optional[str] = None, control: Optional[UploadControl] = None,
+                                 hasher: Optional[Any] = None, timing: Optional[UploadTiming] = None) -> Tuple[bool, str, Optional[str]]:
         """
         Sube un archivo de log a dps.report.
+        upload_name permite enviar un artefacto preparado (p. ej. el .zip de la caché) con el nombre del log original.
+        Con 'control', el cuerpo se envía por bloques comprobando pausa/cancelación, y una cancelación
+        abandona la petición en curso sin esperar a la respuesta.
+        Con 'hasher', el hash del fichero se calcula mientras se envía (solo es completo si la subida termina bien);
+        con 'timing', se anota cuánto estuvo en pausa o frenada por el límite de ancho de banda.
         """
         if not os.path.exists(file_path): return False, f"File not found: {file_path}", None
-        print(f"Uploading {os.path.basename(file_path)} to {DPS_REPORT_UPLOAD_ENDPOINT}...")
+        upload_name = upload_name or os.path.basename(file_path)
+        if not self.breaker.allow(): print(f"Skipping upload of {upload_name}: circuit open."); return False, CIRCUIT_OPEN_MESSAGE, None
+        print(f"Uploading {upload_name} to {DPS_REPORT_UPLOAD_ENDPOINT}...")
         try:
-            with open(file_path, 'rb') as file:
-                files = {'file': (os.path.basename(file_path), file)}; params = {}
-                user_token = self.config.get('dps_report_user_token')
-                if user_token: params['userToken'] = user_token
-                res = requests.post(DPS_REPORT_UPLOAD_ENDPOINT, files=files, params=params, timeout=300)
+            if control: _timed_check(control, timing)
+            params = {}
+            user_token = self.config.get('dps_report_user_token')
+            if user_token: params['userToken'] = user_token
+            res = (self._post_log(file_path, upload_name, params, control, hasher, timing) if control is None
+                   else self._post_log_cancellable(file_path, upload_name, params, control, hasher, timing))
+            if res.status_code >= 500: self.breaker.record_failure()
+            else: self.breaker.record_success() # dps.report responde (aunque sea con un error del log)
 
             if res.status_code == 200:
                 try:
@@ -105,59 +311,54 @@ class LogUploader:
                  try:
                      # Intentar obtener mensaje de error específico del JSON
                      error_data = res.json()
-                     error_msg = error_data.get('error', error_msg)
+                     if error_data.get('error'): error_msg = f"Rate limit exceeded: {error_data['error']}"
                  except ValueError:
                      pass # Mantener mensaje genérico si la respuesta no es JSON
                  return False, error_msg, None
             else: print(f"Upload error: Status code {res.status_code}, Response: {res.text[:200]}"); return False, f"HTTP error {res.status_code} during upload.", None
-        except requests.exceptions.Timeout: print("Error: Timeout during upload."); return False, "Timeout during upload.", None
-        except requests.exceptions.RequestException as e: print(f"Network error during upload: {e}"); return False, f"Network error: {e}", None
-        except Exception as e: print(f"Unexpected error during upload: {e}"); import traceback; traceback.print_exc(); return False, f"Unexpected error: {e}", None
+        except UploadCancelled: print(f"Upload cancelled: {upload_name}"); self.breaker.release_trial(); return False, UPLOAD_CANCELLED_MESSAGE, None
+        except requests.exceptions.Timeout: print("Error: Timeout during upload."); self.breaker.record_failure(); return False, "Timeout during upload.", None
+        except requests.exceptions.RequestException as e: print(f"Network error during upload: {e}"); self.breaker.record_failure(); return False, f"Network error: {e}", None
+        except Exception as e: print(f"Unexpected error during upload: {e}"); self.breaker.release_trial(); import traceback; traceback.print_exc(); return False, f"Unexpected error: {e}", None
+
+    def _post_log(self, file_path: str, upload_name: str, params: Dict, control: Optional[UploadControl] = None, hasher: Optional[Any] = None,
+                  timing: Optional[UploadTiming] = None) -> requests.Response:
+        """POST multipart del log, enviando el fichero por bloques (sin cargarlo entero en memoria)."""
+        with open(file_path, 'rb') as file:
+            body = MultipartFileStream(file, os.fstat(file.fileno()).st_size, 'file', upload_name, control=control, limiter=self.bandwidth, hasher=hasher, timing=timing)
+            return self.http.post(DPS_REPORT_UPLOAD_ENDPOINT, data=body, headers={'Content-Type': body.content_type}, params=params, timeout=300)
+
+    def _post_log_cancellable(self, file_path: str, upload_name: str, params: Dict, control: UploadControl, hasher: Optional[Any] = None,
+                              timing: Optional[UploadTiming] = None) -> requests.Response:
+        """Ejecuta _post_log en un hilo auxiliar para poder abandonar la espera de la respuesta al cancelar."""
+        outcome: Dict[str, Any] = {}; done = threading.Event()
+        def run():
+            try: outcome["response"] = self._post_log(file_path, upload_name, params, control, hasher, timing)
+            except BaseException as e: outcome["error"] = e
+            finally: done.set()
+        threading.Thread(target=run, name="DpsReportUpload", daemon=True).start()
+        while not done.wait(CANCEL_POLL_SECONDS):
+            if control.is_cancelled: raise UploadCancelled() # La respuesta, si llega, se descarta
+        if "error" in outcome: raise outcome["error"]
+        return outcome["response"]
 
     def get_log_duration(self, permalink: str) -> Optional[str]:
         """
-        Obtiene la duración de un log desde dps.report usando el endpoint getJson.
+        Obtiene la duración de un log desde dps.report usando el endpoint getJson
+        (extraída en streaming y cacheada por LogEnricher).
         """
-        # (Lógica interna sin cambios)
-        if not permalink: return None
-        print(f"Fetching duration for: {permalink}")
-        try:
-            params = {'permalink': permalink}; res = requests.get(DPS_REPORT_GET_JSON_ENDPOINT, params=params, timeout=60)
-            if res.status_code == 200:
-                try:
-                    json_data = res.json(); duration_str = json_data.get('duration')
-                    if duration_str:
-                         try: duration_seconds = float(duration_str); minutes = int(duration_seconds // 60); seconds = duration_seconds % 60; formatted_duration = f"{minutes:02d}:{seconds:06.3f}"; print(f"Duration fetched: {formatted_duration}"); return formatted_duration
-                         except ValueError: print(f"Duration fetched (original format): {duration_str}"); return duration_str
-                    else: print("Error: 'duration' not found in getJson response."); return None
-                except ValueError: print(f"Error: Could not decode getJson response. Code: {res.status_code}, Response: {res.text[:200]}"); return None
-            else: print(f"Error fetching JSON: Status code {res.status_code}, Response: {res.text[:200]}"); return None
-        except requests.exceptions.Timeout: print("Error: Timeout fetching duration JSON."); return None
-        except requests.exceptions.RequestException as e: print(f"Network error fetching duration JSON: {e}"); return None
-        except Exception as e: print(f"Unexpected error fetching duration: {e}"); import traceback; traceback.print_exc(); return None
-
-
-# --- Ejemplo de uso (para pruebas) ---
-if __name__ == '__main__':
-    # Cargar config dummy para prueba
-    mock_config = {"log_folder_path": "RUTA/A/TUS/LOGS", "dps_report_user_token": ""} # PON UNA RUTA REAL AQUÍ
-    # Ruta relativa a boss_definitions desde este archivo
-    defs_rel_path = "../data/boss_definitions.json"
-
-    uploader = LogUploader(config=mock_config, defs_path_relative=defs_rel_path)
-
-    if not uploader.log_folder_path or uploader.log_folder_path == "RUTA/A/TUS/LOGS":
-        print("Please set a real 'log_folder_path' in the mock_config in the script for testing.")
-    else:
-        boss_to_find = "Vale Guardian"; encounter_t = "raids"
-        print(f"\n--- Finding log for {boss_to_find} ({encounter_t}) ---")
-        latest_log = uploader.find_latest_log(boss_to_find, encounter_t)
-        if latest_log:
-             print(f"\n--- Uploading log: {latest_log} ---")
-             success, message, link = uploader.upload_log_to_dps_report(latest_log)
-             print(f"\n--- Upload Result ---"); print(f"Success={success}\nMessage='{message}'\nLink={link}")
-             if success and link:
-                  print(f"\n--- Fetching duration for {link} ---")
-                  duration = uploader.get_log_duration(link)
-                  print(f"\n--- Duration Result ---"); print(f"Duration: {duration if duration else 'Not available'}")
-        else: print(f"\nCould not find log for {boss_to_find} to test upload.")
\ No newline at end of file
+        summary = self.enricher.get(permalink)
+        return summary.get("duration") if summary else None
+
+    def check_available(self) -> bool:
+        """Sonda ligera de salud: True si dps.report responde sin error de servidor."""
+        try: res = self.http.head(DPS_REPORT_HEALTH_ENDPOINT, timeout=HEALTH_CHECK_TIMEOUT_SECONDS, allow_redirects=True)
+        except requests.exceptions.RequestException: return False
+        if res.status_code < 500: self.breaker.record_success(); return True
+        return False
+
+    def close(self):
+        """Cierra el pool de conexiones HTTP."""
+        self.enricher.shutdown()
+        try: self.http.close()
+        except Exception as e: print(f"LogUploader: Error closing HTTP session: {e}")
@@ -0,0 +1,96 @@
+from dataclasses import dataclass, field, fields
+from typing import Any, Dict, List, Optional
+
+# Contrato común de los lotes de subida: lo usan el planificador, el embed de Discord, el historial
+# y la API local. Son dataclasses con __slots__ (sin __dict__ por instancia) y se serializan a
+# dicts planos con to_dict()/from_dict() para JSON.
+
+@dataclass(slots=True)
+class UploadJob:
+    """Un log a subir dentro de un lote (log_path None = no se encontró log para el boss)."""
+    index: int
+    encounter_type: str
+    boss_name: str
+    wing_key: str = "Unknown"
+    log_path: Optional[str] = None
+    attempt: Optional[int] = None # Número de intento (modo sesión)
+    attempts: int = 1 # Intentos del mismo boss en el lote
+
+    @property
+    def display_name(self) -> str:
+        return self.boss_name if self.attempts == 1 else f"{self.boss_name} #{self.attempt}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in _JOB_FIELDS}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "UploadJob":
+        return cls(**{name: data[name] for name in _JOB_FIELDS if name in data})
+
+
+@dataclass(slots=True)
+class UploadResult:
+    """Resultado de un boss (o de un intento en modo sesión)."""
+    boss_name: str
+    encounter_type: str = ""
+    wing_key: str = "Unknown"
+    success: bool = False
+    link: str = ""
+    duration: Optional[str] = None
+    message: str = ""
+    attempt: Optional[int] = None
+    is_cm: bool = False
+    file_name: str = ""
+    file_hash: str = ""
+    players: List[Dict[str, Any]] = field(default_factory=list) # De getJson, por DPS: name, account, profession, group, dps
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in _RESULT_FIELDS}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "UploadResult":
+        return cls(**{name: data[name] for name in _RESULT_FIELDS if name in data})
+
+
+@dataclass(slots=True)
+class UploadBatch:
+    """
+    Resultados de un lote: los correctos agrupados por tipo de encuentro y ala/escala (en el orden
+    en que se completaron, que es el que muestra el embed) y los fallos en una lista aparte.
+    """
+    title: str = ""
+    show_duration: bool = False
+    since: Optional[float] = None
+    batch_id: Optional[int] = None # Id en el historial
+    created_at: Optional[float] = None
+    results: Dict[str, Dict[str, List[UploadResult]]] = field(default_factory=dict)
+    failures: List[UploadResult] = field(default_factory=list)
+    incomplete_skipped: int = 0 # Logs a medio escribir que no se subieron (subidas fallidas evitadas)
+
+    def add(self, result: UploadResult):
+        if result.success: self.results.setdefault(result.encounter_type, {}).setdefault(result.wing_key, []).append(result)
+        else: self.failures.append(result)
+
+    @property
+    def successes(self) -> List[UploadResult]:
+        return [result for wings in self.results.values() for wing_results in wings.values() for result in wing_results]
+
+    @property
+    def has_successes(self) -> bool:
+        return any(wing_results for wings in self.results.values() for wing_results in wings.values())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"title": self.title, "show_duration": self.show_duration, "since": self.since, "batch_id": self.batch_id, "created_at": self.created_at,
+                "results": [result.to_dict() for result in self.successes], "failures": [result.to_dict() for result in self.failures],
+                "incomplete_skipped": self.incomplete_skipped}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "UploadBatch":
+        batch = cls(title=data.get("title") or "", show_duration=bool(data.get("show_duration")), since=data.get("since"),
+                    batch_id=data.get("batch_id"), created_at=data.get("created_at"), incomplete_skipped=int(data.get("incomplete_skipped") or 0))
+        for result in data.get("results", []) + data.get("failures", []): batch.add(UploadResult.from_dict(result))
+        return batch
+
+
+_JOB_FIELDS = tuple(f.name for f in fields(UploadJob))
+_RESULT_FIELDS = tuple(f.name for f in fields(UploadResult))
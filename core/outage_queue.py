@@ -0,0 +1,169 @@
+import os
+import json
+import time
+import threading
+from typing import Callable, Dict, List, Optional, Any, Tuple
+
+from .utils import atomic_write_json
+
+PROBE_BASE_INTERVAL_SECONDS = 5.0
+PROBE_MAX_INTERVAL_SECONDS = 300.0
+BREAKER_FAILURE_THRESHOLD = 3 # Fallos transitorios seguidos antes de abrir el circuito
+BREAKER_RESET_SECONDS = 60.0 # Tiempo en abierto antes de dejar pasar una petición de prueba
+
+# Mensajes de LogUploader que indican un problema pasajero del servicio (no del log)
+TRANSIENT_FAILURE_PREFIXES = ("Timeout during upload", "Network error:", "HTTP error 5", "Rate limit exceeded", "dps.report unavailable")
+
+def is_transient_failure(message: Optional[str]) -> bool:
+    """True si el fallo de subida merece reintentarse más tarde."""
+    return bool(message) and message.startswith(TRANSIENT_FAILURE_PREFIXES)
+
+
+class CircuitBreaker:
+    """
+    Tras varios fallos seguidos deja de intentar (abierto) durante un tiempo; pasado ese
+    tiempo deja pasar una única petición de prueba (semiabierto) que lo cierra o lo reabre.
+    """
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURE_THRESHOLD, reset_seconds: float = BREAKER_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """True si se puede intentar una petición ahora."""
+        with self._lock:
+            if self._opened_at is None: return True
+            if self._trial_in_flight or time.monotonic() - self._opened_at < self.reset_seconds: return False
+            self._trial_in_flight = True; return True
+
+    def record_success(self):
+        with self._lock: self._failures = 0; self._opened_at = None; self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1; self._trial_in_flight = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold: self._opened_at = time.monotonic()
+
+    def release_trial(self):
+        """La petición permitida terminó sin veredicto (p. ej. cancelada por el usuario)."""
+        with self._lock: self._trial_in_flight = False
+
+    @property
+    def is_open(self) -> bool:
+        with self._lock: return self._opened_at is not None
+
+
+class HealthProbe:
+    """
+    Comprueba en segundo plano los servicios marcados como caídos, con espera exponencial
+    entre intentos. Cuando ya no queda ninguno caído llama a on_recovered().
+    """
+
+    def __init__(self, probes: Dict[str, Callable[[], bool]], on_recovered: Callable[[], None],
+                 base_interval: float = PROBE_BASE_INTERVAL_SECONDS, max_interval: float = PROBE_MAX_INTERVAL_SECONDS):
+        self.probes = probes
+        self.on_recovered = on_recovered
+        self.base_interval = base_interval
+        self.max_interval = max_interval
+        self._down: Dict[str, Tuple[float, float]] = {} # servicio -> (próximo intento, intervalo actual)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self, service: str):
+        """Marca un servicio como caído y empieza a vigilarlo."""
+        with self._lock:
+            if service not in self._down: self._down[service] = (time.monotonic() + self.base_interval, self.base_interval)
+            if not self._thread or not self._thread.is_alive():
+                self._stop_event.clear()
+                self._thread = threading.Thread(target=self._run, name="HealthProbeThread", daemon=True); self._thread.start()
+        self._wakeup.set()
+
+    def is_down(self, service: str) -> bool:
+        with self._lock: return service in self._down
+
+    def down_services(self) -> List[str]:
+        with self._lock: return list(self._down)
+
+    def stop(self):
+        self._stop_event.set(); self._wakeup.set()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            with self._lock:
+                if not self._down: self._thread = None; return
+                next_due = min(due for due, _ in self._down.values())
+            self._wakeup.wait(timeout=max(0.0, next_due - time.monotonic())); self._wakeup.clear()
+            if self._stop_event.is_set(): return
+            with self._lock: due_services = [(name, interval) for name, (due, interval) in self._down.items() if due <= time.monotonic()]
+            recovered_any = False
+            for service, interval in due_services:
+                try: healthy = bool(self.probes[service]())
+                except Exception as e: print(f"HealthProbe: Probe for {service} failed: {e}"); healthy = False
+                with self._lock:
+                    if service not in self._down: continue
+                    if healthy: del self._down[service]; recovered_any = True; print(f"HealthProbe: {service} is reachable again.")
+                    else:
+                        interval = min(interval * 2, self.max_interval); self._down[service] = (time.monotonic() + interval, interval)
+                        print(f"HealthProbe: {service} still unreachable, next check in {int(interval)} s.")
+            with self._lock: all_up = not self._down
+            if recovered_any and all_up:
+                try: self.on_recovered()
+                except Exception as e: print(f"HealthProbe: Error in recovery callback: {e}")
+
+
+class OutageQueue:
+    """
+    Cola persistente (JSON en AppData) de trabajo aplazado:
+    - "upload": logs de un lote que no se pudieron subir (fallo transitorio o cierre de la app).
+    - "publish": lotes ya subidos (guardados en el historial) cuyo embed no llegó a Discord.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: List[Dict[str, Any]] = self._load()
+
+    def _load(self) -> List[Dict[str, Any]]:
+        if not os.path.exists(self.path): return []
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f: entries = json.load(f).get("batches", [])
+            if not isinstance(entries, list): return []
+            for entry in entries: entry.setdefault("kind", "upload") # Ficheros de puntos de control anteriores
+            return entries
+        except (json.JSONDecodeError, IOError, AttributeError) as e: print(f"OutageQueue: Ignoring unreadable queue file: {e}"); return []
+
+    def _save_locked(self):
+        try:
+            if self._entries: atomic_write_json(self.path, {"saved_at": time.time(), "batches": self._entries})
+            elif os.path.exists(self.path): os.remove(self.path)
+        except (IOError, OSError, TypeError) as e: print(f"OutageQueue: Could not save queue file: {e}")
+
+    def park_uploads(self, jobs: List[Tuple[str, str, str]], upload_title: str, show_duration: bool, since: Optional[float], reason: str):
+        """Aparca los logs (tipo, boss, ruta) de un lote para subirlos más tarde."""
+        if not jobs: return
+        entry = {"kind": "upload", "reason": reason, "queued_at": time.time(), "title": upload_title, "show_duration": show_duration, "since": since,
+                 "jobs": [{"encounter_type": etype, "boss_name": boss, "log_path": path} for etype, boss, path in jobs]}
+        with self._lock: self._entries.append(entry); self._save_locked()
+
+    def park_publish(self, batch_id: int, upload_title: str):
+        """Aparca la publicación en Discord de un lote del historial."""
+        with self._lock:
+            if any(e.get("kind") == "publish" and e.get("batch_id") == batch_id for e in self._entries): return
+            self._entries.append({"kind": "publish", "reason": "discord", "queued_at": time.time(), "title": upload_title, "batch_id": batch_id}); self._save_locked()
+
+    def take_all(self) -> List[Dict[str, Any]]:
+        """Saca (y borra del disco) todo lo aparcado."""
+        with self._lock: entries = self._entries; self._entries = []; self._save_locked()
+        return entries
+
+    def job_count(self) -> int:
+        with self._lock: return sum(len(e.get("jobs", [])) if e.get("kind") == "upload" else 1 for e in self._entries)
+
+    def __len__(self) -> int:
+        with self._lock: return len(self._entries)
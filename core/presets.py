@@ -0,0 +1,20 @@
+from typing import Dict, List
+
+# Presets de subida: clave -> (tipo de encuentro, filtro de secciones). Las secciones son las alas,
+# escalas o grupos de boss_definitions.json; None = todas.
+PRESETS: Dict[str, tuple] = {
+    "raid_fc_all": ("raids", ("W1", "W2", "W3", "W4", "W5", "W6", "W7", "W8")),
+    "raid_fc_7": ("raids", ("W1", "W2", "W3", "W4", "W5", "W6", "W7")),
+    "fractal_cms": ("fractals", lambda section: section.endswith("CM")),
+    "strikes": ("strikes", None),
+}
+
+def build_preset_selection(boss_definitions: Dict, preset_key: str) -> Dict[str, List[str]]:
+    """Selección {tipo: [bosses]} de un preset según las definiciones actuales ({} si el preset no existe)."""
+    if preset_key not in PRESETS: return {}
+    encounter_type, section_filter = PRESETS[preset_key]
+    sections = boss_definitions.get(encounter_type, {})
+    if section_filter is None: chosen = list(sections)
+    elif callable(section_filter): chosen = [section for section in sections if section_filter(section)]
+    else: chosen = [section for section in section_filter if section in sections] # En el orden del preset
+    return {encounter_type: [boss for section in chosen for boss in sections[section].keys()]}
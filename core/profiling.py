@@ -0,0 +1,126 @@
+import os
+import io
+import time
+import pstats
+import cProfile
+import datetime
+import threading
+import contextlib
+import tracemalloc
+from typing import Callable, List, Optional
+
+from .utils import get_app_data_subdir
+
+PROFILES_SUBDIR = "profiles"
+FOCUS_MODULES = ("log_uploader.py", "state_manager.py", "discord_bot.py") # Módulos que se resumen
+SUMMARY_TOP_FUNCTIONS = 25
+SUMMARY_TOP_ALLOCATIONS = 25
+TRACEMALLOC_FRAMES = 5
+
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0 # tracemalloc es global: se para solo cuando termina la última sesión que lo arrancó
+
+def _start_tracemalloc() -> bool:
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and tracemalloc.is_tracing(): return False # Lo arrancó otro (p. ej. -X tracemalloc)
+        if _tracemalloc_users == 0: tracemalloc.start(TRACEMALLOC_FRAMES)
+        _tracemalloc_users += 1; return True
+
+def _stop_tracemalloc():
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0: tracemalloc.stop()
+
+
+class ProfilingSession:
+    """
+    Perfila un bloque con cProfile (hilo actual) y tracemalloc (todo el proceso) y, al salir,
+    escribe en AppData/profiles:
+    - <etiqueta>_<fecha>.prof: estadísticas de cProfile (abrir con pstats/snakeviz).
+    - <etiqueta>_<fecha>_summary.txt: funciones más costosas y puntos con más memoria
+      asignada en LogUploader, StateManager y DiscordBot, más el top global.
+    cProfile solo ve el hilo que entra en el bloque; los hilos auxiliares (p. ej. el POST
+    cancelable) aparecen como tiempo de espera del hilo perfilado. Para trabajo repartido entre
+    hilos se usa start(), section() en cada tramo (sin solaparse) y stop().
+    """
+
+    def __init__(self, label: str, output_dir: Optional[str] = None, on_complete: Optional[Callable[[str], None]] = None):
+        self.label = label
+        self.output_dir = output_dir
+        self.on_complete = on_complete
+        self.summary_path: Optional[str] = None
+        self._profiler = cProfile.Profile()
+        self._owns_tracemalloc = False
+        self._snapshot_before: Optional[tracemalloc.Snapshot] = None
+        self._started_at = 0.0
+
+    def start(self) -> "ProfilingSession":
+        """Empieza a medir memoria y tiempo total, sin perfilar todavía ningún hilo."""
+        self._owns_tracemalloc = _start_tracemalloc()
+        self._snapshot_before = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+        self._started_at = time.perf_counter()
+        return self
+
+    @contextlib.contextmanager
+    def section(self):
+        """Perfila con cProfile el hilo actual durante el bloque. Las secciones no deben solaparse."""
+        self._profiler.enable()
+        try: yield self
+        finally: self._profiler.disable()
+
+    def stop(self):
+        """Termina la sesión y escribe los ficheros (nada si no llegó a empezar)."""
+        if not self._started_at: return
+        elapsed = time.perf_counter() - self._started_at
+        snapshot_after = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+        if self._owns_tracemalloc: _stop_tracemalloc(); self._owns_tracemalloc = False
+        try: self._write_dumps(elapsed, snapshot_after)
+        except Exception as e: print(f"Profiling: Could not write profile dumps: {e}")
+
+    def __enter__(self) -> "ProfilingSession":
+        self.start(); self._profiler.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self._profiler.disable(); self.stop()
+        return False
+
+    def _write_dumps(self, elapsed: float, snapshot_after: Optional[tracemalloc.Snapshot]):
+        output_dir = self.output_dir or get_app_data_subdir(PROFILES_SUBDIR)
+        os.makedirs(output_dir, exist_ok=True)
+        base = os.path.join(output_dir, f"{self.label}_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        self._profiler.dump_stats(base + ".prof")
+        lines = [f"Profile '{self.label}' ({elapsed:.2f} s)", ""]
+        lines += self._function_summary()
+        if self._snapshot_before is not None and snapshot_after is not None: lines += [""] + self._allocation_summary(self._snapshot_before, snapshot_after)
+        self.summary_path = base + "_summary.txt"
+        with open(self.summary_path, 'w', encoding='utf-8') as f: f.write("\n".join(lines) + "\n")
+        print(f"Profiling: Wrote {base}.prof and {self.summary_path}")
+        if self.on_complete: self.on_complete(self.summary_path)
+
+    def _function_summary(self) -> List[str]:
+        stats = pstats.Stats(self._profiler)
+        focus = [(key, value) for key, value in stats.stats.items() if os.path.basename(key[0]) in FOCUS_MODULES]
+        focus.sort(key=lambda item: item[1][3], reverse=True) # Por tiempo acumulado
+        lines = ["== Top functions in LogUploader / StateManager / DiscordBot (cumulative) ==", f"{'calls':>8} {'tottime':>9} {'cumtime':>9}  function"]
+        for (file_name, line_no, func_name), (_, ncalls, tottime, cumtime, _) in focus[:SUMMARY_TOP_FUNCTIONS]:
+            lines.append(f"{ncalls:>8} {tottime:>9.3f} {cumtime:>9.3f}  {os.path.basename(file_name)}:{line_no}({func_name})")
+        overall = io.StringIO(); pstats.Stats(self._profiler, stream=overall).sort_stats("cumulative").print_stats(SUMMARY_TOP_FUNCTIONS)
+        return lines + ["", "== Top functions overall (cumulative) ==", overall.getvalue().rstrip()]
+
+    @staticmethod
+    def _allocation_summary(before: tracemalloc.Snapshot, after: tracemalloc.Snapshot) -> List[str]:
+        focus_filters = [tracemalloc.Filter(True, f"*{module}") for module in FOCUS_MODULES]
+        lines = ["== Allocation growth in LogUploader / StateManager / DiscordBot =="]
+        for stat in after.filter_traces(focus_filters).compare_to(before.filter_traces(focus_filters), "lineno")[:SUMMARY_TOP_ALLOCATIONS]: lines.append(str(stat))
+        lines += ["", "== Allocation growth overall =="]
+        for stat in after.compare_to(before, "lineno")[:SUMMARY_TOP_ALLOCATIONS]: lines.append(str(stat))
+        return lines
+
+
+def profiling_session(label: str, enabled: bool, on_complete: Optional[Callable[[str], None]] = None):
+    """Contexto de perfilado; con enabled=False es un nullcontext y no añade ningún coste."""
+    if not enabled: return contextlib.nullcontext()
+    return ProfilingSession(label, on_complete=on_complete)
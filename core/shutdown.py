@@ -0,0 +1,48 @@
+import time
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+DEFAULT_SHUTDOWN_DEADLINE_SECONDS = 8.0
+
+class ShutdownCoordinator:
+    """
+    Ejecuta las tareas de cierre por fases con un único plazo global.
+    Las tareas de una misma fase corren en paralelo; las fases van en orden.
+    Lo que no termine antes del plazo se abandona (hilos daemon) y se informa.
+    """
+
+    def __init__(self, deadline_seconds: float = DEFAULT_SHUTDOWN_DEADLINE_SECONDS):
+        self.deadline_seconds = deadline_seconds
+        self._phases: List[List[Tuple[str, Callable[[float], None]]]] = []
+
+    def add_phase(self, steps: List[Tuple[str, Callable[[float], None]]]):
+        """Añade una fase. Cada paso recibe los segundos que le quedan hasta el plazo."""
+        self._phases.append(steps)
+
+    def run(self) -> Dict[str, str]:
+        """Ejecuta todas las fases respetando el plazo. Devuelve {paso: "ok" | "timeout" | "error: ..."}."""
+        deadline = time.monotonic() + self.deadline_seconds; statuses: Dict[str, str] = {}
+        for steps in self._phases:
+            threads = []
+            for name, step in steps:
+                statuses[name] = "timeout"
+                def run_step(name=name, step=step):
+                    try: step(max(0.0, deadline - time.monotonic())); statuses[name] = "ok"
+                    except Exception as e: statuses[name] = f"error: {e}"; print(f"Shutdown: Step '{name}' failed: {e}")
+                thread = threading.Thread(target=run_step, name=f"Shutdown-{name}", daemon=True); thread.start(); threads.append(thread)
+            for thread in threads: thread.join(timeout=max(0.0, deadline - time.monotonic()))
+            if time.monotonic() >= deadline: break
+        pending = [name for name, status in statuses.items() if status == "timeout"]
+        if pending: print(f"Shutdown: Deadline reached, abandoning: {', '.join(pending)}")
+        return statuses
+
+    def run_in_background(self, on_done: Optional[Callable[[Dict[str, str]], None]] = None) -> threading.Thread:
+        """
+        Ejecuta run() en un hilo no daemon: la ventana puede cerrarse ya y el proceso
+        sigue vivo solo hasta que termine la limpieza (o venza el plazo).
+        """
+        def run_all():
+            statuses = self.run()
+            if on_done: on_done(statuses)
+        thread = threading.Thread(target=run_all, name="ShutdownCoordinator", daemon=False); thread.start()
+        return thread
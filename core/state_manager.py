@@ -1,22 +1,70 @@
 import os
+import hashlib
 import json
 import threading
 import datetime
+import time
 import asyncio
-from typing import Optional, Dict, List, Any, Callable, Tuple
+import contextlib
+from collections import OrderedDict
+from typing import Optional, Dict, List, Any, Callable, Tuple, Set
 
 # Importar clases necesarias con importación absoluta
 from core.log_uploader import LogUploader # Cambiado
-# from .models import LogUploadEntry # Ya no se usa
 from core.discord_bot import DiscordBot # Cambiado
 from core.localization import LocalizationManager # Cambiado
-from core.utils import get_config_file_path # Cambiado
+from core.log_prep import LogPreparer
+from core.history_store import HistoryStore
+from core.data_reloader import DataReloader
+from core.upload_control import UploadControl
+from core.log_uploader import UPLOAD_CANCELLED_MESSAGE, LOG_ROOTS_SEPARATOR, UploadTiming, get_log_roots
+from core.shutdown import ShutdownCoordinator
+from core.outage_queue import OutageQueue, HealthProbe, is_transient_failure
+from core.profiling import ProfilingSession
+from core.log_readiness import pick_ready_logs
+from core.channel_routing import parse_channel_routes, route_batch, route_channel_ids
+from core.batch_planner import BatchPlanner, BatchPlan, UploadTimeEstimator
+from core.upload_scheduler import UploadScheduler, ScheduledBatch
+from core.models import UploadBatch, UploadJob, UploadResult
+from core.presets import PRESETS, build_preset_selection
+from core.control_api import ControlApiServer, DEFAULT_CONTROL_API_PORT, generate_token
+from core.log_archive import LogArchiver, DEFAULT_ARCHIVE_MAX_AGE_DAYS
+from core.utils import get_config_file_path, get_app_data_path, get_app_data_subdir, atomic_write_json # Cambiado
 
 # Importar UI para type hinting (usando string para evitar importación circular real)
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from ui.app import App # Cambiado
 
+IDLE_PREP_INTERVAL_SECONDS = 120 # Cada cuánto se preparan (hash/compresión) los logs más recientes
+CONFIG_WRITE_DEBOUNCE_SECONDS = 0.5 # Guardados seguidos se agrupan en una sola escritura
+FINISHED_BATCHES_KEPT = 20 # Lotes terminados que se pueden seguir consultando por la API
+SHUTDOWN_DEADLINE_SECONDS = 8.0 # Plazo total del cierre; lo que no termine se abandona
+UPLOAD_DRAIN_SECONDS = 2.0 # Margen para que una subida casi terminada acabe antes de cancelar y guardar el resto
+DISCORD_PUBLISH_TIMEOUT_SECONDS = 15 # Plazo para publicar el resultado de un lote (todas las rutas a la vez)
+PENDING_UPLOADS_FILE = "pending_uploads.json" # Cola de trabajo aplazado (caídas de servicio y cierres a medias)
+
+# Subsistemas a recargar cuando cambia cada clave de configuración.
+# Las claves que no aparecen aquí provocan una recarga completa.
+CONFIG_RELOAD_ACTIONS: Dict[str, Tuple[str, ...]] = {
+    "language": ("language",),
+    "dps_report_user_token": (), # LogUploader lee el token de self.config en cada subida
+    "profiling_enabled": (), # Se consulta al empezar cada lote
+    "log_folder_path": ("log_folder",),
+    "log_folder_paths": ("log_folder",),
+    "discord_token": ("discord",),
+    "target_channel_id": ("discord",),
+    "archive_enabled": ("archive",),
+    "archive_max_age_days": ("archive",),
+    "control_api_enabled": ("control_api",),
+    "control_api_port": ("control_api",),
+    "control_api_token": ("control_api",),
+    "upload_limit_kbps": ("bandwidth",),
+    "upload_limit_profiles": ("bandwidth",),
+    "channel_routes": ("channel_routes",), # Se leen al publicar cada lote; solo hay que resolver los canales nuevos
+}
+ALL_RELOAD_ACTIONS = ("language", "log_folder", "discord", "archive", "control_api", "bandwidth", "channel_routes")
+
 class StateManager:
     """Gestiona el estado y la comunicación entre la UI y el core."""
 
@@ -25,20 +73,50 @@ class StateManager:
         "discord_token": "",
         "target_channel_id": "",
         "log_folder_path": "",
-        "dps_report_user_token": ""
+        "log_folder_paths": [], # Varias carpetas de logs (p. ej. otras cuentas o un NAS); la primera es log_folder_path
+        "dps_report_user_token": "",
+        "profiling_enabled": False, # Perfilar cada lote de subida (cProfile + tracemalloc) en AppData/profiles
+        "archive_enabled": False, # Mover los logs antiguos a <carpeta de logs>/_archive/YYYY-MM.zip
+        "archive_max_age_days": DEFAULT_ARCHIVE_MAX_AGE_DAYS,
+        "control_api_enabled": False, # API HTTP local (solo 127.0.0.1) para lanzar subidas desde otras herramientas
+        "control_api_port": DEFAULT_CONTROL_API_PORT,
+        "control_api_token": "", # Se genera al activar la API; se envía en la cabecera X-Zenlog-Token
+        "upload_limit_kbps": 0, # Límite de subida en kbit/s para no saturar la conexión mientras se juega (0 = sin límite)
+        "upload_limit_profiles": [], # Límites por franja horaria: [{"from": "18:00", "to": "23:30", "kbps": 512}]
+        "channel_routes": {} # Canal por tipo de encuentro o ala: {"raids": "<id>", "fractals/98CM": "<id>"}; el resto va a target_channel_id
     }
 
-    def __init__(self):
+    def __init__(self, profiling: bool = False):
+        self.profiling_forced = profiling # --profile en la línea de comandos
         self.config_path = get_config_file_path()
         self.config = self._load_or_create_config()
+        self._config_write_lock = threading.Lock(); self._config_write_timer: Optional[threading.Timer] = None; self._config_dirty = False
         self.log_uploader = LogUploader(config=self.config)
-        self.loc_manager = LocalizationManager(default_lang=self.config.get("language", "en"))
+        self.loc_manager = LocalizationManager() # El fallback por clave es siempre inglés; el idioma configurado solo se activa
+        self.loc_manager.load_language(self.config.get("language", "en"))
         self.ui_app: 'Optional[App]' = None # Usar string para type hint
         self.ui_logger: Callable[[str], None] = print
         self.discord_bot: Optional[DiscordBot] = None
         self.discord_bot_thread: Optional[threading.Thread] = None
         self._bot_start_lock = threading.Lock()
         self._boss_wing_map: Dict[str, Dict[str, str]] = self._build_boss_wing_map()
+        self.log_preparer = LogPreparer(cache_dir=get_app_data_subdir("prepared_logs"))
+        self._active_uploads = 0; self._active_uploads_lock = threading.Lock(); self._uploads_idle = threading.Condition(self._active_uploads_lock)
+        self._upload_controls: Set[UploadControl] = set() # Controles de todos los lotes en curso (para el cierre)
+        self._shutting_down = threading.Event()
+        self.outage_queue = OutageQueue(os.path.join(get_app_data_path(), PENDING_UPLOADS_FILE))
+        self.log_archiver = LogArchiver(self.log_uploader.get_valid_log_roots, on_archived=self._on_logs_archived)
+        self.health_probe = HealthProbe({"dps_report": self.log_uploader.check_available, "discord": self._discord_ready}, on_recovered=self._on_services_recovered)
+        self.control_api: Optional[ControlApiServer] = None
+        self._finished_batches: 'OrderedDict[int, Dict[str, Any]]' = OrderedDict(); self._finished_batches_lock = threading.Lock() # Últimos lotes terminados (para la API)
+        self.upload_scheduler = UploadScheduler(on_batch_progress=self._on_batch_progress, on_batch_removed=self._on_batch_removed) # Pool compartido por todos los lotes
+        self.upload_estimator = UploadTimeEstimator() # Aprende de las subidas reales para estimar la duración de los lotes
+        self.batch_planner = BatchPlanner(self.log_uploader, self.upload_estimator, workers=lambda: self.upload_scheduler.max_workers)
+        self._idle_prep_stop = threading.Event(); self._idle_prep_wakeup = threading.Event()
+        self._idle_prep_thread: Optional[threading.Thread] = None
+        self.history_store = HistoryStore(os.path.join(get_app_data_path(), "history.sqlite3"))
+        self.data_reloader = DataReloader(defs_path=self.log_uploader.defs_path, lang_dir=self.loc_manager.lang_dir,
+                                          on_definitions_changed=self._on_definitions_reloaded, on_language_changed=self._on_language_reloaded)
 
     def _load_or_create_config(self) -> Dict:
         """Carga config.json desde AppData o lo crea con valores por defecto."""
@@ -60,8 +138,7 @@ class StateManager:
     def _create_default_config(self) -> Dict:
         """Crea y guarda un archivo de configuración por defecto en AppData."""
         try:
-            os.makedirs(os.path.dirname(self.config_path), exist_ok=True)
-            with open(self.config_path, 'w', encoding='utf-8') as f: json.dump(self.DEFAULT_CONFIG, f, indent=2)
+            atomic_write_json(self.config_path, self.DEFAULT_CONFIG)
             print(f"Default config created at: {self.config_path}")
             return self.DEFAULT_CONFIG.copy()
         except IOError as e:
@@ -69,19 +146,40 @@ class StateManager:
             return self.DEFAULT_CONFIG.copy()
 
     def save_configuration(self, new_config_data: Dict):
-        """Guarda el diccionario de configuración en el archivo JSON de AppData."""
+        """
+        Aplica la nueva configuración, recarga solo los subsistemas afectados y
+        programa la escritura (atómica y agrupada) del archivo JSON de AppData.
+        """
         try:
+            changed_keys = {key for key, value in new_config_data.items() if self.config.get(key) != value}
             self.config.update(new_config_data)
-            with open(self.config_path, 'w', encoding='utf-8') as f: json.dump(self.config, f, indent=2)
+            self._schedule_config_write()
             self.log_to_ui(self.get_localized_string("config_status_saved"))
-            print(f"Configuration saved to: {self.config_path}")
-            self.config_updated()
+            if changed_keys: self.config_updated(changed_keys)
+            else: print("StateManager: Configuration unchanged, nothing to reload.")
             return True
-        except IOError as e:
-            error_msg = self.get_localized_string("config_status_error_save", error=e); self.log_to_ui(f"{self.get_localized_string('general_error')}: {error_msg}"); print(f"Error saving config: {e}"); return False
         except Exception as e:
             error_msg = self.get_localized_string("config_status_error_unexpected", error=e); self.log_to_ui(f"{self.get_localized_string('general_error')}: {error_msg}"); print(f"Unexpected error saving config: {e}"); return False
 
+    def _schedule_config_write(self):
+        """Reprograma la escritura del config para agrupar guardados consecutivos."""
+        with self._config_write_lock:
+            self._config_dirty = True
+            if self._config_write_timer: self._config_write_timer.cancel()
+            self._config_write_timer = threading.Timer(CONFIG_WRITE_DEBOUNCE_SECONDS, self.flush_config)
+            self._config_write_timer.daemon = True; self._config_write_timer.start()
+
+    def flush_config(self) -> bool:
+        """Escribe ya el config pendiente (de forma atómica)."""
+        with self._config_write_lock:
+            if self._config_write_timer: self._config_write_timer.cancel(); self._config_write_timer = None
+            if not self._config_dirty: return True
+            try:
+                atomic_write_json(self.config_path, dict(self.config)); self._config_dirty = False
+                print(f"Configuration saved to: {self.config_path}"); return True
+            except (IOError, OSError, TypeError) as e:
+                error_msg = self.get_localized_string("config_status_error_save", error=e); self.log_to_ui(f"{self.get_localized_string('general_error')}: {error_msg}"); print(f"Error saving config: {e}"); return False
+
     def _build_boss_wing_map(self) -> Dict[str, Dict[str, str]]:
         """Crea un mapa {encounter_type: {boss_name: wing_key}} para búsqueda rápida."""
         mapping = {};
@@ -91,6 +189,17 @@ class StateManager:
                 for boss_name in bosses.keys(): mapping[etype][boss_name] = wing_key
         return mapping
 
+    def _on_definitions_reloaded(self, boss_definitions: Dict):
+        """Aplica en caliente unas definiciones de bosses nuevas (ya validadas)."""
+        self.log_uploader.set_boss_definitions(boss_definitions); self._boss_wing_map = self._build_boss_wing_map()
+        if self.ui_app and hasattr(self.ui_app, 'selection_frame'): self.ui_app.after(0, self.ui_app.selection_frame.set_boss_definitions, boss_definitions)
+        self.log_to_ui(self.get_localized_string("log_definitions_reloaded", default="Boss definitions reloaded."))
+        self._idle_prep_wakeup.set()
+
+    def _on_language_reloaded(self, lang_code: str, strings: Dict[str, str]):
+        """Aplica en caliente un fichero de idioma modificado (ya validado)."""
+        if self.loc_manager.apply_language_pack(lang_code, strings): self.update_ui_language()
+
     def _get_wing_for_boss(self, encounter_type: str, boss_name: str) -> Optional[str]:
         """Obtiene la clave del ala/escala para un boss."""
         return self._boss_wing_map.get(encounter_type, {}).get(boss_name)
@@ -98,6 +207,7 @@ class StateManager:
     def set_ui_app(self, ui_app_instance: 'App'): # Usar string para type hint
         """Establece la referencia a la instancia principal de la UI."""
         self.ui_app = ui_app_instance; self.load_config_into_ui(); self.update_ui_language(); self.start_discord_bot_if_configured()
+        self.start_idle_preparation(); self.data_reloader.start(); self.apply_archive_config(); self.apply_control_api_config(); self.flush_outage_queue()
 
     def set_ui_logger(self, logger_func: Callable[[str], None]):
         """Establece la función que se usará para loguear mensajes en la UI."""
@@ -110,16 +220,110 @@ class StateManager:
             if self.ui_app and self.ui_app.winfo_exists(): self.ui_app.after(0, self.ui_logger, message)
         except Exception as e: print(f"Error al intentar loguear en UI: {e}"); print(f"Mensaje original: {message}")
 
-    def shutdown(self):
-        """Realiza tareas de limpieza al cerrar la aplicación."""
-        self.log_to_ui(self.get_localized_string("log_shutdown_starting", default="Initiating shutdown...")); self.stop_discord_bot(); self.log_to_ui(self.get_localized_string("log_shutdown_complete", default="Shutdown complete."))
+    def shutdown(self, background: bool = False) -> Optional[threading.Thread]:
+        """
+        Realiza tareas de limpieza al cerrar la aplicación, con un único plazo total (SHUTDOWN_DEADLINE_SECONDS).
+        Fase 1 (en paralelo): guardar config, parar vigilantes y drenar/guardar las subidas pendientes.
+        Fase 2 (en paralelo): cerrar el bot, el pool HTTP y el historial.
+        Con background=True la UI se desconecta y la limpieza sigue en un hilo (que se devuelve), para
+        que la ventana pueda cerrarse ya.
+        """
+        self.log_to_ui(self.get_localized_string("log_shutdown_starting", default="Initiating shutdown...")); self._shutting_down.set()
+        coordinator = ShutdownCoordinator(deadline_seconds=SHUTDOWN_DEADLINE_SECONDS)
+        coordinator.add_phase([("config", lambda remaining: self.flush_config()),
+                               ("watchers", lambda remaining: (self.data_reloader.stop(), self.stop_idle_preparation(), self.batch_planner.stop(), self.health_probe.stop(), self.log_archiver.stop(), self.control_api and self.control_api.stop(timeout=remaining))),
+                               ("uploads", lambda remaining: (self._drain_uploads(remaining), self.upload_scheduler.stop()))])
+        coordinator.add_phase([("discord", lambda remaining: self.stop_discord_bot(timeout=remaining)),
+                               ("http", lambda remaining: self.log_uploader.close()),
+                               ("history", lambda remaining: self.history_store.close())])
+        def on_done(statuses: Dict[str, str]):
+            abandoned = [name for name, status in statuses.items() if status == "timeout"]
+            if abandoned: self.log_to_ui(self.get_localized_string("log_shutdown_deadline", steps=", ".join(abandoned), default=f"Shutdown deadline reached; abandoned: {', '.join(abandoned)}"))
+            self.log_to_ui(self.get_localized_string("log_shutdown_complete", default="Shutdown complete."))
+        if not background: on_done(coordinator.run()); return None
+        self.ui_app = None # La ventana se destruye a continuación; desde aquí solo se escribe en consola
+        return coordinator.run_in_background(on_done)
+
+    def _drain_uploads(self, remaining: float):
+        """Deja un breve margen a las subidas en curso; después las cancela y espera a que guarden lo pendiente."""
+        deadline = time.monotonic() + remaining
+        with self._uploads_idle:
+            if self._uploads_idle.wait_for(lambda: self._active_uploads == 0, timeout=min(UPLOAD_DRAIN_SECONDS, remaining / 2)): return
+            controls = list(self._upload_controls)
+        for control in controls: control.cancel() # El worker guarda en pending_uploads.json lo que no llegó a subir
+        with self._uploads_idle: self._uploads_idle.wait_for(lambda: self._active_uploads == 0, timeout=max(0.0, deadline - time.monotonic()))
+
+    # --- Cola de trabajo aplazado (caídas de dps.report/Discord y cierres a medias) ---
+    def _discord_ready(self) -> bool:
+        return bool(self.discord_bot and self.discord_bot.is_ready())
+
+    def _park_uploads(self, jobs: List[Tuple[str, str, str]], show_duration: bool, upload_title: str, since: Optional[float], reason: str):
+        """Aparca logs no subidos. Si es por una caída de dps.report, se vigila su recuperación para reintentar solo."""
+        if not jobs: return
+        self.outage_queue.park_uploads(jobs, upload_title, show_duration, since, reason)
+        if reason == "shutdown": self.log_to_ui(self.get_localized_string("log_shutdown_uploads_checkpointed", count=len(jobs), default=f"{len(jobs)} pending uploads saved; they will resume on next start.")); return
+        self.log_to_ui(self.get_localized_string("log_outage_uploads_queued", count=len(jobs), default=f"{len(jobs)} uploads queued; they will be retried automatically when dps.report is reachable."))
+        self.health_probe.watch("dps_report")
+
+    def _publish_or_park(self, upload_batch: UploadBatch, live_messages: Optional[Dict[int, Any]]):
+        """Publica el lote; si Discord no está disponible, lo aparca para publicarlo (desde el historial) cuando vuelva."""
+        if self._publish_results(upload_batch, live_messages): return
+        if upload_batch.batch_id is None or not upload_batch.has_successes or self._discord_ready() or self._shutting_down.is_set(): return
+        self.outage_queue.park_publish(upload_batch.batch_id, upload_batch.title)
+        self.log_to_ui(self.get_localized_string("log_outage_publish_queued", default="Discord is unavailable; results will be posted when it reconnects."))
+        self.health_probe.watch("discord")
+
+    def _on_services_recovered(self):
+        if len(self.outage_queue) and not self._shutting_down.is_set(): self.flush_outage_queue()
+
+    def flush_outage_queue(self) -> int:
+        """
+        Reintenta todo lo aparcado si dps.report y Discord están disponibles; si no, deja vigilando
+        el que falte. Devuelve cuántos elementos se reencolaron.
+        """
+        total = self.outage_queue.job_count()
+        if not total: return 0
+        if self.health_probe.is_down("dps_report") or not self._discord_ready():
+            if not self._discord_ready(): self.health_probe.watch("discord")
+            self.log_to_ui(self.get_localized_string("log_pending_uploads_waiting", count=total, default=f"{total} queued uploads will be sent once dps.report and Discord are reachable.")); return 0
+        entries = self.outage_queue.take_all() # Si vuelven a fallar, el worker los aparca de nuevo
+        self.log_to_ui(self.get_localized_string("log_pending_uploads_resuming", count=total, default=f"Sending {total} queued uploads..."))
+        for entry in entries:
+            if entry.get("kind") == "publish": self.repost_batch(entry["batch_id"]); continue
+            resolved_logs: List[Tuple[str, str, List[str]]] = []
+            for job in entry.get("jobs", []):
+                if not os.path.exists(job.get("log_path", "")): continue
+                if resolved_logs and resolved_logs[-1][:2] == (job["encounter_type"], job["boss_name"]): resolved_logs[-1][2].append(job["log_path"])
+                else: resolved_logs.append((job["encounter_type"], job["boss_name"], [job["log_path"]]))
+            if resolved_logs: self._submit_batch({}, bool(entry.get("show_duration")), entry.get("title", ""), entry.get("since"), resolved_logs)
+        return total
 
     # --- Métodos llamados por la UI ---
-    def config_updated(self):
-        """Llamado internamente después de guardar la configuración."""
-        self.log_uploader = LogUploader(config=self.config); self._boss_wing_map = self._build_boss_wing_map()
-        new_lang = self.config.get("language", "en"); self.loc_manager.load_language(new_lang)
-        self.update_ui_language(); self.stop_discord_bot(); self.start_discord_bot_if_configured()
+    def config_updated(self, changed_keys: Optional[Set[str]] = None):
+        """
+        Llamado internamente después de guardar la configuración.
+        Solo recarga los subsistemas afectados por las claves cambiadas (todos si changed_keys es None).
+        """
+        actions: Set[str] = set()
+        for key in (changed_keys if changed_keys is not None else CONFIG_RELOAD_ACTIONS.keys()):
+            actions.update(CONFIG_RELOAD_ACTIONS.get(key, ALL_RELOAD_ACTIONS))
+        print(f"StateManager: Config keys changed: {sorted(changed_keys) if changed_keys is not None else 'all'} -> reloading: {sorted(actions) or 'nothing'}")
+        if "log_folder" in actions:
+            self.log_uploader.set_log_roots(get_log_roots(self.config))
+            self._idle_prep_wakeup.set()
+        if "language" in actions:
+            self.loc_manager.load_language(self.config.get("language", "en")); self.update_ui_language()
+        if "discord" in actions: self.restart_discord_bot_async()
+        if "archive" in actions: self.apply_archive_config()
+        if "control_api" in actions: self.apply_control_api_config()
+        if "bandwidth" in actions: self.log_uploader.apply_bandwidth_config()
+        if "channel_routes" in actions and self.discord_bot: self.discord_bot.set_route_channels(route_channel_ids(self._channel_routes()))
+
+    def restart_discord_bot_async(self):
+        """Reinicia el bot de Discord en segundo plano, sin bloquear la UI."""
+        def restart():
+            self.stop_discord_bot(); self.start_discord_bot_if_configured(); self.flush_outage_queue()
+        threading.Thread(target=restart, name="DiscordBotRestart", daemon=True).start()
 
     def load_config_into_ui(self):
         """Carga la configuración actual (desde self.config) en los campos de la UI."""
@@ -127,9 +331,10 @@ class StateManager:
             config_view = self.ui_app.config_frame
             config_view.token_entry.delete(0, 'end'); config_view.token_entry.insert(0, self.config.get("discord_token", ""))
             config_view.channel_id_entry.delete(0, 'end'); config_view.channel_id_entry.insert(0, self.config.get("target_channel_id", ""))
-            config_view.path_entry.delete(0, 'end'); config_view.path_entry.insert(0, self.config.get("log_folder_path", ""))
+            config_view.path_entry.delete(0, 'end'); config_view.path_entry.insert(0, LOG_ROOTS_SEPARATOR.join(get_log_roots(self.config)))
             config_view.dps_token_entry.delete(0, 'end'); config_view.dps_token_entry.insert(0, self.config.get("dps_report_user_token", ""))
             current_lang_code = self.config.get("language", "en"); current_lang_display = config_view.reverse_lang_map.get(current_lang_code, "English"); config_view.lang_combobox.set(current_lang_display)
+            config_view.archive_var.set(bool(self.config.get("archive_enabled", False))); config_view.archive_days_entry.delete(0, 'end'); config_view.archive_days_entry.insert(0, str(self.config.get("archive_max_age_days", DEFAULT_ARCHIVE_MAX_AGE_DAYS)))
             self.log_to_ui(self.get_localized_string("general_info") + ": Configuration loaded into UI.")
 
     def update_ui_language(self):
@@ -158,14 +363,220 @@ class StateManager:
              except KeyError: return default
          return val
 
-    def start_upload(self, selected_bosses: Dict[str, List[str]], show_duration: bool = False, upload_title: str = ""):
-        """Inicia el proceso de subida de logs en un hilo separado."""
+    def start_upload(self, selected_bosses: Dict[str, List[str]], show_duration: bool = False, upload_title: str = "", since: Optional[float] = None) -> Optional[ScheduledBatch]:
+        """
+        Encola un lote de subida en el planificador (puede haber otros en curso). Devuelve el lote, o None si no se pudo empezar.
+        Con 'since' (modo sesión) se suben todos los intentos de cada boss desde ese instante, no solo el último.
+        """
         lm = self.loc_manager
-        if not self.discord_bot or not self.discord_bot.ready_event.is_set() or not self.discord_bot.is_ready():
+        discord_configured = bool(self.config.get("discord_token") and self.config.get("target_channel_id"))
+        if discord_configured and not self._discord_ready():
+            # Subir igualmente: el embed queda aparcado y se publica cuando el bot se reconecte
+            self.log_to_ui(self.get_localized_string("log_outage_discord_deferred", default="Discord is not connected; uploading anyway, results will be posted when it reconnects."))
+        elif not self._discord_ready():
              message = lm.get_string("upload_status_error_discord_disconnected"); self._update_ui_status(message, "red"); self.log_to_ui(f"{lm.get_string('general_error')}: {message}")
-             if self.ui_app and hasattr(self.ui_app, 'selection_frame'): self.ui_app.after(0, lambda: self.ui_app.selection_frame.enable_upload_buttons()); return
+             if self.ui_app and hasattr(self.ui_app, 'selection_frame'): self.ui_app.after(0, lambda: self.ui_app.selection_frame.enable_upload_buttons())
+             return None
         boss_list_str = ", ".join([f"{etype}: {', '.join(bl)}" for etype, bl in selected_bosses.items() if bl]); log_msg = self.get_localized_string("log_upload_starting", details=boss_list_str, default=f"Starting upload for: {boss_list_str}"); self.log_to_ui(log_msg)
-        upload_thread = threading.Thread(target=self._upload_worker, args=(selected_bosses, show_duration, upload_title), daemon=True); upload_thread.start()
+        if since is not None:
+            since_str = datetime.datetime.fromtimestamp(since).strftime('%Y-%m-%d %H:%M'); self.log_to_ui(self.get_localized_string("log_session_mode", since=since_str, default=f"Session mode: uploading every attempt since {since_str}."))
+        return self._submit_batch(selected_bosses, show_duration, upload_title, since)
+
+    def _submit_batch(self, selected_bosses: Dict[str, List[str]], show_duration: bool, upload_title: str, since: Optional[float],
+                      resolved_logs: Optional[List[Tuple[str, str, List[str]]]] = None) -> Optional[ScheduledBatch]:
+        """
+        Encola un lote en el planificador: empieza en cuanto haya un hilo libre, intercalado con los que ya estén en curso.
+        Devuelve None si el planificador ya está parado (cierre); los logs ya resueltos se vuelven a aparcar.
+        """
+        running = len(self.upload_scheduler.active_batches())
+        batch = self._build_upload_batch(selected_bosses, show_duration, upload_title, since, resolved_logs)
+        # Se cuenta antes de encolar (un lote puede terminar antes de que submit vuelva) y se deshace si no se admite
+        with self._active_uploads_lock: self._active_uploads += 1; self._upload_controls.add(batch.control)
+        try: self.upload_scheduler.submit(batch)
+        except RuntimeError as e:
+            with self._active_uploads_lock: self._active_uploads -= 1; self._upload_controls.discard(batch.control); self._uploads_idle.notify_all()
+            print(f"StateManager: Could not submit batch '{batch.label}': {e}")
+            if resolved_logs: self._park_uploads([(etype, boss, path) for etype, boss, paths in resolved_logs for path in paths], show_duration, upload_title, since, reason="shutdown")
+            return None
+        if running: self.log_to_ui(self.get_localized_string("log_batch_queued", title=batch.label, count=running, default=f"Batch '{batch.label}' queued alongside {running} running batch(es)."))
+        return batch
+
+    def _target_batches(self, batch_key: Optional[int]) -> List[ScheduledBatch]:
+        if batch_key is None: return [b for b in self.upload_scheduler.active_batches() if not b.control.is_cancelled]
+        batch = self.upload_scheduler.get(batch_key)
+        return [batch] if batch and not batch.control.is_cancelled else []
+
+    def cancel_upload(self, batch_key: Optional[int] = None):
+        """Cancela un lote (o todos con batch_key=None). Lo ya subido se publica igualmente."""
+        batches = self._target_batches(batch_key)
+        if not batches: return
+        for batch in batches:
+            batch.control.cancel(); self.log_to_ui(self.get_localized_string("log_upload_cancel_requested", default="Cancelling upload batch...") + f" ({batch.label})")
+            self._on_batch_progress(batch)
+        self.upload_scheduler.wake(); self._update_ui_status(self.get_localized_string("upload_status_cancelling"), "blue")
+
+    def toggle_pause_upload(self, batch_key: Optional[int] = None) -> bool:
+        """
+        Pausa o reanuda un lote (o todos con batch_key=None: se pausan si alguno sigue en marcha).
+        Devuelve True si queda en pausa. Un lote en pausa no ocupa hilos del planificador.
+        """
+        batches = self._target_batches(batch_key)
+        if not batches: return False
+        paused = any(not b.control.is_paused for b in batches)
+        for batch in batches:
+            if paused: batch.control.pause()
+            else: batch.control.resume()
+            self._on_batch_progress(batch)
+        self.upload_scheduler.wake()
+        message = self.get_localized_string("upload_status_paused" if paused else "upload_status_resumed"); self._update_ui_status(message, "blue"); self.log_to_ui(message)
+        return paused
+
+    def get_batch_progress(self) -> List[Dict[str, Any]]:
+        """Estado de los lotes en curso o en cola: clave, etiqueta, completados/total, pausa y cancelación."""
+        return [batch.progress for batch in self.upload_scheduler.active_batches()]
+
+    def _on_batch_progress(self, batch: ScheduledBatch):
+        if not self.ui_app or not hasattr(self.ui_app, 'selection_frame'): return
+        if batch.resolved: text = self.get_localized_string("upload_batch_progress", title=batch.label, completed=batch.completed, total=batch.total, default=f"{batch.label}: {batch.completed}/{batch.total}")
+        else: text = self.get_localized_string("upload_batch_resolving", title=batch.label, default=f"{batch.label}: finding logs...")
+        batches = self.upload_scheduler.active_batches()
+        try:
+            self.ui_app.after(0, self.ui_app.selection_frame.update_batch_row, batch.key, text, batch.control.is_paused, batch.control.is_cancelled)
+            self.ui_app.after(0, self.ui_app.selection_frame.set_batch_controls_active, bool(batches))
+            if batches: self.ui_app.after(0, self.ui_app.selection_frame.set_pause_state, all(b.control.is_paused for b in batches))
+        except Exception as e: print(f"StateManager: Could not update batch progress in UI: {e}")
+
+    def _on_batch_removed(self, batch: ScheduledBatch):
+        with self._finished_batches_lock:
+            self._finished_batches[batch.key] = self._batch_status(batch, include_results=True)
+            while len(self._finished_batches) > FINISHED_BATCHES_KEPT: self._finished_batches.popitem(last=False)
+        if not self.ui_app or not hasattr(self.ui_app, 'selection_frame'): return
+        try:
+            self.ui_app.after(0, self.ui_app.selection_frame.remove_batch_row, batch.key)
+            self.ui_app.after(0, self.ui_app.selection_frame.set_batch_controls_active, bool(self.upload_scheduler.active_batches()))
+        except Exception as e: print(f"StateManager: Could not remove batch from UI: {e}")
+
+    # --- Plan de lote (previsualización) ---
+    def request_batch_plan(self, selection: Dict[str, List[str]], since: Optional[float] = None):
+        """Calcula en segundo plano el plan de una selección y lo muestra en la vista de selección."""
+        self.batch_planner.request(selection, since, self._show_batch_plan)
+
+    def _show_batch_plan(self, plan: BatchPlan):
+        if not self.ui_app or not hasattr(self.ui_app, 'selection_frame'): return
+        try: self.ui_app.after(0, self.ui_app.selection_frame.show_batch_plan, plan)
+        except Exception as e: print(f"StateManager: Could not show batch plan in UI: {e}")
+
+    # --- API local de control ---
+    def apply_control_api_config(self):
+        """Arranca, reinicia o detiene la API local según la configuración (genera el token la primera vez)."""
+        if self.control_api: self.control_api.stop(); self.control_api = None
+        if not self.config.get("control_api_enabled"): return
+        if not self.config.get("control_api_token"): self.config["control_api_token"] = generate_token(); self._schedule_config_write()
+        try: port = int(self.config.get("control_api_port") or DEFAULT_CONTROL_API_PORT)
+        except (TypeError, ValueError): port = DEFAULT_CONTROL_API_PORT
+        server = ControlApiServer(self, token=self.config["control_api_token"], port=port)
+        if server.start(): self.control_api = server; self.log_to_ui(self.get_localized_string("log_control_api_listening", port=port, default=f"Control API listening on http://127.0.0.1:{port} (token in config.json)."))
+        else: self.log_to_ui(self.get_localized_string("log_control_api_error", port=port, error=server.start_error, default=f"Control API could not start on port {port}: {server.start_error}"))
+
+    def get_presets(self) -> Dict[str, Dict[str, List[str]]]:
+        """Presets disponibles con los bosses que subiría cada uno."""
+        return {key: build_preset_selection(self.log_uploader.boss_definitions, key) for key in PRESETS}
+
+    def start_api_upload(self, preset: Optional[str], selection: Optional[Dict[str, List[str]]], upload_title: str = "", show_duration: bool = False,
+                         since: Optional[float] = None) -> Optional[int]:
+        """Lanza un lote pedido por la API (un preset o una selección). ValueError si la petición no es válida; devuelve la clave del lote."""
+        if preset is not None and selection is not None: raise ValueError("Use either 'preset' or 'selection', not both")
+        if preset is not None:
+            if not isinstance(preset, str) or preset not in PRESETS: raise ValueError(f"Unknown preset '{preset}' (available: {', '.join(PRESETS)})")
+            selection = build_preset_selection(self.log_uploader.boss_definitions, preset)
+        elif (not isinstance(selection, dict) or not all(isinstance(bosses, list) for bosses in selection.values())
+              or not all(isinstance(boss, str) for bosses in selection.values() for boss in bosses)): raise ValueError("'selection' must be an object {encounter_type: [boss names]}")
+        unknown = [f"{etype}/{boss}" for etype, bosses in selection.items() for boss in bosses if boss not in self._boss_wing_map.get(etype, {})]
+        if unknown: raise ValueError(f"Unknown bosses: {', '.join(unknown)}")
+        if not any(selection.values()): raise ValueError("Nothing selected")
+        self.log_to_ui(self.get_localized_string("log_control_api_upload", title=upload_title or "-", default=f"Upload requested through the control API ({upload_title or '-'})."))
+        batch = self.start_upload(selection, show_duration=show_duration, upload_title=upload_title, since=since)
+        return batch.key if batch else None
+
+    def _batch_status(self, batch: ScheduledBatch, include_results: bool) -> Dict[str, Any]:
+        status = batch.progress; status["finished"] = batch not in self.upload_scheduler.active_batches()
+        if batch.payload is not None: status["incomplete_skipped"] = batch.payload.incomplete_skipped
+        if include_results and batch.payload is not None: status["results"] = batch.payload.to_dict()
+        return status
+
+    def get_batch_status(self, batch_key: int, include_results: bool = True) -> Optional[Dict[str, Any]]:
+        """Progreso (y resultados) de un lote en curso o terminado hace poco; None si no se conoce."""
+        batch = self.upload_scheduler.get(batch_key)
+        if batch: return self._batch_status(batch, include_results)
+        with self._finished_batches_lock: status = self._finished_batches.get(batch_key)
+        if status is None: return None
+        return status if include_results else {k: v for k, v in status.items() if k != "results"}
+
+    def get_batch_statuses(self) -> List[Dict[str, Any]]:
+        """Lotes en curso y terminados recientemente (sin resultados), del más reciente al más antiguo."""
+        with self._finished_batches_lock: finished = [{k: v for k, v in status.items() if k != "results"} for status in self._finished_batches.values()]
+        active = [self._batch_status(batch, include_results=False) for batch in self.upload_scheduler.active_batches()]
+        return sorted(active + finished, key=lambda status: status["key"], reverse=True)
+
+    def get_api_status(self) -> Dict[str, Any]:
+        return {"discord_ready": self._discord_ready(), "dps_report_down": self.health_probe.is_down("dps_report"),
+                "queued_uploads": self.outage_queue.job_count(), "active_batches": [self._batch_status(b, False) for b in self.upload_scheduler.active_batches()],
+                **self.log_uploader.bandwidth.snapshot()}
+
+    def get_upload_throughput_text(self) -> str:
+        """Velocidad de subida efectiva (y límite vigente) para mostrar en la UI."""
+        bandwidth = self.log_uploader.bandwidth; kbps = int(bandwidth.throughput_kbps()); limit = bandwidth.limit_kbps
+        if limit: return self.get_localized_string("upload_throughput_limited", kbps=kbps, limit=limit, default=f"Upload: {kbps} kbit/s (limit {limit} kbit/s)")
+        return self.get_localized_string("upload_throughput", kbps=kbps, default=f"Upload: {kbps} kbit/s")
+
+    # --- Archivo de logs antiguos ---
+    def apply_archive_config(self):
+        """Arranca o detiene el archivado en segundo plano según la configuración."""
+        try: self.log_archiver.max_age_days = max(1, int(self.config.get("archive_max_age_days", DEFAULT_ARCHIVE_MAX_AGE_DAYS)))
+        except (TypeError, ValueError): self.log_archiver.max_age_days = DEFAULT_ARCHIVE_MAX_AGE_DAYS
+        if self.config.get("archive_enabled"): self.log_archiver.start()
+        else: self.log_archiver.stop()
+
+    def _on_logs_archived(self, root: str, count: int):
+        self.log_uploader.log_index.invalidate()
+        self.log_to_ui(self.get_localized_string("log_logs_archived", count=count, days=self.log_archiver.max_age_days, root=root, default=f"Archived {count} logs older than {self.log_archiver.max_age_days} days from {root}."))
+
+    # --- Preparación de logs en segundo plano ---
+    def start_idle_preparation(self):
+        """Arranca el hilo de baja prioridad que prepara (hash/compresión) los logs más recientes."""
+        if self._idle_prep_thread and self._idle_prep_thread.is_alive(): return
+        self._idle_prep_stop.clear()
+        self._idle_prep_thread = threading.Thread(target=self._idle_prep_loop, name="IdlePrepThread", daemon=True); self._idle_prep_thread.start()
+
+    def stop_idle_preparation(self):
+        """Detiene el hilo de preparación y el pool de procesos."""
+        self._idle_prep_stop.set(); self._idle_prep_wakeup.set()
+        self.log_preparer.shutdown(wait=False)
+
+    def _idle_prep_loop(self):
+        """Mientras no haya subidas en curso, encola la preparación del log más reciente de cada encuentro."""
+        while not self._idle_prep_stop.is_set():
+            with self._active_uploads_lock: busy = self._active_uploads > 0
+            if not busy:
+                try:
+                    latest_logs = self._collect_latest_logs()
+                    scheduled = self.log_preparer.schedule(latest_logs) if latest_logs else 0
+                    if scheduled: print(f"StateManager: Scheduled background preparation of {scheduled} logs.")
+                except Exception as e: print(f"StateManager: Error during idle log preparation: {e}")
+            self._idle_prep_wakeup.wait(timeout=IDLE_PREP_INTERVAL_SECONDS); self._idle_prep_wakeup.clear()
+
+    def _collect_latest_logs(self) -> List[str]:
+        """Resuelve el log más reciente de cada encuentro definido."""
+        uploader = self.log_uploader; latest_logs = []
+        if not uploader.get_valid_log_roots(): return latest_logs
+        for encounter_type, bosses in self._boss_wing_map.items():
+            for boss_name in bosses:
+                if self._idle_prep_stop.is_set(): return latest_logs
+                with self._active_uploads_lock:
+                    if self._active_uploads > 0: return latest_logs # Ceder ante una subida real
+                latest_log, _ = uploader.find_latest_ready_log(boss_name, encounter_type, max_wait=0.0) # No preparar logs a medio escribir
+                if latest_log: latest_logs.append(latest_log)
+        return latest_logs
 
     # --- Gestión del Bot de Discord ---
     def start_discord_bot_if_configured(self):
@@ -181,7 +592,7 @@ class StateManager:
             except ValueError: msg = lm.get_string("config_status_error_channel_id_numeric"); self.log_to_ui(f"{lm.get_string('general_error')}: {msg}"); self._update_ui_status(msg, "red"); return
             self.log_to_ui(lm.get_string("log_discord_connecting", channel_id=channel_id, default=f"Starting Discord bot for channel {channel_id}..."))
             try:
-                self.discord_bot = DiscordBot(token=token, target_channel_id=channel_id); self.discord_bot_thread = self.discord_bot.run_bot_in_thread()
+                self.discord_bot = DiscordBot(token=token, target_channel_id=channel_id, route_channel_ids=route_channel_ids(self._channel_routes())); self.discord_bot_thread = self.discord_bot.run_bot_in_thread()
                 bot_ready = self.discord_bot.ready_event.wait(timeout=10.0); status_msg = ""; status_color = "orange"; log_msg = ""
                 if bot_ready and self.discord_bot.is_ready(): status_msg = lm.get_string("discord_connection"); log_msg = f"{lm.get_string('general_info')}: {status_msg}"; status_color = "green"
                 elif bot_ready: status_msg = lm.get_string("general_error") + ": " + lm.get_string("log_discord_start_error_suffix", default="Error starting Discord bot (see console)."); log_msg = status_msg; status_color = "red"
@@ -190,15 +601,15 @@ class StateManager:
             except Exception as e:
                 error_msg = lm.get_string("log_discord_create_error_suffix", error=e, default=f"Error creating/starting Discord bot: {e}"); self.log_to_ui(error_msg); self._update_ui_status(lm.get_string("general_error") + f": {e}", "red"); self.discord_bot = None; self.discord_bot_thread = None
 
-    def stop_discord_bot(self):
-        """Detiene el bot de Discord si está corriendo."""
-        lm = self.loc_manager
+    def stop_discord_bot(self, timeout: float = 15.0):
+        """Detiene el bot de Discord si está corriendo (esperando como mucho 'timeout' segundos en total)."""
+        lm = self.loc_manager; deadline = time.monotonic() + timeout
         with self._bot_start_lock:
             bot_loop = getattr(self.discord_bot, '_bot_loop', None) if self.discord_bot else None
             if bot_loop and bot_loop.is_running() and not bot_loop.is_closed():
                 self.log_to_ui(lm.get_string("log_discord_closing", default="Requesting Discord bot shutdown..."))
                 future = asyncio.run_coroutine_threadsafe(self.discord_bot.close_bot(), bot_loop)
-                try: future.result(timeout=10)
+                try: future.result(timeout=min(10.0, max(0.0, deadline - time.monotonic())))
                 except asyncio.TimeoutError: self.log_to_ui(lm.get_string("log_discord_close_timeout_suffix", default="Timeout waiting for bot shutdown."))
                 except RuntimeError as e:
                     if "Event loop is closed" in str(e): self.log_to_ui(lm.get_string("general_warning") + ": Loop already closed during shutdown.")
@@ -208,47 +619,240 @@ class StateManager:
             elif self.discord_bot: self.log_to_ui(lm.get_string("general_warning") + ": Discord bot loop not running or closed, cannot schedule close.")
             if self.discord_bot_thread and self.discord_bot_thread.is_alive():
                 self.log_to_ui(lm.get_string("log_discord_thread_joining", default="Waiting for Discord bot thread to finish..."))
-                self.discord_bot_thread.join(timeout=5)
+                self.discord_bot_thread.join(timeout=min(5.0, max(0.0, deadline - time.monotonic())))
                 if self.discord_bot_thread.is_alive(): self.log_to_ui(lm.get_string("log_discord_thread_join_timeout_suffix", default="Discord bot thread did not finish in time."))
             self.discord_bot = None; self.discord_bot_thread = None
             self.log_to_ui(lm.get_string("log_discord_resources_released", default="Discord bot resources released."))
 
-    # --- Métodos internos y worker ---
-    def _upload_worker(self, selected_bosses: Dict[str, List[str]], show_duration: bool, upload_title: str):
-        """Trabajo de subida que se ejecuta en un hilo separado."""
-        lm = self.loc_manager; total_bosses = sum(len(bl) for bl in selected_bosses.values()); processed_count = 0
-        upload_results_for_embed: Dict[str, Dict[str, List[Dict]]] = {}; all_failures: List[Dict] = []
+    # --- Métodos internos y lotes de subida ---
+    def is_profiling_enabled(self) -> bool:
+        return self.profiling_forced or bool(self.config.get("profiling_enabled"))
+
+    def _on_profile_written(self, summary_path: str):
+        self.log_to_ui(self.get_localized_string("log_profile_written", path=summary_path, default=f"Profile written to {summary_path}"))
+
+    def _resolve_upload_file(self, log_path: str) -> Tuple[str, Optional[str], str]:
+        """
+        Devuelve (ruta_a_subir, nombre_a_enviar, sha1), usando el artefacto preparado si existe.
+        Sin preparar, el sha1 va vacío: se calcula durante la subida, sin leer el log dos veces.
+        """
+        prepared = self.log_preparer.get_prepared(log_path)
+        if prepared and prepared.compressed and os.path.exists(prepared.upload_path):
+            print(f"StateManager: Using prepared artifact for {os.path.basename(log_path)}")
+            return prepared.upload_path, os.path.basename(log_path) + ".zip", prepared.sha1
+        return log_path, None, prepared.sha1 if prepared else ""
+
+    def _resolve_batch_logs(self, selected_bosses: Dict[str, List[str]], since: Optional[float],
+                            control: Optional[UploadControl] = None) -> Tuple[List[Tuple[str, str, List[str]]], int]:
+        """
+        Resuelve los logs a subir: [(tipo, boss, [logs])]. Sin 'since' es solo el último; con 'since', todos los intentos
+        (también los ya movidos al archivo, que se buscan en su manifiesto y se extraen).
+        Los logs que ArcDPS aún está escribiendo se esperan brevemente o se descartan; devuelve también cuántos se descartaron.
+        """
+        # Reescanear (en paralelo por carpeta raíz) para incluir logs escritos justo antes de pulsar el botón
+        latencies = self.log_uploader.prefetch_logs(selected_bosses)
+        if len(latencies) > 1:
+            for root, seconds in latencies.items(): self.log_to_ui(self.get_localized_string("log_root_scan_latency", root=root, ms=int(seconds * 1000), default=f"Scanned {root} in {int(seconds * 1000)} ms"))
+        resolved = []; skipped_incomplete = 0
         for encounter_type, boss_list in selected_bosses.items():
-            if encounter_type not in upload_results_for_embed: upload_results_for_embed[encounter_type] = {}
             for boss_name in boss_list:
-                processed_count += 1; progress_message = lm.get_string("upload_status_processing", count=processed_count, total=total_bosses, boss=boss_name)
-                self._update_ui_status(progress_message); self.log_to_ui(progress_message)
-                latest_log = self.log_uploader.find_latest_log(boss_name, encounter_type); wing_key = self._get_wing_for_boss(encounter_type, boss_name) or "Unknown"
-                result_data = {"boss_name": boss_name, "link": "", "success": False, "duration": None, "wing_key": wing_key, "message": ""}
-                if not latest_log:
-                    message = f"No se encontró log para {boss_name}"; status_msg = lm.get_string("upload_status_failed_log", message=message)
-                    self._update_ui_status(status_msg, "orange"); self.log_to_ui(f"{lm.get_string('general_warning')}: {status_msg}")
-                    result_data["success"] = False; result_data["message"] = message; all_failures.append(result_data); continue
-                success, message, link = self.log_uploader.upload_log_to_dps_report(latest_log); duration = None
-                if success and link and show_duration: duration = self.log_uploader.get_log_duration(link)
-                status_color = "green" if success else "red"
-                if success: final_message = lm.get_string("upload_status_uploaded_with_duration", boss=boss_name, duration=duration) if duration else lm.get_string("upload_status_uploaded", boss=boss_name)
-                else: final_message = lm.get_string("upload_status_failed_log", message=message or "Error desconocido")
-                self._update_ui_status(final_message, status_color); self.log_to_ui(final_message)
-                result_data["link"] = link or ""; result_data["success"] = success; result_data["duration"] = duration; result_data["message"] = message if not success else ""
-                if success:
-                    if wing_key not in upload_results_for_embed[encounter_type]: upload_results_for_embed[encounter_type][wing_key] = []
-                    upload_results_for_embed[encounter_type][wing_key].append(result_data)
-                else: all_failures.append(result_data)
-        completion_message = lm.get_string("upload_status_complete", total=total_bosses); self._update_ui_status(completion_message, "green"); self.log_to_ui(completion_message)
+                if since is None:
+                    latest_log, skipped = self.log_uploader.find_latest_ready_log(boss_name, encounter_type, control=control)
+                    resolved.append((encounter_type, boss_name, [latest_log] if latest_log else []))
+                else:
+                    boss_logs, skipped = pick_ready_logs(self.log_uploader.find_logs_since(boss_name, encounter_type, since), control=control)
+                    resolved.append((encounter_type, boss_name, boss_logs))
+                if skipped: self.log_to_ui(self.get_localized_string("log_incomplete_log_skipped", boss=boss_name, count=skipped, default=f"{boss_name}: skipped {skipped} log(s) still being written."))
+                skipped_incomplete += skipped
+        return resolved, skipped_incomplete
+
+    def _build_upload_batch(self, selected_bosses: Dict[str, List[str]], show_duration: bool, upload_title: str, since: Optional[float],
+                            resolved_logs: Optional[List[Tuple[str, str, List[str]]]] = None) -> ScheduledBatch:
+        """
+        Prepara un lote para el planificador: un UploadJob por log (o por boss sin log). Los trabajos pueden
+        correr a la vez en varios hilos; sus UploadResult se completan en el orden del lote (historial y embed)
+        y al final se publica el resultado en Discord (también lo ya subido si se cancela).
+        Si la cancelación viene del cierre de la aplicación, los logs no subidos se guardan para la próxima sesión.
+        """
+        lm = self.loc_manager; lock = threading.RLock(); label = upload_title or lm.get_string("embed_title_default")
+        state: Dict[str, Any] = {"resolved": False, "processed": 0, "uploaded": 0, "skipped": 0, "total": 0, "next_index": 0, "live_messages": None}
+        upload_batch = UploadBatch(title=upload_title, show_duration=show_duration, since=since, created_at=time.time())
+        pending: List[Tuple[str, str, str]] = [] # (tipo, boss, log) no subidos por cancelación
+        parked: List[Tuple[str, str, str]] = [] # (tipo, boss, log) con fallo transitorio, para reintentar solo
+        outcomes: Dict[int, Tuple] = {} # Índice del trabajo -> resultado a completar en orden
+        # cProfile solo ve un hilo: con perfilado, el lote corre de un trabajo en uno y cada tramo se perfila por separado
+        profiler = ProfilingSession("batch", on_complete=self._on_profile_written) if self.is_profiling_enabled() else None
+        section = profiler.section if profiler else contextlib.nullcontext
+        def status(message: str, color: str = "gray"):
+            if len(self.upload_scheduler.active_batches()) > 1: message = f"[{label}] {message}"
+            self._update_ui_status(message, color); self.log_to_ui(message)
+        def complete_in_order(block: bool):
+            """Completa (en orden) los trabajos terminados; los subidos esperan a su getJson (salvo que block)."""
+            while state["next_index"] in outcomes:
+                outcome = outcomes[state["next_index"]]
+                if outcome[0] == "uploaded":
+                    enrichment = outcome[2]
+                    if enrichment and not enrichment.done():
+                        if not block: return
+                        if batch.control.is_cancelled: enrichment.cancel()
+                del outcomes[state["next_index"]]; state["next_index"] += 1
+                if outcome[0] == "failure":
+                    result = outcome[1]; self._history_add_result(upload_batch.batch_id, result); upload_batch.add(result)
+                    self._submit_progress_embed(state["live_messages"], upload_batch)
+                elif outcome[0] == "uploaded":
+                    _, result, enrichment, display_name = outcome; summary = None
+                    if enrichment and not enrichment.cancelled():
+                        try: summary = enrichment.result()
+                        except Exception as e: print(f"StateManager: Could not enrich {result.link}: {e}")
+                    if summary:
+                        result.is_cm = bool(summary.get("is_cm")); result.players = list(summary.get("players") or [])
+                        if show_duration: result.duration = summary.get("duration")
+                    status(lm.get_string("upload_status_uploaded_with_duration", boss=display_name, duration=result.duration) if result.duration else lm.get_string("upload_status_uploaded", boss=display_name), "green")
+                    self._history_add_result(upload_batch.batch_id, result); upload_batch.add(result)
+                    self._submit_progress_embed(state["live_messages"], upload_batch)
+        def resolve_jobs() -> List[UploadJob]:
+            if profiler: profiler.start()
+            with section():
+                upload_batch.batch_id = self._history_start_batch(upload_title, show_duration)
+                state["live_messages"] = self._create_live_messages() # Uno por ruta: se publica con su primer resultado y se edita con los siguientes
+                if resolved_logs is not None: logs = resolved_logs
+                else: logs, upload_batch.incomplete_skipped = self._resolve_batch_logs(selected_bosses, since, batch.control)
+            jobs: List[UploadJob] = []
+            for encounter_type, boss_name, boss_logs in logs:
+                wing_key = self._get_wing_for_boss(encounter_type, boss_name) or "Unknown"
+                if not boss_logs: jobs.append(UploadJob(len(jobs), encounter_type, boss_name, wing_key))
+                for attempt, log_path in enumerate(boss_logs, start=1): jobs.append(UploadJob(len(jobs), encounter_type, boss_name, wing_key, log_path, attempt, len(boss_logs)))
+            state["total"] = len(jobs); state["resolved"] = True
+            return jobs
+        def skip_job(job: UploadJob):
+            with lock:
+                state["skipped"] += 1; outcomes[job.index] = ("skipped",)
+                if job.log_path: pending.append((job.encounter_type, job.boss_name, job.log_path))
+        def run_job(job: UploadJob):
+            if batch.control.is_cancelled: skip_job(job); return
+            try:
+                with section(): outcome = upload_job(job)
+            except Exception as e: # Sin resultado para este índice, complete_in_order se quedaría parado aquí
+                print(f"StateManager: Upload job failed for {job.display_name}: {e}"); import traceback; traceback.print_exc()
+                outcome = ("failure", UploadResult(job.boss_name, job.encounter_type, job.wing_key, message=f"Unexpected error: {e}",
+                                                  attempt=job.attempt if since is not None and job.log_path else None, file_name=os.path.basename(job.log_path or "")))
+            with lock: outcomes[job.index] = outcome; complete_in_order(block=False)
+        def upload_job(job: UploadJob) -> Tuple:
+            display_name = job.display_name
+            with lock: state["processed"] += 1; processed = state["processed"]
+            status(lm.get_string("upload_status_processing", count=processed, total=state["total"], boss=display_name))
+            result = UploadResult(job.boss_name, job.encounter_type, job.wing_key, attempt=job.attempt if since is not None and job.log_path else None)
+            if not job.log_path:
+                result.message = f"No se encontró log para {job.boss_name}"
+                status(f"{lm.get_string('general_warning')}: " + lm.get_string("upload_status_failed_log", message=result.message), "orange")
+                return ("failure", result)
+            upload_path, upload_name, result.file_hash = self._resolve_upload_file(job.log_path); result.file_name = os.path.basename(job.log_path)
+            hasher = hashlib.sha1() if not result.file_hash else None; timing = UploadTiming(); started = time.monotonic()
+            success, message, link = self.log_uploader.upload_log_to_dps_report(upload_path, upload_name=upload_name, control=batch.control, hasher=hasher, timing=timing)
+            if success and hasher is not None: result.file_hash = hasher.hexdigest()
+            if success: self.log_uploader.discard_restored_log(job.log_path) # Si venía del archivo (modo sesión), ya no hace falta
+            if success: # Sin el tiempo en pausa ni el frenado por el límite (la estimación ya aplica el límite vigente)
+                try: self.upload_estimator.record(os.path.getsize(upload_path), time.monotonic() - started - timing.waited_seconds)
+                except OSError: pass
+            if not success and message == UPLOAD_CANCELLED_MESSAGE:
+                with lock: state["skipped"] += 1; pending.append((job.encounter_type, job.boss_name, job.log_path))
+                return ("skipped",)
+            if not success and is_transient_failure(message):
+                with lock: parked.append((job.encounter_type, job.boss_name, job.log_path))
+                status(lm.get_string("upload_status_queued", boss=display_name, message=message), "orange"); return ("parked",)
+            if success:
+                # getJson (CM, jugadores y duración) corre en paralelo con las siguientes subidas; el resultado se completa en orden
+                with lock: state["uploaded"] += 1
+                result.link = link or ""; result.success = True
+                enrichment = self.log_uploader.enricher.submit(link) if link and not batch.control.is_cancelled else None
+                return ("uploaded", result, enrichment, display_name)
+            status(lm.get_string("upload_status_failed_log", message=message or "Error desconocido"), "red")
+            result.message = message or ""
+            return ("failure", result)
+        def on_finished():
+            try:
+                with section():
+                    with lock: complete_in_order(block=True)
+                    live_messages = state["live_messages"]
+                    if batch.control.is_cancelled:
+                        if not state["resolved"] and resolved_logs: pending.extend((etype, boss, path) for etype, boss, paths in resolved_logs for path in paths) # Cancelado antes de empezar
+                        status(lm.get_string("upload_status_cancelled", uploaded=state["uploaded"], skipped=state["skipped"]), "orange")
+                        if pending and self._shutting_down.is_set(): self._park_uploads(pending, show_duration, upload_title, since, reason="shutdown")
+                        self._park_uploads(parked, show_duration, upload_title, since, reason="outage")
+                        if state["uploaded"]: self._publish_or_park(upload_batch, live_messages)
+                        return
+                    status(lm.get_string("upload_status_complete", total=state["total"]), "green")
+                    if upload_batch.incomplete_skipped: status(lm.get_string("upload_status_incomplete_skipped", count=upload_batch.incomplete_skipped), "orange")
+                    self._park_uploads(parked, show_duration, upload_title, since, reason="outage")
+                    self._publish_or_park(upload_batch, live_messages)
+            finally:
+                if profiler: profiler.stop()
+                with self._active_uploads_lock: self._active_uploads -= 1; self._upload_controls.discard(batch.control); self._uploads_idle.notify_all()
+        batch = ScheduledBatch(label, resolve_jobs, run_job, on_finished, skip_job=skip_job, max_in_flight=1 if profiler else None)
+        batch.payload = upload_batch # Resultados en vivo (para consultar el estado del lote)
+        return batch
+
+    def _create_live_messages(self) -> Optional[Dict[int, Any]]:
+        """Mensajes en vivo del lote por canal, creados con el primer éxito de cada ruta (None si el bot no está listo)."""
+        bot = self.discord_bot
+        if not bot or not bot.is_ready(): return None
+        return {}
+
+    def _channel_routes(self) -> Dict[Tuple[str, Optional[str]], int]:
+        return parse_channel_routes(self.config.get("channel_routes"))
+
+    def _route_batch(self, upload_batch: UploadBatch) -> Dict[int, UploadBatch]:
+        """
+        Sub-lote de resultados por canal de Discord según channel_routes. Con varias rutas solo se publican
+        las que tienen algún éxito (el embed no muestra fallos); la misma regla vale en vivo y al final.
+        """
+        routes = route_batch(upload_batch, self._channel_routes(), self.discord_bot.target_channel_id)
+        if len(routes) > 1: routes = {channel_id: route for channel_id, route in routes.items() if route.has_successes} or {self.discord_bot.target_channel_id: upload_batch} # Sin éxitos: como sin rutas
+        return routes
+
+    def _submit_progress_embed(self, live_messages: Optional[Dict[int, Any]], upload_batch: UploadBatch):
+        """Actualiza los mensajes en vivo (uno por ruta) con los resultados obtenidos hasta ahora (sin esperar a Discord)."""
+        bot = self.discord_bot
+        if live_messages is None or not bot or not bot.is_ready(): return
+        final_embed_title = upload_batch.title if upload_batch.title else self.loc_manager.get_string("embed_title_default")
+        try:
+            for channel_id, route in self._route_batch(upload_batch).items():
+                result_count = len(route.failures) + len(route.successes)
+                live_message = live_messages.get(channel_id)
+                if live_message is None:
+                    if not route.has_successes: continue # Solo fallos todavía: el embed diría "sin historial"; se publica con el primer éxito
+                    live_message = live_messages[channel_id] = bot.create_live_message(channel_id)
+                if live_message is None or live_message.shown_results == result_count: continue # Ruta sin canal o sin cambios
+                embed = bot.format_embed(route, loc_manager=self.loc_manager, title_prefix=final_embed_title)
+                if embed and bot.submit_live_embed(live_message, embed): live_message.shown_results = result_count
+        except Exception as e: print(f"StateManager: Could not update live Discord message: {e}")
+
+    def _publish_results(self, upload_batch: UploadBatch, live_messages: Optional[Dict[int, Any]] = None) -> bool:
+        """
+        Formatea y envía a Discord un embed de resultados por ruta (channel_routes), todos a la vez.
+        Si una ruta ya publicó un mensaje en vivo, se edita ese mismo mensaje con el resultado final.
+        Devuelve True si se enviaron todos.
+        """
+        lm = self.loc_manager; send_success = False
         bot_loop = getattr(self.discord_bot, '_bot_loop', None) if self.discord_bot else None
         if bot_loop and bot_loop.is_running() and not bot_loop.is_closed() and self.discord_bot.is_ready():
             discord_msg = lm.get_string("upload_status_sending_discord"); self._update_ui_status(discord_msg, "blue"); self.log_to_ui(discord_msg)
-            final_embed_title = upload_title if upload_title else lm.get_string("embed_title_default")
-            embed = self.discord_bot.format_embed(upload_results_for_embed, all_failures, loc_manager=lm, title_prefix=final_embed_title)
-            if embed:
-                future = asyncio.run_coroutine_threadsafe(self.discord_bot.send_embed_message(embed), bot_loop)
-                try: send_success = future.result(timeout=15); discord_status = lm.get_string("upload_status_sent_discord") if send_success else lm.get_string("upload_status_error_discord_send"); color = "green" if send_success else "red"
+            final_embed_title = upload_batch.title if upload_batch.title else lm.get_string("embed_title_default")
+            routes = self._route_batch(upload_batch); live_messages = live_messages or {}
+            sends = [(channel_id, self.discord_bot.format_embed(route, loc_manager=lm, title_prefix=final_embed_title), live_messages.get(channel_id)) for channel_id, route in routes.items()]
+            sends = [send for send in sends if send[1]]
+            if sends:
+                future = asyncio.run_coroutine_threadsafe(self.discord_bot.publish_routes(sends), bot_loop)
+                try:
+                    sent = future.result(timeout=DISCORD_PUBLISH_TIMEOUT_SECONDS) # Todas las rutas en paralelo: un único plazo
+                    if len(sent) > 1:
+                        for channel_id, ok in sent.items():
+                            label = self.discord_bot.channel_label(channel_id)
+                            self.log_to_ui(self.get_localized_string("log_discord_route_sent" if ok else "log_discord_route_failed", channel=label, default=f"{label}: {'sent' if ok else 'failed'}"))
+                    send_success = all(sent.values()); sent_count = sum(sent.values())
+                    if send_success: discord_status = lm.get_string("upload_status_sent_discord"); color = "green"
+                    elif sent_count: discord_status = lm.get_string("upload_status_discord_partial", sent=sent_count, total=len(sent)); color = "orange"
+                    else: discord_status = lm.get_string("upload_status_error_discord_send"); color = "red"
                 except asyncio.TimeoutError: discord_status = lm.get_string("upload_status_error_discord_timeout"); color = "red"
                 except RuntimeError as e: discord_status = lm.get_string("general_error") + f" (loop cerrado?): {type(e).__name__}"; color = "red"
                 except Exception as e: discord_status = lm.get_string("general_error") + f": {e}"; color = "red"
@@ -256,7 +860,32 @@ class StateManager:
         elif self.discord_bot and not self.discord_bot.is_ready(): discord_status = lm.get_string("upload_status_error_discord_not_ready"); color = "orange"
         else: discord_status = lm.get_string("upload_status_error_discord_disconnected"); color = "orange"
         self._update_ui_status(discord_status, color); self.log_to_ui(discord_status)
-        if self.ui_app and hasattr(self.ui_app, 'selection_frame'): self.ui_app.after(0, lambda: self.ui_app.selection_frame.enable_upload_buttons())
+        return send_success
+
+    # --- Historial de subidas ---
+    def _history_start_batch(self, upload_title: str, show_duration: bool) -> Optional[int]:
+        try: return self.history_store.start_batch(upload_title, show_duration)
+        except Exception as e: print(f"StateManager: Could not record batch in history: {e}"); return None
+
+    def _history_add_result(self, batch_id: Optional[int], result: UploadResult):
+        if batch_id is None: return
+        try: self.history_store.add_result(batch_id, result)
+        except Exception as e: print(f"StateManager: Could not record result in history: {e}")
+
+    def get_recent_batches(self, limit: int = 10) -> List[Dict]:
+        """Últimos N lotes subidos (id, fecha, título, éxitos, total)."""
+        return self.history_store.last_batches(limit)
+
+    def get_boss_links(self, boss_name: str, since: Optional[float] = None, encounter_type: Optional[str] = None) -> List[Dict]:
+        """Enlaces de un boss desde 'since' (por defecto, esta semana)."""
+        return self.history_store.links_for_boss(boss_name, since=since, encounter_type=encounter_type)
+
+    def repost_batch(self, batch_id: int):
+        """Vuelve a publicar en Discord el embed de un lote del historial, sin volver a subir los logs."""
+        upload_batch = self.history_store.get_batch(batch_id)
+        if not upload_batch: self.log_to_ui(self.get_localized_string("history_batch_not_found", batch_id=batch_id, default=f"Batch {batch_id} not found in history.")); return
+        self.log_to_ui(self.get_localized_string("history_reposting_batch", batch_id=batch_id, default=f"Re-posting batch {batch_id} to Discord..."))
+        threading.Thread(target=self._publish_results, args=(upload_batch,), daemon=True).start()
 
     # --- Métodos para actualizar la UI ---
     def _update_ui_status(self, message: str, color: str = "gray"):
@@ -0,0 +1,49 @@
+import threading
+
+PAUSE_POLL_SECONDS = 0.1
+
+class UploadCancelled(Exception):
+    """Se lanza dentro de la subida cuando el usuario cancela el lote."""
+
+
+class UploadControl:
+    """
+    Control cooperativo de un lote de subida: cancelar y pausar/reanudar.
+    El worker y el stream de subida llaman a check() en cada paso.
+    """
+
+    def __init__(self):
+        self._cancel_event = threading.Event()
+        self._running_event = threading.Event(); self._running_event.set() # Activo = no pausado
+
+    def cancel(self):
+        self._cancel_event.set(); self._running_event.set() # Despertar a quien esté en pausa
+
+    def pause(self):
+        if not self._cancel_event.is_set(): self._running_event.clear()
+
+    def resume(self):
+        self._running_event.set()
+
+    def toggle_pause(self) -> bool:
+        """Alterna pausa/reanudación. Devuelve True si queda en pausa."""
+        if self.is_paused: self.resume()
+        else: self.pause()
+        return self.is_paused
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    @property
+    def is_paused(self) -> bool:
+        return not self._running_event.is_set()
+
+    def wait_cancelled(self, timeout: float) -> bool:
+        """Espera hasta 'timeout' segundos a una cancelación. Devuelve True si se canceló."""
+        return self._cancel_event.wait(timeout)
+
+    def check(self):
+        """Bloquea mientras el lote esté en pausa y lanza UploadCancelled si se cancela."""
+        while not self._running_event.wait(PAUSE_POLL_SECONDS): pass
+        if self._cancel_event.is_set(): raise UploadCancelled()
@@ -0,0 +1,166 @@
+import itertools
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from .upload_control import UploadControl
+
+DEFAULT_UPLOAD_WORKERS = 2 # Subidas simultáneas en total (todos los lotes comparten el pool)
+SCHEDULER_IDLE_POLL_SECONDS = 0.25 # Espera máxima sin trabajo ejecutable (p. ej. todos los lotes en pausa)
+
+class ScheduledBatch:
+    """
+    Lote encolado en UploadScheduler. El planificador no sabe qué es una subida: solo ejecuta
+    resolve_jobs() una vez, después run_job(trabajo) por cada trabajo, skip_job(trabajo) por los que
+    no llegan a empezar por una cancelación y, al final, on_finished() una sola vez.
+    """
+
+    def __init__(self, label: str, resolve_jobs: Callable[[], List[Any]], run_job: Callable[[Any], None],
+                 on_finished: Callable[[], None], skip_job: Optional[Callable[[Any], None]] = None,
+                 control: Optional[UploadControl] = None, max_in_flight: Optional[int] = None):
+        self.key = 0 # Lo asigna el planificador
+        self.label = label
+        self.resolve_jobs = resolve_jobs
+        self.run_job = run_job
+        self.on_finished = on_finished
+        self.skip_job = skip_job
+        self.control = control or UploadControl()
+        self.max_in_flight = max_in_flight # Tope de trabajos simultáneos de este lote (None = los que permita el pool)
+        self.payload: Any = None # Datos del llamador asociados al lote (p. ej. sus resultados)
+        self.total = 0
+        self.completed = 0
+        self.resolved = False
+        self._jobs: Deque[Any] = deque()
+        self._in_flight = 0
+        self._finishing = False
+
+    @property
+    def progress(self) -> Dict[str, Any]:
+        return {"key": self.key, "label": self.label, "completed": self.completed, "total": self.total, "resolved": self.resolved,
+                "paused": self.control.is_paused, "cancelled": self.control.is_cancelled}
+
+
+class UploadScheduler:
+    """
+    Planificador de lotes de subida sobre un pool fijo de hilos. Se pueden encolar lotes mientras
+    otros están en curso; los trabajos se reparten por turnos (round-robin) entre los lotes activos,
+    así que un lote pequeño no espera a que termine uno grande. Los lotes en pausa no reciben trabajos
+    nuevos, pero una subida ya en curso sigue ocupando su hilo (bloqueada en control.check()) hasta que
+    se reanude o se cancele; los cancelados descartan lo que no haya empezado.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_UPLOAD_WORKERS, on_batch_progress: Optional[Callable[[ScheduledBatch], None]] = None,
+                 on_batch_removed: Optional[Callable[[ScheduledBatch], None]] = None):
+        self.max_workers = max(1, max_workers)
+        self.on_batch_progress = on_batch_progress
+        self.on_batch_removed = on_batch_removed
+        self._batches: Deque[ScheduledBatch] = deque() # Orden de turno: el primero es el siguiente en recibir hilo
+        self._keys = itertools.count(1)
+        self._cond = threading.Condition()
+        self._workers: List[threading.Thread] = []
+        self._stopped = False
+
+    def submit(self, batch: ScheduledBatch) -> ScheduledBatch:
+        """Encola un lote y devuelve el mismo objeto con su clave asignada."""
+        with self._cond:
+            if self._stopped: raise RuntimeError("UploadScheduler is stopped")
+            batch.key = next(self._keys); self._batches.append(batch); self._ensure_workers_locked(); self._cond.notify_all()
+        self._notify_progress(batch)
+        return batch
+
+    def get(self, key: int) -> Optional[ScheduledBatch]:
+        with self._cond: return next((b for b in self._batches if b.key == key), None)
+
+    def active_batches(self) -> List[ScheduledBatch]:
+        """Lotes aún no terminados, por orden de llegada."""
+        with self._cond: return sorted(self._batches, key=lambda b: b.key)
+
+    def wake(self):
+        """Despierta a los hilos (p. ej. tras reanudar o cancelar un lote)."""
+        with self._cond: self._cond.notify_all()
+
+    def stop(self, timeout: float = 0.0):
+        """No admite más lotes y detiene los hilos en cuanto terminen lo que tengan entre manos."""
+        with self._cond: self._stopped = True; workers = list(self._workers); self._cond.notify_all()
+        for worker in workers:
+            if timeout > 0: worker.join(timeout=timeout)
+
+    def _ensure_workers_locked(self):
+        self._workers = [w for w in self._workers if w.is_alive()]
+        while len(self._workers) < self.max_workers:
+            worker = threading.Thread(target=self._worker_loop, name=f"UploadWorker-{len(self._workers) + 1}", daemon=True)
+            self._workers.append(worker); worker.start()
+
+    def _next_task_locked(self):
+        """Siguiente tarea (tipo, lote, trabajo) por turnos entre los lotes, o None si no hay nada ejecutable ahora."""
+        for _ in range(len(self._batches)):
+            batch = self._batches[0]; self._batches.rotate(-1) # El lote atendido pasa al final del turno
+            if batch._finishing: continue
+            if batch.control.is_cancelled and batch._jobs:
+                skipped = list(batch._jobs); batch._jobs.clear(); batch._in_flight += 1; return ("skip", batch, skipped) # Cuenta como en curso: el lote no termina hasta saltarlos
+            if batch.resolved and not batch._jobs and batch._in_flight == 0:
+                batch._finishing = True; return ("finish", batch, None)
+            if batch.control.is_cancelled and not batch.resolved and batch._in_flight == 0:
+                batch.resolved = True; batch._finishing = True; return ("finish", batch, None)
+            if batch.control.is_paused or (batch.max_in_flight and batch._in_flight >= batch.max_in_flight): continue
+            if not batch.resolved:
+                if batch._in_flight: continue # Otro hilo lo está resolviendo
+                batch._in_flight += 1; return ("resolve", batch, None)
+            if batch._jobs: batch._in_flight += 1; return ("job", batch, batch._jobs.popleft())
+        return None
+
+    def _worker_loop(self):
+        while True:
+            with self._cond:
+                task = self._next_task_locked()
+                while task is None:
+                    if self._stopped: return
+                    self._cond.wait(timeout=SCHEDULER_IDLE_POLL_SECONDS); task = self._next_task_locked()
+            kind, batch, payload = task
+            try:
+                if kind == "resolve": self._run_resolve(batch)
+                elif kind == "job": self._run_job(batch, payload)
+                elif kind == "skip": self._run_skips(batch, payload)
+                else: self._run_finish(batch)
+            except Exception as e: print(f"UploadScheduler: Unexpected error in batch {batch.key} ({kind}): {e}")
+
+    def _run_resolve(self, batch: ScheduledBatch):
+        jobs: List[Any] = []
+        try: jobs = list(batch.resolve_jobs() or [])
+        except Exception as e: print(f"UploadScheduler: Could not resolve jobs for batch {batch.key}: {e}")
+        finally:
+            with self._cond: batch._jobs.extend(jobs); batch.total = len(jobs); batch.resolved = True; batch._in_flight -= 1; self._cond.notify_all()
+        self._notify_progress(batch)
+
+    def _run_job(self, batch: ScheduledBatch, job: Any):
+        try: batch.run_job(job)
+        except Exception as e: print(f"UploadScheduler: Job failed in batch {batch.key}: {e}")
+        finally:
+            with self._cond: batch._in_flight -= 1; batch.completed += 1; self._cond.notify_all()
+        self._notify_progress(batch)
+
+    def _run_skips(self, batch: ScheduledBatch, jobs: List[Any]):
+        try:
+            for job in jobs:
+                try:
+                    if batch.skip_job: batch.skip_job(job)
+                except Exception as e: print(f"UploadScheduler: Could not skip job in batch {batch.key}: {e}")
+        finally:
+            with self._cond: batch._in_flight -= 1; batch.completed += len(jobs); self._cond.notify_all()
+        self._notify_progress(batch)
+
+    def _run_finish(self, batch: ScheduledBatch):
+        try: batch.on_finished()
+        except Exception as e: print(f"UploadScheduler: Error finishing batch {batch.key}: {e}")
+        finally:
+            with self._cond:
+                if batch in self._batches: self._batches.remove(batch)
+                self._cond.notify_all()
+            if self.on_batch_removed:
+                try: self.on_batch_removed(batch)
+                except Exception as e: print(f"UploadScheduler: Error in batch-removed callback: {e}")
+
+    def _notify_progress(self, batch: ScheduledBatch):
+        if not self.on_batch_progress: return
+        try: self.on_batch_progress(batch)
+        except Exception as e: print(f"UploadScheduler: Error in progress callback: {e}")
@@ -1,6 +1,10 @@
 import os
 import sys
+import json
 import platform
+import tempfile
+import datetime
+from typing import Optional
 
 APP_NAME = "zenLogBOT"
 
@@ -34,6 +38,45 @@ def get_config_file_path() -> str:
     """Obtiene la ruta completa al archivo config.json en AppData."""
     return os.path.join(get_app_data_path(), "config.json")
 
+def get_app_data_subdir(name: str) -> str:
+    """Obtiene (y crea) una subcarpeta dentro de la carpeta de datos de la aplicación."""
+    path = os.path.join(get_app_data_path(), name)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def atomic_write_json(file_path: str, data, indent: int = 2):
+    """
+    Escribe un JSON de forma atómica: primero en un temporal del mismo directorio
+    y luego os.replace, para no dejar nunca un fichero a medio escribir.
+    """
+    directory = os.path.dirname(file_path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp_", suffix=".json", dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=indent)
+            f.flush(); os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        try: os.remove(tmp_path)
+        except OSError: pass
+        raise
+
+def parse_session_start(text: str, now: Optional[datetime.datetime] = None) -> Optional[float]:
+    """
+    Convierte la hora de inicio de una sesión en timestamp.
+    Acepta "HH:MM" (hoy, o ayer si esa hora aún no ha llegado) o "YYYY-MM-DD HH:MM". Devuelve None si no es válida.
+    """
+    text = (text or "").strip(); now = now or datetime.datetime.now()
+    for fmt in ("%Y-%m-%d %H:%M", "%Y-%m-%d %H:%M:%S"):
+        try: return datetime.datetime.strptime(text, fmt).timestamp()
+        except ValueError: pass
+    try: parsed_time = datetime.datetime.strptime(text, "%H:%M").time()
+    except ValueError: return None
+    start = datetime.datetime.combine(now.date(), parsed_time)
+    if start > now: start -= datetime.timedelta(days=1) # Sesión que empezó antes de medianoche
+    return start.timestamp()
+
 def get_bundled_data_path(relative_path: str) -> str:
     """
     Obtiene la ruta absoluta a un archivo de datos, manejando
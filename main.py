@@ -3,22 +3,31 @@
 import os
 import json
 import sys
+import multiprocessing
 
 # La función ensure_data_files_exist se elimina, StateManager maneja config.json
 # y LocalizationManager/LogUploader manejan la carga de datos empaquetados.
 
 # Función para manejar el cierre de la ventana
 def on_closing(app_instance, manager_instance):
-    """Llamado cuando se intenta cerrar la ventana."""
+    """
+    Llamado cuando se intenta cerrar la ventana. La ventana se cierra ya; la limpieza
+    (subidas pendientes, bot, conexiones) sigue en un hilo no daemon con un plazo máximo,
+    así que el proceso termina en cuanto acaba o vence el plazo.
+    """
     print("Cerrando la aplicación...")
+    try: app_instance.withdraw() # Ocultar la ventana de inmediato
+    except Exception: pass
     if manager_instance:
-        manager_instance.shutdown() # Llama al shutdown del StateManager
+        manager_instance.shutdown(background=True) # Llama al shutdown del StateManager (en segundo plano)
     app_instance.destroy() # Cierra la ventana de Tkinter
     print("Ventana cerrada.")
-    # sys.exit() # Opcional: forzar salida si hay hilos no daemon
 
 
 if __name__ == "__main__":
+    # Necesario para el pool de procesos de preparación de logs en el ejecutable de PyInstaller
+    multiprocessing.freeze_support()
+
     # Cambiar al directorio del script para que las rutas relativas funcionen
     # para PyInstaller (_MEIPASS) y ejecución normal.
     if getattr(sys, 'frozen', False):
@@ -35,22 +44,27 @@ if __name__ == "__main__":
         os.chdir(application_path) # Cambiar CWD al directorio del script
         print(f"Running as script from: {application_path}")
 
+    # --profile: perfila el arranque y todos los lotes de subida (volcados en AppData/profiles)
+    profile_enabled = "--profile" in sys.argv
+
     # Importar clases después de asegurar directorio (si aplica)
+    from core.profiling import profiling_session
     from core.state_manager import StateManager
     from ui.app import App
 
-    print("Iniciando StateManager...")
-    # StateManager ahora carga/crea config.json en AppData
-    state_manager = StateManager()
+    with profiling_session("startup", enabled=profile_enabled):
+        print("Iniciando StateManager...")
+        # StateManager ahora carga/crea config.json en AppData
+        state_manager = StateManager(profiling=profile_enabled)
 
-    print("Iniciando Aplicación UI...")
-    app = App(state_manager=state_manager)
+        print("Iniciando Aplicación UI...")
+        app = App(state_manager=state_manager)
 
-    # Conectar la instancia de la UI al StateManager
-    print("Conectando UI y StateManager...")
-    state_manager.set_ui_app(app)
-    # Pasar el método de logging de la UI al StateManager
-    state_manager.set_ui_logger(app.log_message)
+        # Conectar la instancia de la UI al StateManager
+        print("Conectando UI y StateManager...")
+        state_manager.set_ui_app(app)
+        # Pasar el método de logging de la UI al StateManager
+        state_manager.set_ui_logger(app.log_message)
 
     # Configurar el manejador de cierre de ventana
     app.protocol("WM_DELETE_WINDOW", lambda: on_closing(app, state_manager))
@@ -7,6 +7,8 @@ from typing import TYPE_CHECKING, Optional
 # Importar state manager con importación absoluta
 if TYPE_CHECKING:
     from core.state_manager import StateManager # Cambiado
+from core.log_uploader import LOG_ROOTS_SEPARATOR, get_log_roots
+from core.log_archive import DEFAULT_ARCHIVE_MAX_AGE_DAYS
 
 class ConfigView(ctk.CTkFrame):
     """Vista para configurar el token del bot, ID de canal, idioma y la ruta de logs."""
@@ -38,7 +40,7 @@ class ConfigView(ctk.CTkFrame):
         self.path_label.grid(row=2, column=0, padx=(20, 5), pady=5, sticky="w")
         self.path_entry = ctk.CTkEntry(self, placeholder_text=self.get_string("config_log_path_placeholder"), width=300)
         self.path_entry.grid(row=2, column=1, padx=(5, 5), pady=5, sticky="ew")
-        self.path_entry.insert(0, self.current_config.get("log_folder_path", ""))
+        self.path_entry.insert(0, LOG_ROOTS_SEPARATOR.join(get_log_roots(self.current_config)))
         self.browse_button = ctk.CTkButton(self, text=self.get_string("config_browse_button"), width=100, command=self.browse_folder)
         self.browse_button.grid(row=2, column=2, padx=(5, 20), pady=5, sticky="w")
 
@@ -61,13 +63,25 @@ class ConfigView(ctk.CTkFrame):
         current_lang_display = self.reverse_lang_map.get(current_lang_code, "English")
         self.lang_combobox.set(current_lang_display)
 
+        # --- Archivo de logs antiguos ---
+        self.archive_label = ctk.CTkLabel(self, text=self.get_string("config_archive_label"))
+        self.archive_label.grid(row=5, column=0, padx=(20, 5), pady=5, sticky="w")
+        self.archive_frame = ctk.CTkFrame(self, fg_color="transparent")
+        self.archive_frame.grid(row=5, column=1, columnspan=2, padx=(5, 20), pady=5, sticky="ew")
+        self.archive_var = ctk.BooleanVar(value=bool(self.current_config.get("archive_enabled", False)))
+        self.archive_checkbox = ctk.CTkCheckBox(self.archive_frame, text=self.get_string("config_archive_checkbox"), variable=self.archive_var)
+        self.archive_checkbox.pack(side="left")
+        self.archive_days_entry = ctk.CTkEntry(self.archive_frame, width=60)
+        self.archive_days_entry.pack(side="left", padx=(10, 0))
+        self.archive_days_entry.insert(0, str(self.current_config.get("archive_max_age_days", DEFAULT_ARCHIVE_MAX_AGE_DAYS)))
+
         # --- Botón Guardar ---
         self.save_button = ctk.CTkButton(self, text=self.get_string("config_save_button"), command=self.save_button_action)
-        self.save_button.grid(row=5, column=0, columnspan=3, padx=20, pady=(20, 10), sticky="ew")
+        self.save_button.grid(row=6, column=0, columnspan=3, padx=20, pady=(20, 10), sticky="ew")
 
         # --- Mensaje de Estado ---
         self.status_label = ctk.CTkLabel(self, text="", text_color="green")
-        self.status_label.grid(row=6, column=0, columnspan=3, padx=20, pady=(0, 10), sticky="ew")
+        self.status_label.grid(row=7, column=0, columnspan=3, padx=20, pady=(0, 10), sticky="ew")
 
     def get_string(self, key: str, **kwargs) -> str:
         """Obtiene la cadena localizada o la clave si falla."""
@@ -75,16 +89,19 @@ class ConfigView(ctk.CTkFrame):
         return key
 
     def browse_folder(self):
-        """Abre un diálogo para seleccionar la carpeta de logs."""
-        initial_dir = self.path_entry.get()
+        """Abre un diálogo para elegir una carpeta de logs y la añade a las ya configuradas (si no estaba)."""
+        current_paths = [p.strip() for p in self.path_entry.get().split(LOG_ROOTS_SEPARATOR) if p.strip()]
+        initial_dir = current_paths[-1] if current_paths else ""
         if not os.path.isdir(initial_dir): initial_dir = "/"
         folder_path = filedialog.askdirectory(
             title=self.get_string("config_browse_dialog_title"),
             initialdir=initial_dir
         )
         if folder_path:
+            folder_path = os.path.normpath(folder_path)
+            if os.path.normcase(folder_path) not in (os.path.normcase(os.path.normpath(p)) for p in current_paths): current_paths.append(folder_path)
             self.path_entry.delete(0, ctk.END)
-            self.path_entry.insert(0, folder_path)
+            self.path_entry.insert(0, LOG_ROOTS_SEPARATOR.join(current_paths))
             self.status_label.configure(text="")
 
     def language_changed(self, choice):
@@ -97,12 +114,15 @@ class ConfigView(ctk.CTkFrame):
             self.status_label.configure(text="Error: StateManager no disponible.", text_color="red")
             return
 
+        log_roots = [p.strip() for p in self.path_entry.get().split(LOG_ROOTS_SEPARATOR) if p.strip()]
         data_to_save = {
             "discord_token": self.token_entry.get().strip(),
             "target_channel_id": self.channel_id_entry.get().strip(),
-            "log_folder_path": self.path_entry.get().strip(),
+            "log_folder_path": log_roots[0] if log_roots else "",
+            "log_folder_paths": log_roots,
             "dps_report_user_token": self.dps_token_entry.get().strip(),
-            "language": self.lang_map.get(self.lang_combobox.get(), "en")
+            "language": self.lang_map.get(self.lang_combobox.get(), "en"),
+            "archive_enabled": bool(self.archive_var.get())
         }
 
         if not data_to_save["discord_token"]:
@@ -111,7 +131,7 @@ class ConfigView(ctk.CTkFrame):
         if not data_to_save["target_channel_id"]:
              self.status_label.configure(text=self.get_string("config_status_error_channel_id"), text_color="red")
              return
-        if not data_to_save["log_folder_path"] or not os.path.isdir(data_to_save["log_folder_path"]):
+        if not log_roots or not all(os.path.isdir(root) for root in log_roots):
              self.status_label.configure(text=self.get_string("config_status_error_log_path"), text_color="red")
              return
         try:
@@ -119,6 +139,12 @@ class ConfigView(ctk.CTkFrame):
         except ValueError:
             self.status_label.configure(text=self.get_string("config_status_error_channel_id_numeric"), text_color="red")
             return
+        try:
+            data_to_save["archive_max_age_days"] = int(self.archive_days_entry.get().strip())
+            if data_to_save["archive_max_age_days"] < 1: raise ValueError
+        except ValueError:
+            self.status_label.configure(text=self.get_string("config_status_error_archive_days"), text_color="red")
+            return
 
         save_successful = self.state_manager.save_configuration(data_to_save)
 
@@ -139,6 +165,8 @@ class ConfigView(ctk.CTkFrame):
         self.dps_token_label.configure(text=self.get_string("config_dps_token_label"))
         self.dps_token_entry.configure(placeholder_text=self.get_string("config_dps_token_placeholder"))
         self.lang_label.configure(text=self.get_string("config_language_label"))
+        self.archive_label.configure(text=self.get_string("config_archive_label"))
+        self.archive_checkbox.configure(text=self.get_string("config_archive_checkbox"))
         self.save_button.configure(text=self.get_string("config_save_button"))
 
 # --- Para pruebas directas de esta vista ---
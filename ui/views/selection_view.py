@@ -2,12 +2,19 @@ import customtkinter as ctk
 import json
 import os
 import sys # Importar sys para la ruta del icono
-from typing import Dict, List, TYPE_CHECKING, Optional
+from typing import Dict, List, Iterator, TYPE_CHECKING, Optional
 
 # Importar state manager y utils con importación absoluta
 if TYPE_CHECKING:
     from core.state_manager import StateManager # Cambiado
-from core.utils import get_bundled_data_path # Cambiado
+from core.utils import get_bundled_data_path, parse_session_start # Cambiado
+from core.presets import build_preset_selection
+from core.batch_planner import BatchPlan, format_duration, format_size
+
+BUILD_WIDGETS_PER_TICK = 12 # Widgets creados por cada iteración del mainloop al construir una categoría
+THROUGHPUT_REFRESH_MS = 1000 # Refresco de la velocidad de subida mostrada
+PLAN_DEBOUNCE_MS = 250 # Espera tras el último cambio de selección antes de recalcular el plan
+PLAN_MAX_LISTED_LOGS = 40 # Logs listados en el plan (el resto se resume)
 
 class SelectionView(ctk.CTkFrame):
     """Vista para la selección visual de bosses/alas a subir."""
@@ -22,12 +29,17 @@ class SelectionView(ctk.CTkFrame):
             print("ERROR: StateManager o LogUploader no disponible en SelectionView para obtener definiciones.")
 
         self.checkbox_vars: Dict[str, Dict[str, Dict[str, ctk.BooleanVar]]] = {}
+        # Un frame por categoría, construido una sola vez y mostrado/ocultado según el filtro
+        self._category_frames: Dict[str, ctk.CTkFrame] = {}
+        self._pending_builds: Dict[str, Iterator[None]] = {}
+        self._visible_categories: List[str] = []
+        self._restored_ticks: Dict[str, set] = {} # Selección a conservar al reconstruir tras una recarga
         self.lm = self.state_manager.loc_manager if self.state_manager else None
 
         self.grid_columnconfigure(0, weight=1)
         self.grid_rowconfigure(0, weight=0); self.grid_rowconfigure(1, weight=0)
         self.grid_rowconfigure(2, weight=0); self.grid_rowconfigure(3, weight=1)
-        self.grid_rowconfigure(4, weight=0); self.grid_rowconfigure(5, weight=0)
+        self.grid_rowconfigure(4, weight=0); self.grid_rowconfigure(5, weight=0); self.grid_rowconfigure(6, weight=0); self.grid_rowconfigure(7, weight=0)
 
         # --- Título ---
         self.title_label = ctk.CTkLabel(self, text=self.get_string("upload_title"), font=ctk.CTkFont(size=16, weight="bold"))
@@ -45,6 +57,10 @@ class SelectionView(ctk.CTkFrame):
         self.preset_raid_fc7_button.grid(row=1, column=1, padx=5, pady=5, sticky="ew")
         self.preset_fractal_button = ctk.CTkButton(self.presets_frame, text=self.get_string("upload_preset_fractal_cms"), command=lambda: self.start_preset_upload("fractal_cms"))
         self.preset_fractal_button.grid(row=1, column=2, padx=5, pady=5, sticky="ew")
+        # Al pasar el ratón por un preset, el plan muestra lo que subiría ese preset
+        for button, preset_key in ((self.preset_raid_fc_all_button, "raid_fc_all"), (self.preset_raid_fc7_button, "raid_fc_7"), (self.preset_fractal_button, "fractal_cms")):
+            button.bind("<Enter>", lambda _event, key=preset_key: self._set_plan_preset(key), add="+")
+            button.bind("<Leave>", lambda _event: self._set_plan_preset(None), add="+")
 
         # --- Frame de Selección Específica por Categoría ---
         self.specific_category_frame = ctk.CTkFrame(self, fg_color="transparent")
@@ -75,11 +91,44 @@ class SelectionView(ctk.CTkFrame):
         self.show_duration_var = ctk.BooleanVar(value=False)
         self.duration_checkbox = ctk.CTkCheckBox(self.duration_frame, text=self.get_string("upload_show_duration_checkbox"), variable=self.show_duration_var)
         self.duration_checkbox.grid(row=0, column=0, padx=0, pady=5, sticky="w")
+        # Modo sesión: subir todos los intentos desde una hora dada
+        self.session_mode_var = ctk.BooleanVar(value=False)
+        self.session_checkbox = ctk.CTkCheckBox(self.duration_frame, text=self.get_string("upload_session_checkbox"), variable=self.session_mode_var, command=self.schedule_plan)
+        self.session_checkbox.grid(row=0, column=1, padx=(20, 5), pady=5, sticky="w")
+        self.session_start_entry = ctk.CTkEntry(self.duration_frame, placeholder_text=self.get_string("upload_session_placeholder"), width=140)
+        self.session_start_entry.grid(row=0, column=2, padx=0, pady=5, sticky="w")
+        self.session_start_entry.bind("<KeyRelease>", lambda _event: self.session_mode_var.get() and self.schedule_plan(), add="+")
 
         # --- Etiqueta de Estado/Progreso ---
         self.status_label = ctk.CTkLabel(self, text=self.get_string("upload_status_idle"), text_color="gray", wraplength=700)
         self.status_label.grid(row=5, column=0, padx=10, pady=(5, 10), sticky="ew")
 
+        # --- Controles del lote en curso (cancelar / pausar) ---
+        self.batch_controls_frame = ctk.CTkFrame(self, fg_color="transparent")
+        self.batch_controls_frame.grid(row=6, column=0, padx=10, pady=(0, 10), sticky="ew")
+        self.batch_controls_frame.grid_columnconfigure((0, 1), weight=1)
+        self.pause_button = ctk.CTkButton(self.batch_controls_frame, text=self.get_string("upload_pause_button"), state="disabled", command=self.pause_button_action)
+        self.pause_button.grid(row=0, column=0, padx=5, pady=0, sticky="ew")
+        self.cancel_button = ctk.CTkButton(self.batch_controls_frame, text=self.get_string("upload_cancel_button"), state="disabled", fg_color="firebrick", hover_color="darkred", command=self.cancel_button_action)
+        self.cancel_button.grid(row=0, column=1, padx=5, pady=0, sticky="ew")
+        self.throughput_label = ctk.CTkLabel(self.batch_controls_frame, text="", text_color="gray", anchor="e") # Velocidad de subida mientras hay lotes
+        self.throughput_label.grid(row=0, column=2, padx=5, pady=0, sticky="e")
+        self._batch_paused = False
+        self._throughput_job: Optional[str] = None
+
+        # --- Lotes en curso o en cola (uno por fila, con su progreso y sus propios controles) ---
+        self.batches_frame = ctk.CTkFrame(self, fg_color="transparent")
+        self.batches_frame.grid(row=7, column=0, padx=10, pady=(0, 10), sticky="ew")
+        self.batches_frame.grid_columnconfigure(0, weight=1)
+        self._batch_rows: Dict[int, Dict[str, ctk.CTkBaseClass]] = {}
+
+        # --- Plan del lote (qué se subiría y cuánto tardaría), recalculado en segundo plano ---
+        self.plan_textbox = ctk.CTkTextbox(self, height=120, wrap="none", text_color="gray")
+        self.plan_textbox.grid(row=8, column=0, padx=10, pady=(0, 10), sticky="ew")
+        self._set_plan_text(self.get_string("upload_plan_empty"))
+        self._plan_job: Optional[str] = None
+        self._plan_preset: Optional[str] = None
+
         self.specific_detail_frame_visible = False
 
     def show_specific_selection(self, category_filter: Optional[str] = None):
@@ -98,28 +147,60 @@ class SelectionView(ctk.CTkFrame):
         return key
 
     def _populate_checkboxes(self, category_filter: Optional[str] = None):
-        """Llena el frame scrollable con checkboxes, opcionalmente filtrados."""
-        for widget in self.scrollable_frame.winfo_children(): widget.destroy()
-        self.checkbox_vars = {}
+        """Muestra los frames de checkboxes de la categoría (o de todas), construyéndolos si hace falta."""
+        categories = [etype for etype in self.boss_definitions.keys() if not category_filter or etype == category_filter]
+        for etype in self._visible_categories:
+            if etype not in categories and etype in self._category_frames: self._category_frames[etype].grid_forget()
+        for index, etype in enumerate(categories):
+            frame = self._category_frames.get(etype)
+            if frame is None:
+                frame = ctk.CTkFrame(self.scrollable_frame, fg_color="transparent"); frame.grid_columnconfigure(0, weight=1)
+                self._category_frames[etype] = frame; self.checkbox_vars[etype] = {}
+                self._pending_builds[etype] = self._iter_category_widgets(etype, frame)
+                self.after_idle(self._build_step, etype)
+            frame.grid(row=index, column=0, sticky="ew")
+        self._visible_categories = categories
+        print(f"Checkboxes mostrados para filtro: {category_filter}")
+
+    def _iter_category_widgets(self, encounter_type: str, frame: ctk.CTkFrame) -> Iterator[None]:
+        """Crea los widgets de una categoría de uno en uno (cede el control tras cada widget)."""
         current_row = 0
-        for encounter_type, wings in self.boss_definitions.items():
-            if category_filter and encounter_type != category_filter: continue
-            type_label = ctk.CTkLabel(self.scrollable_frame, text=encounter_type.capitalize(), font=ctk.CTkFont(weight="bold"))
-            type_label.grid(row=current_row, column=0, padx=5, pady=(10, 2), sticky="w")
-            current_row += 1; self.checkbox_vars[encounter_type] = {}
-            for wing_name, bosses in wings.items():
-                wing_label = ctk.CTkLabel(self.scrollable_frame, text=f"  {wing_name}:")
-                wing_label.grid(row=current_row, column=0, padx=15, pady=2, sticky="w")
-                current_row += 1; self.checkbox_vars[encounter_type][wing_name] = {}
-                for boss_name in bosses.keys():
-                    var = ctk.BooleanVar()
-                    checkbox = ctk.CTkCheckBox(self.scrollable_frame, text=boss_name, variable=var)
-                    checkbox.grid(row=current_row, column=0, padx=30, pady=1, sticky="w")
-                    self.checkbox_vars[encounter_type][wing_name][boss_name] = var; current_row += 1
-        print(f"Checkboxes poblados para filtro: {category_filter}")
+        type_label = ctk.CTkLabel(frame, text=encounter_type.capitalize(), font=ctk.CTkFont(weight="bold"))
+        type_label.grid(row=current_row, column=0, padx=5, pady=(10, 2), sticky="w"); current_row += 1; yield
+        for wing_name, bosses in self.boss_definitions.get(encounter_type, {}).items():
+            wing_label = ctk.CTkLabel(frame, text=f"  {wing_name}:")
+            wing_label.grid(row=current_row, column=0, padx=15, pady=2, sticky="w"); current_row += 1
+            self.checkbox_vars[encounter_type][wing_name] = {}; yield
+            for boss_name in bosses.keys():
+                var = ctk.BooleanVar(value=boss_name in self._restored_ticks.get(encounter_type, ()))
+                checkbox = ctk.CTkCheckBox(frame, text=boss_name, variable=var, command=self.schedule_plan)
+                checkbox.grid(row=current_row, column=0, padx=30, pady=1, sticky="w"); current_row += 1
+                self.checkbox_vars[encounter_type][wing_name][boss_name] = var; yield
+
+    def _build_step(self, encounter_type: str):
+        """Construye unos pocos widgets y reprograma el resto para no bloquear el mainloop."""
+        builder = self._pending_builds.get(encounter_type)
+        if builder is None: return
+        try:
+            for _ in range(BUILD_WIDGETS_PER_TICK): next(builder)
+        except StopIteration:
+            del self._pending_builds[encounter_type]; print(f"Checkboxes construidos para: {encounter_type}")
+            if self._restored_ticks.get(encounter_type): self.schedule_plan() # Selección restaurada tras una recarga
+            return
+        self.after(1, self._build_step, encounter_type)
+
+    def set_boss_definitions(self, boss_definitions: Dict):
+        """Sustituye las definiciones (recarga en caliente) conservando la selección de los bosses que sigan existiendo."""
+        self._restored_ticks = {etype: set(bosses) for etype, bosses in self.get_selected_logs().items()}
+        for frame in self._category_frames.values(): frame.destroy()
+        self._category_frames = {}; self._pending_builds = {}; self.checkbox_vars = {}
+        self.boss_definitions = boss_definitions
+        visible = self._visible_categories; self._visible_categories = []
+        if self.specific_detail_frame_visible and visible:
+            self._populate_checkboxes(visible[0] if len(visible) == 1 else None)
 
     def get_selected_logs(self) -> Dict[str, List[str]]:
-        """Obtiene un diccionario de los bosses seleccionados de los checkboxes."""
+        """Obtiene un diccionario de los bosses seleccionados de los checkboxes (de todas las categorías ya construidas)."""
         selected = {}
         for encounter_type, wings in self.checkbox_vars.items():
             selected_in_type = []
@@ -129,30 +210,45 @@ class SelectionView(ctk.CTkFrame):
             if selected_in_type: selected[encounter_type] = selected_in_type
         return selected
 
+    # --- Plan del lote ---
+    def schedule_plan(self):
+        """Pide un plan nuevo cuando la selección deja de cambiar durante PLAN_DEBOUNCE_MS."""
+        if self._plan_job is not None: self.after_cancel(self._plan_job)
+        self._plan_job = self.after(PLAN_DEBOUNCE_MS, self._request_plan)
+
+    def _set_plan_preset(self, preset_key: Optional[str]):
+        self._plan_preset = preset_key; self.schedule_plan()
+
+    def _request_plan(self):
+        self._plan_job = None
+        selection = self._get_preset_boss_list(self._plan_preset) if self._plan_preset else self.get_selected_logs()
+        if not any(selection.values()): self._set_plan_text(self.get_string("upload_plan_empty")); return
+        since = parse_session_start(self.session_start_entry.get()) if self.session_mode_var.get() else None
+        if self.state_manager: self.state_manager.request_batch_plan(selection, since) # Responde con show_batch_plan
+
+    def _set_plan_text(self, text: str):
+        self.plan_textbox.configure(state="normal"); self.plan_textbox.delete("1.0", "end")
+        self.plan_textbox.insert("1.0", text); self.plan_textbox.configure(state="disabled")
+
+    def show_batch_plan(self, plan: BatchPlan):
+        """Muestra un plan calculado por el StateManager: resumen, huecos y un log por línea."""
+        logs = plan.logs
+        estimate = format_duration(plan.estimated_seconds) if logs else "-"
+        lines = [self.get_string("upload_plan_summary" if plan.estimate_measured else "upload_plan_summary_default_rate", files=len(logs), size=format_size(plan.total_bytes), eta=estimate)]
+        if plan.missing: lines.append(self.get_string("upload_plan_missing", bosses=", ".join(entry.boss_name for entry in plan.missing)))
+        if plan.stale: lines.append(self.get_string("upload_plan_stale", bosses=", ".join(entry.boss_name for entry in plan.stale)))
+        listed = 0
+        for entry in plan.entries:
+            for log in entry.logs:
+                if listed == PLAN_MAX_LISTED_LOGS: break
+                writing = f" {self.get_string('upload_plan_writing')}" if log.writing else ""
+                lines.append(f"  {entry.boss_name}: {os.path.basename(log.path)} · {format_size(log.size)} · {format_duration(log.age_seconds)}{writing}"); listed += 1
+        if len(logs) > listed: lines.append(self.get_string("upload_plan_more", count=len(logs) - listed))
+        self._set_plan_text("\n".join(lines))
+
     def _get_preset_boss_list(self, preset_key: str) -> Dict[str, List[str]]:
         """Construye la lista de bosses para un preset dado."""
-        preset_selection = {}
-        if preset_key == "raid_fc_all":
-            preset_selection["raids"] = []
-            raid_defs = self.boss_definitions.get("raids", {})
-            for wing in ["W1", "W2", "W3", "W4", "W5", "W6", "W7", "W8"]:
-                if wing in raid_defs: preset_selection["raids"].extend(raid_defs[wing].keys())
-        elif preset_key == "raid_fc_7":
-             preset_selection["raids"] = []
-             raid_defs = self.boss_definitions.get("raids", {})
-             for wing in ["W1", "W2", "W3", "W4", "W5", "W6", "W7"]:
-                 if wing in raid_defs: preset_selection["raids"].extend(raid_defs[wing].keys())
-        elif preset_key == "fractal_cms":
-            preset_selection["fractals"] = []
-            fractal_defs = self.boss_definitions.get("fractals", {})
-            for scale in fractal_defs:
-                 if scale.endswith("CM"): preset_selection["fractals"].extend(fractal_defs[scale].keys())
-        elif preset_key == "strikes":
-             preset_selection["strikes"] = []
-             strike_defs = self.boss_definitions.get("strikes", {})
-             for section in strike_defs:
-                 preset_selection["strikes"].extend(strike_defs[section].keys())
-        return preset_selection
+        return build_preset_selection(self.boss_definitions, preset_key)
 
     def _ask_title_and_start_upload(self, boss_selection: Dict[str, List[str]]):
         """Función auxiliar para pedir título e iniciar subida."""
@@ -160,6 +256,10 @@ class SelectionView(ctk.CTkFrame):
             self.update_status(self.get_string("upload_status_no_selection"), "orange")
             return
         show_duration = self.show_duration_var.get()
+        since = None
+        if self.session_mode_var.get():
+            since = parse_session_start(self.session_start_entry.get())
+            if since is None: self.update_status(self.get_string("upload_status_invalid_session_start"), "orange"); return
         dialog = ctk.CTkInputDialog(text=self.get_string("upload_ask_title_dialog_text"), title=self.get_string("upload_ask_title_dialog_title"))
         try:
             dialog.update_idletasks(); dialog_width = dialog.winfo_width(); dialog_height = dialog.winfo_height()
@@ -174,8 +274,8 @@ class SelectionView(ctk.CTkFrame):
         if upload_title is None: print("Subida cancelada por el usuario."); return
         upload_title = upload_title.strip()
         self.update_status(self.get_string("upload_status_starting"), "gray")
-        self.disable_upload_buttons()
-        if self.state_manager: self.state_manager.start_upload(boss_selection, show_duration=show_duration, upload_title=upload_title)
+        # Los botones siguen activos: cada subida es un lote nuevo que se intercala con los que ya estén en curso
+        if self.state_manager: self.state_manager.start_upload(boss_selection, show_duration=show_duration, upload_title=upload_title, since=since)
         else: self.update_status(self.get_string("upload_status_error_state_manager"), "red"); self.enable_upload_buttons()
 
     def start_preset_upload(self, preset_key: str):
@@ -204,6 +304,53 @@ class SelectionView(ctk.CTkFrame):
         self.specific_strike_button.configure(state="normal"); self.specific_fractal_button.configure(state="normal")
         self.specific_upload_button.configure(state="normal")
 
+    def pause_button_action(self):
+        """Manejador del botón 'Pausar/Reanudar'."""
+        if self.state_manager: self.state_manager.toggle_pause_upload()
+
+    def cancel_button_action(self):
+        """Manejador del botón 'Cancelar'."""
+        if self.state_manager: self.state_manager.cancel_upload()
+
+    def set_batch_controls_active(self, active: bool):
+        """Habilita los botones de cancelar/pausar mientras haya un lote en curso."""
+        state = "normal" if active else "disabled"
+        self.pause_button.configure(state=state); self.cancel_button.configure(state=state)
+        if not active: self.set_pause_state(False)
+        if active and self._throughput_job is None: self._refresh_throughput()
+        elif not active and self._throughput_job is not None: self.after_cancel(self._throughput_job); self._throughput_job = None; self.throughput_label.configure(text="")
+
+    def _refresh_throughput(self):
+        """Muestra la velocidad de subida efectiva cada segundo mientras haya lotes en curso."""
+        if self.state_manager: self.throughput_label.configure(text=self.state_manager.get_upload_throughput_text())
+        self._throughput_job = self.after(THROUGHPUT_REFRESH_MS, self._refresh_throughput)
+
+    def update_batch_row(self, batch_key: int, text: str, paused: bool, cancelled: bool):
+        """Crea o actualiza la fila de un lote: progreso y botones de pausa/cancelación propios."""
+        row = self._batch_rows.get(batch_key)
+        if row is None:
+            label = ctk.CTkLabel(self.batches_frame, text=text, anchor="w")
+            pause = ctk.CTkButton(self.batches_frame, width=90, command=lambda: self.state_manager and self.state_manager.toggle_pause_upload(batch_key))
+            cancel = ctk.CTkButton(self.batches_frame, width=90, text=self.get_string("upload_cancel_button"), fg_color="firebrick", hover_color="darkred",
+                                   command=lambda: self.state_manager and self.state_manager.cancel_upload(batch_key))
+            row = self._batch_rows[batch_key] = {"label": label, "pause": pause, "cancel": cancel}
+            grid_row = max([w["label"].grid_info().get("row", 0) for k, w in self._batch_rows.items() if k != batch_key] or [-1]) + 1
+            label.grid(row=grid_row, column=0, padx=5, pady=1, sticky="ew"); pause.grid(row=grid_row, column=1, padx=5, pady=1); cancel.grid(row=grid_row, column=2, padx=5, pady=1)
+        row["label"].configure(text=text)
+        row["pause"].configure(text=self.get_string("upload_resume_button" if paused else "upload_pause_button"), state="disabled" if cancelled else "normal")
+        row["cancel"].configure(state="disabled" if cancelled else "normal")
+
+    def remove_batch_row(self, batch_key: int):
+        """Quita la fila de un lote terminado."""
+        row = self._batch_rows.pop(batch_key, None)
+        if row:
+            for widget in row.values(): widget.destroy()
+
+    def set_pause_state(self, paused: bool):
+        """Cambia el texto del botón de pausa según el estado del lote."""
+        self._batch_paused = paused
+        self.pause_button.configure(text=self.get_string("upload_resume_button" if paused else "upload_pause_button"))
+
     def update_status(self, message: str, color: str = "gray"):
         """Actualiza la etiqueta de estado y reactiva botones si es un estado final."""
         self.status_label.configure(text=message, text_color=color)
@@ -224,6 +371,11 @@ class SelectionView(ctk.CTkFrame):
         self.specific_upload_button.configure(text=self.get_string("upload_specific_upload_button"))
         self.scrollable_frame.configure(label_text=self.get_string("upload_scrollframe_label"))
         self.duration_checkbox.configure(text=self.get_string("upload_show_duration_checkbox"))
+        self.session_checkbox.configure(text=self.get_string("upload_session_checkbox"))
+        self.cancel_button.configure(text=self.get_string("upload_cancel_button")); self.set_pause_state(self._batch_paused)
+        for row in self._batch_rows.values(): row["cancel"].configure(text=self.get_string("upload_cancel_button"))
+        self.session_start_entry.configure(placeholder_text=self.get_string("upload_session_placeholder"))
+        self.schedule_plan()
 
 # --- Para pruebas directas de esta vista ---
 if __name__ == "__main__":